@@ -422,4 +422,194 @@ LIMIT 1;
 -- Update last_activity for rooms
 UPDATE forum_rooms 
 SET last_activity = CURRENT_TIMESTAMP 
-WHERE id IN (SELECT room_id FROM forum_posts);
\ No newline at end of file
+WHERE id IN (SELECT room_id FROM forum_posts);
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- Incremental message sync: GET /consultations/{id}/messages?after= reads
+-- new messages straight off this index. Microsecond timestamps keep
+-- messages sent within the same second in order.
+ALTER TABLE messages
+    MODIFY created_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+    ADD INDEX idx_messages_consultation_created (consultation_id, created_at, id),
+    DROP INDEX idx_consultation_id;
+
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- Table consultation_read_state: per-participant read watermark, replacing
+-- the per-message is_read flag. A message is read by a participant when
+-- (created_at, id) <= (last_read_at, last_read_message_id).
+CREATE TABLE IF NOT EXISTS consultation_read_state (
+    consultation_id VARCHAR(36) NOT NULL,
+    user_id VARCHAR(36) NOT NULL,
+    last_read_message_id VARCHAR(36) NOT NULL,
+    last_read_at TIMESTAMP(6) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (consultation_id, user_id),
+    FOREIGN KEY (consultation_id) REFERENCES consultations(id) ON DELETE CASCADE
+);
+
+-- Backfill watermarks from messages already flagged as read by their recipient
+INSERT INTO consultation_read_state (consultation_id, user_id, last_read_message_id, last_read_at)
+SELECT
+    m.consultation_id,
+    IF(m.sender_id = c.user_id, c.psychologist_id, c.user_id),
+    m.id,
+    m.created_at
+FROM messages m
+JOIN consultations c ON c.id = m.consultation_id
+WHERE m.is_read = TRUE
+ON DUPLICATE KEY UPDATE
+    last_read_message_id = IF(
+        (VALUES(last_read_at), VALUES(last_read_message_id)) > (last_read_at, last_read_message_id),
+        VALUES(last_read_message_id), last_read_message_id
+    ),
+    last_read_at = GREATEST(last_read_at, VALUES(last_read_at));
+
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- Table user_unread_counters: unread messages per user and consultation, kept
+-- up to date on every new message and read-watermark advance
+CREATE TABLE IF NOT EXISTS user_unread_counters (
+    user_id VARCHAR(36) NOT NULL,
+    consultation_id VARCHAR(36) NOT NULL,
+    unread_count INT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, consultation_id),
+    FOREIGN KEY (consultation_id) REFERENCES consultations(id) ON DELETE CASCADE
+);
+
+-- Backfill counters from the read watermarks
+INSERT INTO user_unread_counters (user_id, consultation_id, unread_count)
+SELECT p.user_id, p.consultation_id, COUNT(*)
+FROM (
+    SELECT id AS consultation_id, user_id FROM consultations
+    UNION ALL
+    SELECT id, psychologist_id FROM consultations WHERE psychologist_id IS NOT NULL
+) p
+JOIN messages m ON m.consultation_id = p.consultation_id AND m.sender_id != p.user_id
+LEFT JOIN consultation_read_state r ON r.consultation_id = p.consultation_id AND r.user_id = p.user_id
+WHERE r.last_read_at IS NULL
+    OR m.created_at > r.last_read_at
+    OR (m.created_at = r.last_read_at AND m.id > r.last_read_message_id)
+GROUP BY p.user_id, p.consultation_id
+ON DUPLICATE KEY UPDATE unread_count = VALUES(unread_count);
+
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- Booking slots read a psychologist's upcoming consultations by date
+ALTER TABLE consultations
+    ADD INDEX idx_consultations_psychologist_date (psychologist_id, preferred_date);
+
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- At most one active (pending or confirmed) booking per psychologist start time.
+-- active_slot is NULL for every other status, and NULLs never collide in a unique key.
+-- Cancel any existing duplicates before adding the key, e.g. find them with:
+--   SELECT psychologist_id, preferred_date, preferred_time, COUNT(*) FROM consultations
+--   WHERE status IN ('pending', 'confirmed') GROUP BY 1, 2, 3 HAVING COUNT(*) > 1;
+ALTER TABLE consultations
+    ADD COLUMN active_slot TINYINT GENERATED ALWAYS AS (IF(status IN ('pending', 'confirmed'), 1, NULL)) VIRTUAL,
+    ADD UNIQUE KEY uq_consultations_active_slot (psychologist_id, preferred_date, preferred_time, active_slot);
+
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- Table consultation_stats: per-user and per-psychologist consultation totals, adjusted
+-- by delta whenever a consultation is created or its status, duration or price changes
+CREATE TABLE IF NOT EXISTS consultation_stats (
+    owner_role ENUM('user', 'psychologist') NOT NULL,
+    owner_id VARCHAR(36) NOT NULL,
+    total_sessions INT NOT NULL DEFAULT 0,
+    pending_sessions INT NOT NULL DEFAULT 0,
+    upcoming_sessions INT NOT NULL DEFAULT 0,
+    completed_sessions INT NOT NULL DEFAULT 0,
+    total_minutes INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(12,2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (owner_role, owner_id)
+);
+
+-- Backfill from existing consultations
+INSERT INTO consultation_stats (owner_role, owner_id, total_sessions, pending_sessions, upcoming_sessions, completed_sessions, total_minutes, total_amount)
+SELECT 'user', user_id, COUNT(*),
+    COUNT(CASE WHEN status = 'pending' THEN 1 END),
+    COUNT(CASE WHEN status = 'confirmed' THEN 1 END),
+    COUNT(CASE WHEN status = 'completed' THEN 1 END),
+    COALESCE(SUM(duration), 0), COALESCE(SUM(price), 0)
+FROM consultations
+GROUP BY user_id
+ON DUPLICATE KEY UPDATE total_sessions = VALUES(total_sessions), pending_sessions = VALUES(pending_sessions),
+    upcoming_sessions = VALUES(upcoming_sessions), completed_sessions = VALUES(completed_sessions),
+    total_minutes = VALUES(total_minutes), total_amount = VALUES(total_amount);
+
+INSERT INTO consultation_stats (owner_role, owner_id, total_sessions, pending_sessions, upcoming_sessions, completed_sessions, total_minutes, total_amount)
+SELECT 'psychologist', psychologist_id, COUNT(*),
+    COUNT(CASE WHEN status = 'pending' THEN 1 END),
+    COUNT(CASE WHEN status = 'confirmed' THEN 1 END),
+    COUNT(CASE WHEN status = 'completed' THEN 1 END),
+    COALESCE(SUM(duration), 0), COALESCE(SUM(price), 0)
+FROM consultations
+GROUP BY psychologist_id
+ON DUPLICATE KEY UPDATE total_sessions = VALUES(total_sessions), pending_sessions = VALUES(pending_sessions),
+    upcoming_sessions = VALUES(upcoming_sessions), completed_sessions = VALUES(completed_sessions),
+    total_minutes = VALUES(total_minutes), total_amount = VALUES(total_amount);
+
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- Psychologist queue: filter on (psychologist_id, status) and read in urgency DESC, preferred_date, id
+-- order straight off the index, so neither the first page nor deep pages filesort (needs MySQL 8.0+ for DESC)
+-- idx_psychologist_id is a prefix of this and of idx_consultations_psychologist_date
+ALTER TABLE consultations
+    ADD INDEX idx_consultations_queue (psychologist_id, status, urgency DESC, preferred_date),
+    DROP INDEX idx_psychologist_id;
+
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- Message sync cursor: created_at is stamped before commit, so paging on
+-- (created_at, id) can skip a message that commits after a later-stamped one.
+-- seq is assigned by the database and sends lock the consultation row until
+-- commit, so within a consultation seq order is commit order.
+ALTER TABLE messages ADD COLUMN seq BIGINT UNSIGNED NULL;
+
+SET @seq = 0;
+UPDATE messages SET seq = (@seq := @seq + 1) ORDER BY created_at, id;
+
+ALTER TABLE messages
+    MODIFY seq BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    ADD UNIQUE KEY uq_messages_seq (seq),
+    ADD INDEX idx_messages_consultation_seq (consultation_id, seq),
+    DROP INDEX idx_messages_consultation_created;
+
+##################################################################################################################################################################################################################################################################################
+
+USE mental_health_api;
+
+-- Read watermarks move to the message seq, for the same reason the sync
+-- cursor did: (created_at, id) is not commit order. A message is read by a
+-- participant when seq <= last_read_seq. seq was backfilled in (created_at, id)
+-- order, so the old watermark maps onto the last seq at or before it.
+ALTER TABLE consultation_read_state ADD COLUMN last_read_seq BIGINT UNSIGNED NOT NULL DEFAULT 0 AFTER last_read_message_id;
+
+UPDATE consultation_read_state r
+SET r.last_read_seq = (
+    SELECT COALESCE(MAX(m.seq), 0) FROM messages m
+    WHERE m.consultation_id = r.consultation_id
+    AND (m.created_at, m.id) <= (r.last_read_at, r.last_read_message_id)
+);
+
+ALTER TABLE consultation_read_state DROP COLUMN last_read_at;
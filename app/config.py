@@ -10,6 +10,44 @@ class Settings:
     DB_NAME: str = os.getenv("DB_NAME", "mental_health_api")
     DB_USER: str = os.getenv("DB_USER", "root")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    # How long an off-loop checkout waits for a connection to come back; the event loop never waits
+    DB_POOL_WAIT_MS: int = int(os.getenv("DB_POOL_WAIT_MS", 500))
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 64))
+    # Comma-separated host[:port] list; replicas share the primary's database and credentials
+    DB_REPLICA_HOSTS: str = os.getenv("DB_REPLICA_HOSTS", "")
+    DB_REPLICA_EJECT_SECONDS: float = float(os.getenv("DB_REPLICA_EJECT_SECONDS", 30))
+    DB_RETRY_ATTEMPTS: int = int(os.getenv("DB_RETRY_ATTEMPTS", 2))
+    DB_RETRY_BASE_DELAY_MS: float = float(os.getenv("DB_RETRY_BASE_DELAY_MS", 25))
+    DB_RETRY_MAX_DELAY_MS: float = float(os.getenv("DB_RETRY_MAX_DELAY_MS", 250))
+    DB_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", 5))
+    DB_BREAKER_RESET_SECONDS: float = float(os.getenv("DB_BREAKER_RESET_SECONDS", 10))
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 200))
+    SLOW_QUERY_LOG_SIZE: int = int(os.getenv("SLOW_QUERY_LOG_SIZE", 100))
+    
+    # Health checks
+    HEALTH_CHECK_CACHE_SECONDS: float = float(os.getenv("HEALTH_CHECK_CACHE_SECONDS", 2))
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", 1))
+    HEALTH_CHECK_MAX_LATENCY_MS: float = float(os.getenv("HEALTH_CHECK_MAX_LATENCY_MS", 250))
+    
+    # Caches
+    CONSULTATION_ACCESS_CACHE_SIZE: int = int(os.getenv("CONSULTATION_ACCESS_CACHE_SIZE", 1024))
+    CONSULTATION_ACCESS_CACHE_TTL_SECONDS: float = float(os.getenv("CONSULTATION_ACCESS_CACHE_TTL_SECONDS", 30))
+    PSYCHOLOGIST_INDEX_REFRESH_SECONDS: float = float(os.getenv("PSYCHOLOGIST_INDEX_REFRESH_SECONDS", 300))
+    BOOKING_CACHE_SIZE: int = int(os.getenv("BOOKING_CACHE_SIZE", 1024))
+    BOOKING_CACHE_TTL_SECONDS: float = float(os.getenv("BOOKING_CACHE_TTL_SECONDS", 60))
+    
+    # Booking slots
+    SLOT_STEP_MINUTES: int = int(os.getenv("SLOT_STEP_MINUTES", 30))
+    SLOT_HORIZON_DAYS: int = int(os.getenv("SLOT_HORIZON_DAYS", 60))
+    
+    # WebSocket
+    WS_MAX_QUEUE_SIZE: int = int(os.getenv("WS_MAX_QUEUE_SIZE", 100))
+    
+    # Logging
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
     
     # JWT
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "fallback-secret-key")
@@ -17,6 +55,9 @@ class Settings:
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("JWT_REFRESH_TOKEN_EXPIRE_DAYS", 30))
     
+    # Admin: comma-separated user ids allowed on /admin routes; none when empty
+    ADMIN_USER_IDS: str = os.getenv("ADMIN_USER_IDS", "")
+    
     # App
     APP_NAME: str = os.getenv("APP_NAME", "Mental Health API")
     APP_VERSION: str = os.getenv("APP_VERSION", "1.0.0")
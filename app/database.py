@@ -1,33 +1,332 @@
 import mysql.connector
-from mysql.connector import Error
+from collections import OrderedDict
+from mysql.connector import Error, pooling
+from mysql.connector.constants import ClientFlag
+from mysql.connector.errors import PoolError
 from app.config import settings
+from app.utils.metrics import registry, Counter, Gauge, record_cache_hit, record_cache_miss
+import asyncio
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+def on_event_loop() -> bool:
+    """Whether this thread is running an event loop, i.e. called from an async handler"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+class StatementCache:
+    """
+    LRU of server-side prepared statements for one physical connection.
+    
+    Each entry is a prepared cursor plus the exact query string it was
+    prepared with: the connector only skips re-preparing when execute()
+    is handed that same string object, so callers must use the cached one.
+    """
+    def __init__(self, connection_id: int, max_size: int):
+        self.connection_id = connection_id
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, connection, query: str):
+        entry = self.entries.get(query)
+        if entry is not None:
+            self.entries.move_to_end(query)
+            record_cache_hit("prepared_statements")
+            return entry
+
+        record_cache_miss("prepared_statements")
+        entry = (query, connection.cursor(prepared=True, dictionary=True))
+        self.entries[query] = entry
+        if len(self.entries) > self.max_size:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self._close(evicted)
+        return entry
+
+    def discard(self, query: str):
+        entry = self.entries.pop(query, None)
+        if entry is not None:
+            self._close(entry[1])
+
+    @staticmethod
+    def _close(cursor):
+        try:
+            cursor.close()
+        except Error as e:
+            logger.warning("⚠️  Could not close prepared statement: %s", e)
+
+def create_pool(pool_name: str, host: str, port: int):
+    return pooling.MySQLConnectionPool(
+        pool_name=pool_name,
+        pool_size=settings.DB_POOL_SIZE,
+        host=host,
+        port=port,
+        database=settings.DB_NAME,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        autocommit=True,
+        # Resetting the session on checkin would deallocate every prepared statement
+        pool_reset_session=False,
+        # Report matched rather than changed rows, so a no-op UPDATE still counts as found
+        client_flags=[ClientFlag.FOUND_ROWS]
+    )
+
+def parse_hosts(value: str) -> list:
+    """Parse a comma-separated host[:port] list"""
+    hosts = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(":")
+        hosts.append((host, int(port) if port else settings.DB_PORT))
+    return hosts
+
+class Replica:
+    def __init__(self, index: int, host: str, port: int):
+        self.index = index
+        self.host = host
+        self.port = port
+        self.name = f"{host}:{port}"
+        self.pool = None
+        self.ejected_until = 0.0
+
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin. A replica that fails to connect or
+    errors mid-query is ejected for DB_REPLICA_EJECT_SECONDS; the first
+    read after that window is its health check.
+    """
+    def __init__(self, hosts: list):
+        self.replicas = [Replica(index, host, port) for index, (host, port) in enumerate(hosts)]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def _candidates(self) -> list:
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        return [replica for replica in ordered if replica.is_healthy()]
+
+    def get_connection(self):
+        """Return (replica, connection), or (None, None) when no replica can serve"""
+        for replica in self._candidates():
+            try:
+                with self._lock:
+                    if replica.pool is None:
+                        replica.pool = create_pool(f"mental_health_replica_{replica.index}", replica.host, replica.port)
+                return replica, replica.pool.get_connection()
+            except PoolError:
+                # Busy rather than sick; try the next one
+                continue
+            except Error as e:
+                logger.warning("⚠️  Replica %s unavailable: %s", replica.name, e)
+                self.eject(replica)
+        return None, None
+
+    def release_connection(self, connection):
+        try:
+            connection.close()
+        except Error as e:
+            logger.warning("⚠️  Could not return replica connection: %s", e)
+
+    def eject(self, replica: Replica):
+        replica.ejected_until = time.monotonic() + settings.DB_REPLICA_EJECT_SECONDS
+        REPLICA_EJECTIONS.inc(replica.name)
+        logger.warning("❌ Replica %s ejected for %ss", replica.name, settings.DB_REPLICA_EJECT_SECONDS)
+
+    def healthy_count(self) -> int:
+        return sum(1 for replica in self.replicas if replica.is_healthy())
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive connection failures and refuses new
+    checkouts for `reset_seconds`, so a sick database sheds load instead of
+    every request waiting on its own connect timeout. When the window ends
+    one request is let through as a probe; the rest wait another window
+    unless it succeeds.
+    """
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_seconds:
+                return False
+            self.opened_at = now
+            return True
+
+    def record_success(self):
+        if self.failures == 0 and self.opened_at is None:
+            return
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("✅ Database circuit breaker closed")
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is None and self.failures < self.threshold:
+                return
+            if self.opened_at is None:
+                logger.error("❌ Database circuit breaker open after %s failures", self.failures)
+            self.opened_at = time.monotonic()
 
 class Database:
     def __init__(self):
-        self.connection = None
-    
+        self.pool = None
+        self.in_use = 0
+        self._lock = threading.Lock()
+        # Signalled on every checkin, for checkouts waiting on an exhausted pool
+        self._returned = threading.Condition(self._lock)
+        # Keyed on the physical connection, which outlives each pool checkout
+        self._statement_caches = weakref.WeakKeyDictionary()
+        self.replicas = ReplicaSet(parse_hosts(settings.DB_REPLICA_HOSTS))
+        self.breaker = CircuitBreaker(settings.DB_BREAKER_FAILURE_THRESHOLD, settings.DB_BREAKER_RESET_SECONDS)
+
+    def _create_pool(self):
+        self.pool = create_pool("mental_health_pool", settings.DB_HOST, settings.DB_PORT)
+        logger.info("✅ Database connected successfully!")
+
     def get_connection(self):
+        """
+        Check out a pooled connection, waiting up to DB_POOL_WAIT_MS for one
+        to come back when the pool is empty. The pool itself never waits.
+        
+        Statements hold a connection only while they run, so the ones this
+        waits on belong to other threads: threadpool work, or transactions
+        opened outside the event loop. On the event loop it fails fast
+        instead, since blocking there stalls every other request too.
+        """
+        if not self.breaker.allow():
+            BREAKER_REJECTIONS.inc()
+            return None
+        wait_ms = 0 if on_event_loop() else settings.DB_POOL_WAIT_MS
+        deadline = time.monotonic() + wait_ms / 1000
         try:
-            if self.connection is None or not self.connection.is_connected():
-                self.connection = mysql.connector.connect(
-                    host=settings.DB_HOST,
-                    port=settings.DB_PORT,
-                    database=settings.DB_NAME,
-                    user=settings.DB_USER,
-                    password=settings.DB_PASSWORD,
-                    autocommit=True
-                )
-                print("✅ Database connected successfully!")
-            return self.connection
+            with self._lock:
+                if self.pool is None:
+                    self._create_pool()
+            while True:
+                try:
+                    connection = self.pool.get_connection()
+                    break
+                except PoolError as e:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        POOL_EXHAUSTED.inc()
+                        logger.error("❌ Database pool exhausted: %s", e)
+                        return None
+                    with self._returned:
+                        # Short slices, in case a checkin landed before this started waiting
+                        self._returned.wait(min(remaining, 0.05))
+            with self._lock:
+                self.in_use += 1
+            # Checkout pings or reconnects, so a connection in hand means the server is up
+            self.breaker.record_success()
+            return connection
         except Error as e:
-            print(f"❌ Error connecting to MySQL: {e}")
+            self.breaker.record_failure()
+            logger.error("❌ Error connecting to MySQL: %s", e)
             return None
-    
+
+    def release_connection(self, connection):
+        try:
+            # Pooled connections go back to the pool on close()
+            connection.close()
+        finally:
+            with self._lock:
+                self.in_use -= 1
+                self._returned.notify()
+
+    def statement_cache(self, connection):
+        """Prepared statement cache for a checked-out connection"""
+        raw_connection = getattr(connection, "_cnx", connection)
+        connection_id = connection.connection_id
+        with self._lock:
+            cache = self._statement_caches.get(raw_connection)
+            # A reconnect gives a new server session without the old statements
+            if cache is None or cache.connection_id != connection_id:
+                cache = StatementCache(connection_id, settings.DB_STATEMENT_CACHE_SIZE)
+                self._statement_caches[raw_connection] = cache
+        return cache
+
+    def ping(self):
+        """Run SELECT 1 through the pool, returning latency in seconds or None"""
+        connection = self.get_connection()
+        if connection is None:
+            return None
+
+        started = time.perf_counter()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return time.perf_counter() - started
+        except Error as e:
+            logger.warning("❌ Database ping failed: %s", e)
+            return None
+        finally:
+            self.release_connection(connection)
+
+    def pool_size(self):
+        return settings.DB_POOL_SIZE
+
     def close_connection(self):
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            self.connection = None
-            print("✅ Database connection closed")
+        if self.pool is not None:
+            self.pool._remove_connections()
+            self.pool = None
+            logger.info("✅ Database connection closed")
+        for replica in self.replicas.replicas:
+            if replica.pool is not None:
+                replica.pool._remove_connections()
+                replica.pool = None
 
 # Global database instance
-db = Database()
\ No newline at end of file
+db = Database()
+
+POOL_EXHAUSTED = registry.register(Counter(
+    "db_pool_exhausted_total", "Connection requests rejected because the pool was exhausted"
+))
+BREAKER_REJECTIONS = registry.register(Counter(
+    "db_circuit_breaker_rejections_total", "Connection requests refused while the circuit breaker was open"
+))
+registry.register(Gauge("db_circuit_breaker_open", "1 while the database circuit breaker is open", lambda: int(db.breaker.is_open())))
+REPLICA_EJECTIONS = registry.register(Counter(
+    "db_replica_ejections_total", "Read replicas taken out of rotation after a failure", ("replica",)
+))
+registry.register(Gauge("db_replicas_healthy", "Read replicas currently in rotation", db.replicas.healthy_count))
+registry.register(Gauge("db_pool_size", "Configured connection pool size", db.pool_size))
+registry.register(Gauge("db_pool_in_use", "Connections currently checked out of the pool", lambda: db.in_use))
+registry.register(Gauge(
+    "db_pool_saturation", "Fraction of the pool currently checked out",
+    lambda: db.in_use / db.pool_size() if db.pool_size() else 0
+))
@@ -1,18 +1,132 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, JSONResponse
+from datetime import datetime
 from app.config import settings
+from app.database import db
+from app.logging_config import setup_logging, request_id_var
+from app.utils.json_response import FastJSONResponse
 from app.routes import (
     auth, users, mood, psychologists, consultations, messaging,
-    forum, forum_posts, forum_comments  # ADD new forum routes
+    forum, forum_posts, forum_comments,  # ADD new forum routes
+    admin
 )
+from app.utils.query_stats import start_query_stats, reset_query_stats
+from app.utils.db_session import start_session, end_session
+from app.utils.db_errors import DatabaseError, TransientDatabaseError, DatabaseUnavailableError
+from app.utils.psychologist_index import psychologist_index
+from app.utils.metrics import (
+    registry, REQUEST_LATENCY, REQUEST_COUNT, REQUEST_EXCEPTIONS,
+    record_cache_hit, record_cache_miss
+)
+import asyncio
+import logging
+import time
+import uuid
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Mental Health App API - Complete System with Authentication, Mood Tracking, Consultation Management, and Forum Community",  # UPDATE
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse
 )
 
+_background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Builds the directory index now and keeps it fresh for writes made by other workers
+    _background_tasks.append(asyncio.create_task(
+        psychologist_index.refresh_periodically(settings.PSYCHOLOGIST_INDEX_REFRESH_SECONDS)
+    ))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in _background_tasks:
+        task.cancel()
+    _background_tasks.clear()
+
+def _route_label(request: Request) -> str:
+    # Use the route template so path parameters don't explode label cardinality
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    request_id_token = request_id_var.set(request_id)
+    stats, token = start_query_stats()
+    session, session_token = start_session()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        REQUEST_EXCEPTIONS.inc(request.method, _route_label(request))
+        end_session(session, session_token, commit=False)
+        raise
+    else:
+        # Commit before the client sees the response; server errors roll back
+        if not end_session(session, session_token, commit=response.status_code < 500):
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": "Internal server error: failed to commit transaction"}
+            )
+    finally:
+        reset_query_stats(token)
+        request_id_var.reset(request_id_token)
+
+    elapsed = time.perf_counter() - started
+    route = _route_label(request)
+    REQUEST_LATENCY.observe(elapsed, request.method, route)
+    REQUEST_COUNT.inc(request.method, route, str(response.status_code))
+
+    total_ms = elapsed * 1000
+    response.headers["Server-Timing"] = f"{stats.server_timing()}, total;dur={total_ms:.2f}"
+    response.headers["X-Request-ID"] = request_id
+    logger.info(
+        "📊 request completed",
+        extra={
+            "request_id": request_id,
+            "method": request.method,
+            "route": route,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.total_time * 1000, 2),
+            "slowest_ms": round(stats.slowest_time * 1000, 2),
+            "total_ms": round(total_ms, 2)
+        }
+    )
+    return response
+
+@app.exception_handler(DatabaseUnavailableError)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily unavailable: database unavailable"},
+        headers={"Retry-After": str(int(settings.DB_BREAKER_RESET_SECONDS))}
+    )
+
+@app.exception_handler(TransientDatabaseError)
+async def transient_database_error_handler(request: Request, exc: TransientDatabaseError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily unavailable: database busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(DatabaseError)
+async def database_error_handler(request: Request, exc: DatabaseError):
+    # The data layer already logged the underlying error
+    return JSONResponse(
+        status_code=500,
+        content={"detail": "Internal server error: database error"}
+    )
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -23,6 +137,7 @@ app.include_router(messaging.router)
 app.include_router(forum.router)           # ADD
 app.include_router(forum_posts.router)     # ADD
 app.include_router(forum_comments.router)  # ADD
+app.include_router(admin.router)
 
 @app.get("/")
 async def root():
@@ -41,7 +156,6 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    from datetime import datetime
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
@@ -56,4 +170,70 @@ async def health_check():
             "forum-posts",
             "forum-comments"  # ADD
         ]
-    }
\ No newline at end of file
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+async def liveness_check():
+    return {
+        "status": "alive",
+        "timestamp": datetime.now().isoformat()
+    }
+
+_readiness = {"checked_at": 0.0, "result": None}
+_readiness_lock = asyncio.Lock()
+
+async def _check_readiness():
+    try:
+        latency = await asyncio.wait_for(
+            run_in_threadpool(db.ping),
+            timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        latency = None
+        reason = "database ping timed out"
+    else:
+        reason = "database unreachable" if latency is None else None
+    if latency is None and db.breaker.is_open():
+        reason = "database circuit breaker open"
+
+    pool_size = db.pool_size()
+    pool_exhausted = db.in_use >= pool_size
+    latency_ms = round(latency * 1000, 2) if latency is not None else None
+
+    if reason is None and latency_ms > settings.HEALTH_CHECK_MAX_LATENCY_MS:
+        reason = "database latency above threshold"
+    if reason is None and pool_exhausted:
+        reason = "connection pool exhausted"
+
+    return {
+        "status": "ready" if reason is None else "not_ready",
+        "reason": reason,
+        "timestamp": datetime.now().isoformat(),
+        "database": {
+            "latency_ms": latency_ms,
+            "pool_size": pool_size,
+            "pool_in_use": db.in_use,
+            "pool_exhausted": pool_exhausted,
+            "circuit_open": db.breaker.is_open()
+        }
+    }
+
+@app.get("/health/ready")
+async def readiness_check():
+    # Cache the probe result briefly so load balancer polling doesn't hammer the DB
+    async with _readiness_lock:
+        now = time.monotonic()
+        if _readiness["result"] is not None and now - _readiness["checked_at"] < settings.HEALTH_CHECK_CACHE_SECONDS:
+            record_cache_hit("readiness")
+        else:
+            record_cache_miss("readiness")
+            _readiness["result"] = await _check_readiness()
+            _readiness["checked_at"] = time.monotonic()
+        result = _readiness["result"]
+
+    status_code = 200 if result["status"] == "ready" else 503
+    return JSONResponse(content=result, status_code=status_code)
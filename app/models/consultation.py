@@ -3,6 +3,26 @@ from datetime import datetime, date, time
 import uuid
 
 class Consultation:
+    __slots__ = (
+        'id',
+        'user_id',
+        'psychologist_id',
+        'type',
+        'status',
+        'preferred_date',
+        'preferred_time',
+        'duration',
+        'reason',
+        'urgency',
+        'price',
+        'notes',
+        'scheduled_at',
+        'started_at',
+        'completed_at',
+        'created_at',
+        'updated_at',
+    )
+    
     def __init__(
         self,
         id: str = None,
@@ -23,7 +43,7 @@ class Consultation:
         created_at: datetime = None,
         updated_at: datetime = None
     ):
-        self.id = id or str(uuid.uuid4())
+        self.id = id
         self.user_id = user_id
         self.psychologist_id = psychologist_id
         self.type = type
@@ -38,8 +58,8 @@ class Consultation:
         self.scheduled_at = scheduled_at
         self.started_at = started_at
         self.completed_at = completed_at
-        self.created_at = created_at or datetime.now()
-        self.updated_at = updated_at or datetime.now()
+        self.created_at = created_at
+        self.updated_at = updated_at
     
     @classmethod
     def from_dict(cls, data: dict):
@@ -63,6 +83,16 @@ class Consultation:
             updated_at=data.get('updated_at')
         )
     
+    @classmethod
+    def create(cls, data: dict):
+        """New consultation with a generated id and timestamps"""
+        instance = cls.from_dict(data)
+        instance.id = instance.id or str(uuid.uuid4())
+        now = datetime.now()
+        instance.created_at = instance.created_at or now
+        instance.updated_at = instance.updated_at or now
+        return instance
+    
     def to_dict(self):
         return {
             'id': self.id,
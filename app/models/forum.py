@@ -1,7 +1,6 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
-import json
 
 class ForumRoom:
     def __init__(
@@ -36,14 +35,6 @@ class ForumRoom:
     
     @classmethod
     def from_dict(cls, data: dict):
-        # Handle JSON fields
-        rules = data.get('rules', [])
-        if isinstance(rules, str):
-            try:
-                rules = json.loads(rules)
-            except:
-                rules = []
-        
         return cls(
             id=data.get('id'),
             name=data.get('name'),
@@ -54,7 +45,7 @@ class ForumRoom:
             post_count=data.get('post_count', 0),
             last_activity=data.get('last_activity'),
             is_private=data.get('is_private', False),
-            rules=rules,
+            rules=data.get('rules'),
             created_by=data.get('created_by'),
             created_at=data.get('created_at'),
             updated_at=data.get('updated_at')
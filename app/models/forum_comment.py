@@ -3,6 +3,19 @@ from datetime import datetime
 import uuid
 
 class ForumComment:
+    __slots__ = (
+        'id',
+        'post_id',
+        'author_id',
+        'content',
+        'is_anonymous',
+        'like_count',
+        'is_edited',
+        'edited_at',
+        'created_at',
+        'updated_at',
+    )
+    
     def __init__(
         self,
         id: str = None,
@@ -16,7 +29,7 @@ class ForumComment:
         created_at: datetime = None,
         updated_at: datetime = None
     ):
-        self.id = id or str(uuid.uuid4())
+        self.id = id
         self.post_id = post_id
         self.author_id = author_id
         self.content = content
@@ -24,8 +37,8 @@ class ForumComment:
         self.like_count = like_count
         self.is_edited = is_edited
         self.edited_at = edited_at
-        self.created_at = created_at or datetime.now()
-        self.updated_at = updated_at or datetime.now()
+        self.created_at = created_at
+        self.updated_at = updated_at
     
     @classmethod
     def from_dict(cls, data: dict):
@@ -42,6 +55,16 @@ class ForumComment:
             updated_at=data.get('updated_at')
         )
     
+    @classmethod
+    def create(cls, data: dict):
+        """New comment with a generated id and timestamps"""
+        instance = cls.from_dict(data)
+        instance.id = instance.id or str(uuid.uuid4())
+        now = datetime.now()
+        instance.created_at = instance.created_at or now
+        instance.updated_at = instance.updated_at or now
+        return instance
+    
     def to_dict(self):
         return {
             'id': self.id,
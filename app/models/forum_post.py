@@ -1,9 +1,26 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
-import json
 
 class ForumPost:
+    __slots__ = (
+        'id',
+        'room_id',
+        'author_id',
+        'content',
+        'is_anonymous',
+        'mood',
+        'tags',
+        'attachments',
+        'like_count',
+        'comment_count',
+        'share_count',
+        'is_edited',
+        'edited_at',
+        'created_at',
+        'updated_at',
+    )
+    
     def __init__(
         self,
         id: str = None,
@@ -22,7 +39,7 @@ class ForumPost:
         created_at: datetime = None,
         updated_at: datetime = None
     ):
-        self.id = id or str(uuid.uuid4())
+        self.id = id
         self.room_id = room_id
         self.author_id = author_id
         self.content = content
@@ -35,26 +52,11 @@ class ForumPost:
         self.share_count = share_count
         self.is_edited = is_edited
         self.edited_at = edited_at
-        self.created_at = created_at or datetime.now()
-        self.updated_at = updated_at or datetime.now()
+        self.created_at = created_at
+        self.updated_at = updated_at
     
     @classmethod
     def from_dict(cls, data: dict):
-        # Handle JSON fields
-        tags = data.get('tags', [])
-        if isinstance(tags, str):
-            try:
-                tags = json.loads(tags)
-            except:
-                tags = []
-        
-        attachments = data.get('attachments', [])
-        if isinstance(attachments, str):
-            try:
-                attachments = json.loads(attachments)
-            except:
-                attachments = []
-        
         return cls(
             id=data.get('id'),
             room_id=data.get('room_id'),
@@ -62,8 +64,8 @@ class ForumPost:
             content=data.get('content'),
             is_anonymous=data.get('is_anonymous', False),
             mood=data.get('mood'),
-            tags=tags,
-            attachments=attachments,
+            tags=data.get('tags'),
+            attachments=data.get('attachments'),
             like_count=data.get('like_count', 0),
             comment_count=data.get('comment_count', 0),
             share_count=data.get('share_count', 0),
@@ -73,6 +75,16 @@ class ForumPost:
             updated_at=data.get('updated_at')
         )
     
+    @classmethod
+    def create(cls, data: dict):
+        """New post with a generated id and timestamps"""
+        instance = cls.from_dict(data)
+        instance.id = instance.id or str(uuid.uuid4())
+        now = datetime.now()
+        instance.created_at = instance.created_at or now
+        instance.updated_at = instance.updated_at or now
+        return instance
+    
     def to_dict(self):
         return {
             'id': self.id,
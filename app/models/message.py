@@ -1,9 +1,20 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
-import json
 
 class Message:
+    __slots__ = (
+        'id',
+        'consultation_id',
+        'sender_id',
+        'content',
+        'type',
+        'attachments',
+        'is_read',
+        'read_at',
+        'created_at',
+    )
+    
     def __init__(
         self,
         id: str = None,
@@ -16,7 +27,7 @@ class Message:
         read_at: Optional[datetime] = None,
         created_at: datetime = None
     ):
-        self.id = id or str(uuid.uuid4())
+        self.id = id
         self.consultation_id = consultation_id
         self.sender_id = sender_id
         self.content = content
@@ -24,30 +35,31 @@ class Message:
         self.attachments = attachments or []
         self.is_read = is_read
         self.read_at = read_at
-        self.created_at = created_at or datetime.now()
+        self.created_at = created_at
     
     @classmethod
     def from_dict(cls, data: dict):
-        # Handle JSON fields
-        attachments = data.get('attachments', [])
-        if isinstance(attachments, str):
-            try:
-                attachments = json.loads(attachments)
-            except:
-                attachments = []
-        
         return cls(
             id=data.get('id'),
             consultation_id=data.get('consultation_id'),
             sender_id=data.get('sender_id'),
             content=data.get('content'),
             type=data.get('type', 'text'),
-            attachments=attachments,
+            attachments=data.get('attachments'),
             is_read=data.get('is_read', False),
             read_at=data.get('read_at'),
             created_at=data.get('created_at')
         )
     
+    @classmethod
+    def create(cls, data: dict):
+        """New message with a generated id and created_at"""
+        instance = cls.from_dict(data)
+        instance.id = instance.id or str(uuid.uuid4())
+        now = datetime.now()
+        instance.created_at = instance.created_at or now
+        return instance
+    
     def to_dict(self):
         return {
             'id': self.id,
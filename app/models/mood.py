@@ -1,9 +1,21 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
-import json
 
 class MoodEntry:
+    __slots__ = (
+        'id',
+        'user_id',
+        'mood',
+        'energy_level',
+        'sleep_hours',
+        'activities',
+        'tags',
+        'note',
+        'timestamp',
+        'created_at',
+    )
+    
     def __init__(
         self,
         id: str = None,
@@ -17,7 +29,7 @@ class MoodEntry:
         timestamp: datetime = None,
         created_at: datetime = None
     ):
-        self.id = id or str(uuid.uuid4())
+        self.id = id
         self.user_id = user_id
         self.mood = mood
         self.energy_level = energy_level
@@ -25,39 +37,34 @@ class MoodEntry:
         self.activities = activities or []
         self.tags = tags or []
         self.note = note
-        self.timestamp = timestamp or datetime.now()
-        self.created_at = created_at or datetime.now()
+        self.timestamp = timestamp
+        self.created_at = created_at
     
     @classmethod
     def from_dict(cls, data: dict):
-        # Handle JSON fields
-        activities = data.get('activities', [])
-        if isinstance(activities, str):
-            try:
-                activities = json.loads(activities)
-            except:
-                activities = []
-        
-        tags = data.get('tags', [])
-        if isinstance(tags, str):
-            try:
-                tags = json.loads(tags)
-            except:
-                tags = []
-        
         return cls(
             id=data.get('id'),
             user_id=data.get('user_id'),
             mood=data.get('mood'),
             energy_level=data.get('energy_level'),
             sleep_hours=data.get('sleep_hours'),
-            activities=activities,
-            tags=tags,
+            activities=data.get('activities'),
+            tags=data.get('tags'),
             note=data.get('note'),
             timestamp=data.get('timestamp'),
             created_at=data.get('created_at')
         )
     
+    @classmethod
+    def create(cls, data: dict):
+        """New entry with a generated id, timestamp and created_at"""
+        instance = cls.from_dict(data)
+        instance.id = instance.id or str(uuid.uuid4())
+        now = datetime.now()
+        instance.timestamp = instance.timestamp or now
+        instance.created_at = instance.created_at or now
+        return instance
+    
     def to_dict(self):
         return {
             'id': self.id,
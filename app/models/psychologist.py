@@ -1,9 +1,24 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import uuid
-import json
 
 class Psychologist:
+    __slots__ = (
+        'id',
+        'name',
+        'specialization',
+        'experience',
+        'rating',
+        'price_per_hour',
+        'languages',
+        'availability',
+        'avatar',
+        'bio',
+        'is_available',
+        'created_at',
+        'updated_at',
+    )
+    
     def __init__(
         self,
         id: str = None,
@@ -20,7 +35,7 @@ class Psychologist:
         created_at: datetime = None,
         updated_at: datetime = None
     ):
-        self.id = id or str(uuid.uuid4())
+        self.id = id
         self.name = name
         self.specialization = specialization or []
         self.experience = experience or 0
@@ -31,42 +46,20 @@ class Psychologist:
         self.avatar = avatar
         self.bio = bio
         self.is_available = is_available
-        self.created_at = created_at or datetime.now()
-        self.updated_at = updated_at or datetime.now()
+        self.created_at = created_at
+        self.updated_at = updated_at
     
     @classmethod
     def from_dict(cls, data: dict):
-        # Handle JSON fields
-        specialization = data.get('specialization', [])
-        if isinstance(specialization, str):
-            try:
-                specialization = json.loads(specialization)
-            except:
-                specialization = []
-        
-        languages = data.get('languages', [])
-        if isinstance(languages, str):
-            try:
-                languages = json.loads(languages)
-            except:
-                languages = []
-        
-        availability = data.get('availability', {})
-        if isinstance(availability, str):
-            try:
-                availability = json.loads(availability)
-            except:
-                availability = {}
-        
         return cls(
             id=data.get('id'),
             name=data.get('name'),
-            specialization=specialization,
+            specialization=data.get('specialization'),
             experience=data.get('experience'),
             rating=data.get('rating', 0.0),
             price_per_hour=data.get('price_per_hour'),
-            languages=languages,
-            availability=availability,
+            languages=data.get('languages'),
+            availability=data.get('availability'),
             avatar=data.get('avatar'),
             bio=data.get('bio'),
             is_available=data.get('is_available', True),
@@ -74,6 +67,16 @@ class Psychologist:
             updated_at=data.get('updated_at')
         )
     
+    @classmethod
+    def create(cls, data: dict):
+        """New psychologist with a generated id and timestamps"""
+        instance = cls.from_dict(data)
+        instance.id = instance.id or str(uuid.uuid4())
+        now = datetime.now()
+        instance.created_at = instance.created_at or now
+        instance.updated_at = instance.updated_at or now
+        return instance
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -1,9 +1,22 @@
 from typing import Optional, Dict, Any
 from datetime import datetime
 import uuid
-import json
 
 class User:
+    __slots__ = (
+        'id',
+        'name',
+        'email',
+        'password',
+        'phone',
+        'date_of_birth',
+        'gender',
+        'avatar',
+        'preferences',
+        'created_at',
+        'updated_at',
+    )
+    
     def __init__(
         self,
         id: str = None,
@@ -18,7 +31,7 @@ class User:
         created_at: datetime = None,
         updated_at: datetime = None
     ):
-        self.id = id or str(uuid.uuid4())
+        self.id = id
         self.name = name
         self.email = email
         self.password = password  # Pastikan password disimpan
@@ -27,19 +40,11 @@ class User:
         self.gender = gender
         self.avatar = avatar
         self.preferences = preferences or {}
-        self.created_at = created_at or datetime.now()
-        self.updated_at = updated_at or datetime.now()
+        self.created_at = created_at
+        self.updated_at = updated_at
     
     @classmethod
     def from_dict(cls, data: dict):
-        # Handle preferences from JSON string or dict
-        preferences = data.get('preferences', {})
-        if isinstance(preferences, str):
-            try:
-                preferences = json.loads(preferences)
-            except:
-                preferences = {}
-        
         return cls(
             id=data.get('id'),
             name=data.get('name'),
@@ -49,11 +54,21 @@ class User:
             date_of_birth=data.get('date_of_birth'),
             gender=data.get('gender'),
             avatar=data.get('avatar'),
-            preferences=preferences,
+            preferences=data.get('preferences'),
             created_at=data.get('created_at'),
             updated_at=data.get('updated_at')
         )
     
+    @classmethod
+    def create(cls, data: dict):
+        """New user with a generated id and timestamps"""
+        instance = cls.from_dict(data)
+        instance.id = instance.id or str(uuid.uuid4())
+        now = datetime.now()
+        instance.created_at = instance.created_at or now
+        instance.updated_at = instance.updated_at or now
+        return instance
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from app.config import settings
+from app.utils.slow_query_log import slow_query_log
+from app.auth.jwt_handler import verify_token
+from app.schemas.auth import TokenData
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+def require_admin(token: TokenData = Depends(verify_token)) -> TokenData:
+    """Only users listed in ADMIN_USER_IDS get through"""
+    admin_ids = {value.strip() for value in settings.ADMIN_USER_IDS.split(",") if value.strip()}
+    if token.user_id not in admin_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return token
+
+@router.get("/slow-queries", response_model=dict)
+async def get_slow_queries(
+    token: TokenData = Depends(require_admin),
+    limit: int = Query(10, ge=1, le=100, description="Number of templates")
+):
+    """
+    Get the slowest query templates with their captured EXPLAIN plans (Admin only)
+    """
+    try:
+        return {
+            "success": True,
+            "data": {
+                "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+                "templates": slow_query_log.top_templates(limit),
+                "recent": slow_query_log.recent(limit)
+            }
+        }
+        
+    except Exception as e:
+        logger.error("❌ Error getting slow queries: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
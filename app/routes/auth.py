@@ -5,14 +5,15 @@ from app.schemas.auth import RefreshTokenRequest
 from app.auth.jwt_handler import create_access_token, create_refresh_token, verify_token
 from app.auth.password import hash_password, verify_password
 from app.utils.database import (
-    create_user, get_user_by_email, get_user_by_id,
+    create_user, user_email_exists, get_user_credentials_by_email, get_user_by_id,
     create_refresh_token_db, get_refresh_token, delete_refresh_token,
     delete_user_refresh_tokens
 )
+from app.utils.db_errors import DatabaseError
+from app.utils.db_session import transaction
 from app.models.user import User
 from app.models.token import RefreshToken
 from app.config import settings
-import traceback
 import logging
 import uuid
 
@@ -26,13 +27,12 @@ async def register(user_data: UserCreate):
     Register a new user
     """
     try:
-        logger.info(f"🔍 Register attempt for: {user_data.email}")
+        logger.info("🔍 Register attempt for: %s", user_data.email)
         
         # Check if user already exists
         logger.info("🔍 Checking if user already exists...")
-        existing_user = get_user_by_email(user_data.email)
-        if existing_user:
-            logger.warning(f"❌ User already exists: {user_data.email}")
+        if user_email_exists(user_data.email):
+            logger.warning("❌ User already exists: %s", user_data.email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
@@ -42,7 +42,7 @@ async def register(user_data: UserCreate):
         # Create user dictionary
         logger.info("🔍 Creating user data...")
         user_dict = user_data.dict()
-        logger.debug(f"🔍 User data BEFORE processing: {user_dict}")
+        logger.debug("🔍 User data BEFORE processing: %s", user_dict)
         
         # Hash password
         logger.info("🔍 Hashing password...")
@@ -67,47 +67,45 @@ async def register(user_data: UserCreate):
             'preferences': user_dict.get('preferences', {})
         }
         
-        logger.debug(f"🔍 Final user data for DB: {user_data_for_db}")
+        logger.debug("🔍 Final user data for DB: %s", user_data_for_db)
         
         # Check if password exists
         if 'password' not in user_data_for_db:
             logger.error("❌ Password key missing in user_data_for_db")
-            logger.error(f"🔍 Available keys: {list(user_data_for_db.keys())}")
+            logger.error("🔍 Available keys: %s", list(user_data_for_db.keys()))
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Password processing error"
             )
 
-        # Save to database
-        logger.info("🔍 Saving user to database...")
-        result = create_user(user_data_for_db)
-        logger.info(f"🔍 Database create result: {result}")
-        
-        if not result:
-            logger.error("❌ Database create operation failed")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create user in database"
-            )
-        logger.info("✅ User saved to database successfully")
-
         # Create User instance for response (without password)
-        user_for_response = User.from_dict(user_data_for_db)
+        user_for_response = User.create(user_data_for_db)
 
         # Create JWT tokens
         logger.info("🔍 Creating JWT tokens...")
         access_token = create_access_token(data={"sub": user_id, "email": user_data.email})
         refresh_token = create_refresh_token(data={"sub": user_id, "email": user_data.email})
         logger.info("✅ Tokens created successfully")
-
-        # Save refresh token to database
-        logger.info("🔍 Saving refresh token to database...")
         refresh_token_data = RefreshToken(
             user_id=user_id,
             token=refresh_token,
             expires_at=datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
         )
-        refresh_db_result = create_refresh_token_db(refresh_token_data.to_dict())
+
+        # Save the user and their refresh token together
+        logger.info("🔍 Saving user to database...")
+        with transaction():
+            result = create_user(user_data_for_db)
+            logger.info("🔍 Database create result: %s", result)
+            
+            if not result:
+                logger.error("❌ Database create operation failed")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to create user in database"
+                )
+            refresh_db_result = create_refresh_token_db(refresh_token_data.to_dict())
+        logger.info("✅ User saved to database successfully")
         
         if not refresh_db_result:
             logger.warning("⚠️  Refresh token might not be saved to database")
@@ -130,17 +128,18 @@ async def register(user_data: UserCreate):
             }
         }
         
-        logger.info(f"🎉 Register successful for: {user_data.email}")
+        logger.info("🎉 Register successful for: %s", user_data.email)
         return response_data
         
     except HTTPException as he:
         # Re-raise HTTP exceptions
-        logger.warning(f"HTTPException in register: {he.detail}")
+        logger.warning("HTTPException in register: %s", he.detail)
         raise he
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Unexpected error in register: {str(e)}")
-        logger.error(f"🔍 Traceback: {traceback.format_exc()}")
+        logger.exception("❌ Unexpected error in register: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during registration"
@@ -152,23 +151,23 @@ async def login(login_data: UserLogin):
     Login user and return JWT tokens
     """
     try:
-        logger.info(f"🔍 Login attempt for: {login_data.email}")
+        logger.info("🔍 Login attempt for: %s", login_data.email)
         
         # Check if user exists
         logger.info("🔍 Checking user existence...")
-        user_data = get_user_by_email(login_data.email)
+        user_data = get_user_credentials_by_email(login_data.email)
         if not user_data:
-            logger.warning(f"❌ User not found: {login_data.email}")
+            logger.warning("❌ User not found: %s", login_data.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
-        logger.info(f"✅ User found: {user_data['email']}")
+        logger.info("✅ User found: %s", user_data['email'])
 
         # Verify password
         logger.info("🔍 Verifying password...")
         if not verify_password(login_data.password, user_data['password']):
-            logger.warning(f"❌ Password verification failed for: {login_data.email}")
+            logger.warning("❌ Password verification failed for: %s", login_data.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -177,7 +176,7 @@ async def login(login_data: UserLogin):
 
         # Create User instance
         user = User.from_dict(user_data)
-        logger.info(f"🔍 User object created: {user.email}")
+        logger.info("🔍 User object created: %s", user.email)
 
         # Create tokens
         logger.info("🔍 Creating JWT tokens...")
@@ -211,16 +210,17 @@ async def login(login_data: UserLogin):
             }
         }
         
-        logger.info(f"🎉 Login successful for: {login_data.email}")
+        logger.info("🎉 Login successful for: %s", login_data.email)
         return response_data
         
     except HTTPException as he:
-        logger.warning(f"HTTPException in login: {he.detail}")
+        logger.warning("HTTPException in login: %s", he.detail)
         raise he
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Unexpected error in login: {str(e)}")
-        logger.error(f"🔍 Traceback: {traceback.format_exc()}")
+        logger.exception("❌ Unexpected error in login: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during login"
@@ -262,12 +262,12 @@ async def refresh_token(token_data: RefreshTokenRequest):
         user_data = get_user_by_id(token_data_jwt.user_id)
         
         if not user_data:
-            logger.error(f"❌ User not found for ID: {token_data_jwt.user_id}")
+            logger.error("❌ User not found for ID: %s", token_data_jwt.user_id)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
-        logger.info(f"✅ User found: {user_data['email']}")
+        logger.info("✅ User found: %s", user_data['email'])
 
         user = User.from_dict(user_data)
 
@@ -289,12 +289,13 @@ async def refresh_token(token_data: RefreshTokenRequest):
         return response_data
     
     except HTTPException as he:
-        logger.warning(f"HTTPException in refresh: {he.detail}")
+        logger.warning("HTTPException in refresh: %s", he.detail)
         raise he
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Unexpected error in refresh: {str(e)}")
-        logger.error(f"🔍 Traceback: {traceback.format_exc()}")
+        logger.exception("❌ Unexpected error in refresh: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during token refresh"
@@ -328,9 +329,10 @@ async def logout(token_data: RefreshTokenRequest):
         logger.info("🎉 Logout completed")
         return response_data
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Unexpected error in logout: {str(e)}")
-        logger.error(f"🔍 Traceback: {traceback.format_exc()}")
+        logger.exception("❌ Unexpected error in logout: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during logout"
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import Optional, List
-from datetime import datetime
-from app.schemas.consultation import ConsultationCreate, ConsultationResponse, ConsultationUpdate, ConsultationStatusUpdate
+from datetime import datetime, timedelta
+from app.schemas.consultation import ConsultationCreate, ConsultationResponse, ConsultationUpdate, ConsultationStatusUpdate, ConsultationStatus
 from app.utils.database import (
     create_consultation, get_consultations, get_consultation_by_id, 
-    update_consultation, get_consultation_statistics, get_psychologist_by_id
+    update_consultation, get_consultation_statistics, get_psychologist_summary,
+    get_unread_counters, lock_psychologist_for_booking, get_bookings_between,
+    get_consultation_queue, get_consultation_queue_cursor
 )
+from app.utils.db_errors import DatabaseError, DuplicateEntryError
+from app.utils.db_session import DatabaseSession, get_db_session
+from app.utils.slots import booked_intervals, overlaps
 from app.models.consultation import Consultation
+from app.utils.serializers import serialize_rows, CONSULTATION_LIST_FIELDS, CONSULTATION_QUEUE_FIELDS
+from app.utils.json_response import FastJSONResponse
 from app.models.user import User
 from app.auth.jwt_handler import verify_token
 import logging
@@ -29,46 +36,74 @@ async def get_current_user(token: str = Depends(verify_token)):
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_consultation_endpoint(
     consultation_data: ConsultationCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    session: DatabaseSession = Depends(get_db_session)
 ):
     """
-    Create a new consultation request
+    Create a new consultation request.
+    
+    The slot is checked and reserved in one transaction that holds the
+    psychologist's row lock, so concurrent requests for overlapping times
+    queue up and all but the first get 409. A unique key on the active
+    slot backs this up for identical start times.
     """
     try:
-        logger.info(f"🔍 Creating consultation for user: {current_user.email}")
-        
-        # Check if psychologist exists and is available
-        psychologist = get_psychologist_by_id(consultation_data.psychologist_id)
-        if not psychologist:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Psychologist not found"
-            )
-        
-        if not psychologist.get('is_available', True):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Psychologist is not available for new consultations"
-            )
-        
-        # Create consultation object
-        consultation_dict = consultation_data.dict()
-        consultation = Consultation.from_dict(consultation_dict)
-        consultation.user_id = current_user.id
-        consultation.price = psychologist.get('price_per_hour', 0) * (consultation.duration / 60)
-        
-        consultation_dict_for_db = consultation.to_dict()
-        logger.debug(f"🔍 Consultation data: {consultation_dict_for_db}")
-        
-        # Save to database
-        result = create_consultation(consultation_dict_for_db)
-        if not result:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create consultation"
+        logger.info("🔍 Creating consultation for user: %s", current_user.email)
+        
+        requested_start = datetime.combine(consultation_data.preferred_date, consultation_data.preferred_time)
+        requested_end = requested_start + timedelta(minutes=consultation_data.duration)
+        
+        with session.transaction():
+            # Check if psychologist exists and is available, queueing behind other bookings for them
+            psychologist = lock_psychologist_for_booking(consultation_data.psychologist_id)
+            if not psychologist:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Psychologist not found"
+                )
+            
+            if not psychologist.get('is_available', True):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Psychologist is not available for new consultations"
+                )
+            
+            # The day before too, for sessions running past midnight
+            bookings = get_bookings_between(
+                consultation_data.psychologist_id,
+                consultation_data.preferred_date - timedelta(days=1),
+                requested_end.date()
             )
-        
-        logger.info(f"✅ Consultation created for user: {current_user.email}")
+            if overlaps(booked_intervals(bookings), requested_start, requested_end):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="This time slot is already booked"
+                )
+            
+            # Create consultation object
+            consultation_dict = consultation_data.dict()
+            consultation = Consultation.create(consultation_dict)
+            consultation.user_id = current_user.id
+            consultation.price = float(psychologist.get('price_per_hour') or 0) * consultation.duration / 60
+            
+            consultation_dict_for_db = consultation.to_dict()
+            logger.debug("🔍 Consultation data: %s", consultation_dict_for_db)
+            
+            # Save to database
+            try:
+                result = create_consultation(consultation_dict_for_db)
+            except DuplicateEntryError:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="This time slot is already booked"
+                )
+            if not result:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to create consultation"
+                )
+        
+        logger.info("✅ Consultation created for user: %s", current_user.email)
         
         return {
             "success": True,
@@ -79,8 +114,10 @@ async def create_consultation_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error creating consultation: {str(e)}")
+        logger.error("❌ Error creating consultation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -97,26 +134,111 @@ async def get_user_consultations(
     Get user's consultations with filtering
     """
     try:
-        logger.info(f"🔍 Getting consultations for user: {current_user.email}")
+        logger.info("🔍 Getting consultations for user: %s", current_user.email)
         
         consultations_data = get_consultations(user_id=current_user.id, status=status, page=page, limit=limit)
-        consultations = [ConsultationResponse(**Consultation.from_dict(consult).to_dict()) for consult in consultations_data]
-        
-        # Get psychologist details for each consultation
-        for consultation in consultations:
-            psychologist = get_psychologist_by_id(consultation.psychologist_id)
-            if psychologist:
-                consultation.psychologist_name = psychologist['name']
+        # Psychologist names come from the same query
+        consultations = serialize_rows(consultations_data, CONSULTATION_LIST_FIELDS)
         
-        logger.info(f"✅ Retrieved {len(consultations)} consultations for user: {current_user.email}")
+        logger.info("✅ Retrieved %s consultations for user: %s", len(consultations), current_user.email)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": consultations
-        }
+        })
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting consultations: {str(e)}")
+        logger.error("❌ Error getting consultations: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+# Declared before /{consultation_id} so the path isn't taken for an id
+@router.get("/queue", response_model=dict)
+async def get_psychologist_queue(
+    current_user: User = Depends(get_current_user),
+    queue_status: ConsultationStatus = Query(ConsultationStatus.PENDING, alias="status", description="Status to list"),
+    after: Optional[str] = Query(None, description="Consultation id of the last item on the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page")
+):
+    """
+    Get the signed-in psychologist's consultations, most urgent and earliest first
+    """
+    try:
+        logger.info("🔍 Getting consultation queue for psychologist: %s", current_user.id)
+        
+        if not get_psychologist_summary(current_user.id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only psychologists have a consultation queue"
+            )
+        
+        cursor = None
+        if after:
+            cursor = get_consultation_queue_cursor(current_user.id, after)
+            if not cursor:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Unknown cursor"
+                )
+        
+        # One extra row tells whether there is another page
+        rows = get_consultation_queue(current_user.id, queue_status.value, after=cursor, limit=limit + 1)
+        has_more = len(rows) > limit
+        consultations = serialize_rows(rows[:limit], CONSULTATION_QUEUE_FIELDS)
+        
+        # Maintained alongside every status change, so no COUNT over the psychologist's history
+        stats = get_consultation_statistics(current_user.id, role='psychologist')
+        
+        logger.info("✅ Retrieved %s queued consultations for psychologist: %s", len(consultations), current_user.id)
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": consultations,
+            "pending_count": stats['pending_sessions'] if stats else 0,
+            "pagination": {
+                "after": consultations[-1]['id'] if has_more else None,
+                "limit": limit,
+                "has_more": has_more
+            }
+        })
+        
+    except HTTPException:
+        raise
+    except DatabaseError:
+        raise
+    except Exception as e:
+        logger.error("❌ Error getting consultation queue: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.get("/unread-summary", response_model=dict)
+async def get_unread_summary(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get unread message counts per consultation and in total
+    """
+    try:
+        counters = get_unread_counters(current_user.id)
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": {
+                "total_unread": sum(counter['unread_count'] for counter in counters),
+                "consultations": counters
+            }
+        })
+        
+    except DatabaseError:
+        raise
+    except Exception as e:
+        logger.error("❌ Error getting unread summary: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -131,7 +253,7 @@ async def get_consultation_detail(
     Get consultation details by ID
     """
     try:
-        logger.info(f"🔍 Getting consultation: {consultation_id}")
+        logger.info("🔍 Getting consultation: %s", consultation_id)
         
         consultation_data = get_consultation_by_id(consultation_id)
         if not consultation_data:
@@ -150,7 +272,7 @@ async def get_consultation_detail(
         consultation = ConsultationResponse(**Consultation.from_dict(consultation_data).to_dict())
         
         # Add psychologist details
-        psychologist = get_psychologist_by_id(consultation.psychologist_id)
+        psychologist = get_psychologist_summary(consultation.psychologist_id)
         if psychologist:
             consultation.psychologist_name = psychologist['name']
             consultation.psychologist_avatar = psychologist.get('avatar')
@@ -164,8 +286,10 @@ async def get_consultation_detail(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting consultation: {str(e)}")
+        logger.error("❌ Error getting consultation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -181,7 +305,7 @@ async def update_consultation_status(
     Update consultation status
     """
     try:
-        logger.info(f"🔍 Updating consultation status: {consultation_id}")
+        logger.info("🔍 Updating consultation status: %s", consultation_id)
         
         consultation_data = get_consultation_by_id(consultation_id)
         if not consultation_data:
@@ -199,24 +323,23 @@ async def update_consultation_status(
         
         update_dict = status_data.dict(exclude_unset=True)
         
-        # Handle status-specific logic
-        if status_data.status == 'cancelled':
-            update_dict['cancelled_at'] = datetime.now()
-        elif status_data.status == 'completed':
+        # Handle status-specific logic (consultations have no cancelled_at column)
+        if status_data.status == 'completed':
             update_dict['completed_at'] = datetime.now()
         
-        result = update_consultation(consultation_id, update_dict)
-        
-        if not result:
+        updated = update_consultation(consultation_id, update_dict, user_id=current_user.id)
+        if not updated:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update consultation status"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Consultation not found"
             )
         
-        updated_consultation = get_consultation_by_id(consultation_id)
-        consultation = ConsultationResponse(**Consultation.from_dict(updated_consultation).to_dict())
+        # Apply the patch to the row we already have instead of reading it back
+        consultation_data.update(update_dict)
+        consultation_data['updated_at'] = datetime.now()
+        consultation = ConsultationResponse(**Consultation.from_dict(consultation_data).to_dict())
         
-        logger.info(f"✅ Consultation status updated: {consultation_id} -> {status_data.status}")
+        logger.info("✅ Consultation status updated: %s -> %s", consultation_id, status_data.status)
         
         return {
             "success": True,
@@ -227,8 +350,10 @@ async def update_consultation_status(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error updating consultation status: {str(e)}")
+        logger.error("❌ Error updating consultation status: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -243,7 +368,7 @@ async def start_consultation_session(
     Start a consultation session
     """
     try:
-        logger.info(f"🔍 Starting consultation session: {consultation_id}")
+        logger.info("🔍 Starting consultation session: %s", consultation_id)
         
         consultation_data = get_consultation_by_id(consultation_id)
         if not consultation_data:
@@ -271,15 +396,14 @@ async def start_consultation_session(
             'completed_at': datetime.now()
         }
         
-        result = update_consultation(consultation_id, update_dict)
-        
-        if not result:
+        updated = update_consultation(consultation_id, update_dict, user_id=current_user.id)
+        if not updated:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to start consultation session"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Consultation not found"
             )
         
-        logger.info(f"✅ Consultation session started: {consultation_id}")
+        logger.info("✅ Consultation session started: %s", consultation_id)
         
         return {
             "success": True,
@@ -291,13 +415,27 @@ async def start_consultation_session(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error starting consultation session: {str(e)}")
+        logger.error("❌ Error starting consultation session: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
 
+def _stats_overview(stats: Optional[dict], amount_key: str) -> dict:
+    """Shape a consultation_stats row for the overview endpoints"""
+    stats = stats or {}
+    return {
+        "total_sessions": stats.get('total_sessions', 0),
+        "completed_sessions": stats.get('completed_sessions', 0),
+        "pending_sessions": stats.get('pending_sessions', 0),
+        "upcoming_sessions": stats.get('upcoming_sessions', 0),
+        "total_hours": round(stats.get('total_minutes', 0) / 60, 1),
+        amount_key: stats.get('total_amount', 0)
+    }
+
 @router.get("/statistics/overview", response_model=dict)
 async def get_consultation_statistics_overview(
     current_user: User = Depends(get_current_user)
@@ -306,29 +444,60 @@ async def get_consultation_statistics_overview(
     Get consultation statistics for user
     """
     try:
-        logger.info(f"🔍 Getting consultation statistics for user: {current_user.email}")
+        logger.info("🔍 Getting consultation statistics for user: %s", current_user.email)
         
         stats = get_consultation_statistics(current_user.id)
+        response_data = _stats_overview(stats, "total_spent")
+        
+        logger.info("✅ Consultation statistics retrieved for user: %s", current_user.email)
         
-        response_data = {
-            "total_sessions": stats.get('total_sessions', 0),
-            "completed_sessions": stats.get('completed_sessions', 0),
-            "pending_sessions": stats.get('pending_sessions', 0),
-            "upcoming_sessions": stats.get('upcoming_sessions', 0),
-            "total_hours": round(stats.get('total_minutes', 0) / 60, 1),
-            "total_spent": stats.get('total_spent', 0)
+        return {
+            "success": True,
+            "data": response_data
         }
         
-        logger.info(f"✅ Consultation statistics retrieved for user: {current_user.email}")
+    except DatabaseError:
+        raise
+    except Exception as e:
+        logger.error("❌ Error getting consultation statistics: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.get("/statistics/psychologist-overview", response_model=dict)
+async def get_psychologist_statistics_overview(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get consultation statistics for the psychologist signed in as current user
+    """
+    try:
+        logger.info("🔍 Getting psychologist consultation statistics: %s", current_user.id)
+        
+        if not get_psychologist_summary(current_user.id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only psychologists can view this overview"
+            )
+        
+        stats = get_consultation_statistics(current_user.id, role='psychologist')
+        response_data = _stats_overview(stats, "total_billed")
+        
+        logger.info("✅ Psychologist consultation statistics retrieved: %s", current_user.id)
         
         return {
             "success": True,
             "data": response_data
         }
         
+    except HTTPException:
+        raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting consultation statistics: {str(e)}")
+        logger.error("❌ Error getting psychologist consultation statistics: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
-        )
\ No newline at end of file
+        )
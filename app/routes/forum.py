@@ -5,6 +5,8 @@ from app.utils.database import (
     create_forum_room, get_forum_rooms, get_forum_room_by_id, update_forum_room,
     join_room, leave_room, is_room_member, get_room_members, get_user_joined_rooms
 )
+from app.utils.db_errors import DatabaseError
+from app.utils.db_session import transaction
 from app.models.forum import ForumRoom, RoomMember
 from app.models.user import User
 from app.auth.jwt_handler import verify_token
@@ -36,7 +38,7 @@ async def get_forum_rooms_endpoint(
     Get list of forum rooms with filtering
     """
     try:
-        logger.info(f"🔍 Getting forum rooms - category: {category}")
+        logger.info("🔍 Getting forum rooms - category: %s", category)
         
         rooms_data = get_forum_rooms(category, page, limit)
         
@@ -44,10 +46,10 @@ async def get_forum_rooms_endpoint(
         rooms_with_membership = []
         for room_data in rooms_data:
             room = ForumRoomResponse(**ForumRoom.from_dict(room_data).to_dict())
-            room.is_joined = is_room_member(room.id, current_user.id) is not None
+            room.is_joined = is_room_member(room.id, current_user.id)
             rooms_with_membership.append(room)
         
-        logger.info(f"✅ Retrieved {len(rooms_with_membership)} forum rooms")
+        logger.info("✅ Retrieved %s forum rooms", len(rooms_with_membership))
         
         return {
             "success": True,
@@ -61,8 +63,10 @@ async def get_forum_rooms_endpoint(
             }
         }
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting forum rooms: {str(e)}")
+        logger.error("❌ Error getting forum rooms: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -76,7 +80,7 @@ async def get_joined_rooms(
     Get rooms that the user has joined
     """
     try:
-        logger.info(f"🔍 Getting joined rooms for user: {current_user.email}")
+        logger.info("🔍 Getting joined rooms for user: %s", current_user.email)
         
         rooms_data = get_user_joined_rooms(current_user.id)
         rooms = [ForumRoomResponse(**ForumRoom.from_dict(room).to_dict()) for room in rooms_data]
@@ -85,15 +89,17 @@ async def get_joined_rooms(
         for room in rooms:
             room.is_joined = True
         
-        logger.info(f"✅ Retrieved {len(rooms)} joined rooms for user: {current_user.email}")
+        logger.info("✅ Retrieved %s joined rooms for user: %s", len(rooms), current_user.email)
         
         return {
             "success": True,
             "data": rooms
         }
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting joined rooms: {str(e)}")
+        logger.error("❌ Error getting joined rooms: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -108,7 +114,7 @@ async def get_forum_room_detail(
     Get forum room details
     """
     try:
-        logger.info(f"🔍 Getting forum room details: {room_id}")
+        logger.info("🔍 Getting forum room details: %s", room_id)
         
         room_data = get_forum_room_by_id(room_id)
         if not room_data:
@@ -118,7 +124,7 @@ async def get_forum_room_detail(
             )
         
         room = ForumRoomResponse(**ForumRoom.from_dict(room_data).to_dict())
-        room.is_joined = is_room_member(room_id, current_user.id) is not None
+        room.is_joined = is_room_member(room_id, current_user.id)
         
         return {
             "success": True,
@@ -129,8 +135,10 @@ async def get_forum_room_detail(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting forum room: {str(e)}")
+        logger.error("❌ Error getting forum room: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -145,7 +153,7 @@ async def create_forum_room_endpoint(
     Create a new forum room
     """
     try:
-        logger.info(f"🔍 Creating forum room: {room_data.name}")
+        logger.info("🔍 Creating forum room: %s", room_data.name)
         
         room_dict = room_data.dict()
         room = ForumRoom.from_dict(room_dict)
@@ -153,25 +161,22 @@ async def create_forum_room_endpoint(
         
         room_dict_for_db = room.to_dict()
         
-        result = create_forum_room(room_dict_for_db)
-        if not result:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create forum room"
-            )
-        
-        # Auto-join the creator as admin
-        member_data = {
-            'room_id': room.id,
-            'user_id': current_user.id,
-            'role': 'admin'
-        }
-        join_room(member_data)
+        with transaction():
+            result = create_forum_room(room_dict_for_db)
+            if not result:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to create forum room"
+                )
+            
+            # Auto-join the creator as admin
+            member_data = RoomMember(room_id=room.id, user_id=current_user.id, role='admin').to_dict()
+            join_room(member_data)
         
         room_response = ForumRoomResponse(**room_dict_for_db)
         room_response.is_joined = True
         
-        logger.info(f"✅ Forum room created: {room_data.name}")
+        logger.info("✅ Forum room created: %s", room_data.name)
         
         return {
             "success": True,
@@ -182,8 +187,10 @@ async def create_forum_room_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error creating forum room: {str(e)}")
+        logger.error("❌ Error creating forum room: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -198,7 +205,7 @@ async def join_room_endpoint(
     Join a forum room
     """
     try:
-        logger.info(f"🔍 User {current_user.email} joining room: {room_id}")
+        logger.info("🔍 User %s joining room: %s", current_user.email, room_id)
         
         # Check if room exists
         room_data = get_forum_room_by_id(room_id)
@@ -216,11 +223,7 @@ async def join_room_endpoint(
             )
         
         # Join room
-        member_data = {
-            'room_id': room_id,
-            'user_id': current_user.id,
-            'role': 'member'
-        }
+        member_data = RoomMember(room_id=room_id, user_id=current_user.id, role='member').to_dict()
         result = join_room(member_data)
         
         if not result:
@@ -229,7 +232,7 @@ async def join_room_endpoint(
                 detail="Failed to join room"
             )
         
-        logger.info(f"✅ User {current_user.email} joined room: {room_id}")
+        logger.info("✅ User %s joined room: %s", current_user.email, room_id)
         
         return {
             "success": True,
@@ -238,8 +241,10 @@ async def join_room_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error joining room: {str(e)}")
+        logger.error("❌ Error joining room: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -254,7 +259,7 @@ async def leave_room_endpoint(
     Leave a forum room
     """
     try:
-        logger.info(f"🔍 User {current_user.email} leaving room: {room_id}")
+        logger.info("🔍 User %s leaving room: %s", current_user.email, room_id)
         
         # Check if room exists
         room_data = get_forum_room_by_id(room_id)
@@ -287,7 +292,7 @@ async def leave_room_endpoint(
                 detail="Failed to leave room"
             )
         
-        logger.info(f"✅ User {current_user.email} left room: {room_id}")
+        logger.info("✅ User %s left room: %s", current_user.email, room_id)
         
         return {
             "success": True,
@@ -296,8 +301,10 @@ async def leave_room_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error leaving room: {str(e)}")
+        logger.error("❌ Error leaving room: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -314,7 +321,7 @@ async def get_room_members_endpoint(
     Get members of a forum room
     """
     try:
-        logger.info(f"🔍 Getting members for room: {room_id}")
+        logger.info("🔍 Getting members for room: %s", room_id)
         
         # Check if room exists
         room_data = get_forum_room_by_id(room_id)
@@ -334,7 +341,7 @@ async def get_room_members_endpoint(
         members_data = get_room_members(room_id, page, limit)
         members = [RoomMembershipResponse(**RoomMember.from_dict(member).to_dict()) for member in members_data]
         
-        logger.info(f"✅ Retrieved {len(members)} members for room: {room_id}")
+        logger.info("✅ Retrieved %s members for room: %s", len(members), room_id)
         
         return {
             "success": True,
@@ -350,8 +357,10 @@ async def get_room_members_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting room members: {str(e)}")
+        logger.error("❌ Error getting room members: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -3,11 +3,14 @@ from typing import Optional, List
 from app.schemas.forum_comment import ForumCommentCreate, ForumCommentResponse, ForumCommentUpdate
 from app.schemas.forum_post import PostReportCreate  # ADD THIS IMPORT
 from app.utils.database import (
-    create_forum_comment, get_forum_comments, get_forum_comment_by_id, 
+    create_forum_comment, get_forum_comments, get_forum_comment_post_id, 
     update_forum_comment, delete_forum_comment, like_comment, unlike_comment, 
-    is_comment_liked, get_forum_post_by_id, is_room_member, create_forum_report
+    is_comment_liked, get_forum_post_room_id, is_room_member, create_forum_report
 )
+from app.utils.db_errors import DatabaseError
 from app.models.forum_comment import ForumComment, CommentLike
+from app.utils.serializers import serialize_rows, anonymize_author, FORUM_COMMENT_FIELDS
+from app.utils.json_response import FastJSONResponse
 from app.models.user import User
 from app.auth.jwt_handler import verify_token
 import logging
@@ -37,18 +40,17 @@ async def create_forum_comment_endpoint(
     Create a new comment on a forum post
     """
     try:
-        logger.info(f"🔍 Creating comment on post: {post_id}")
+        logger.info("🔍 Creating comment on post: %s", post_id)
         
         # Check if post exists and get room_id
-        post_data = get_forum_post_by_id(post_id)
-        if not post_data:
+        room_id = get_forum_post_room_id(post_id)
+        if not room_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
             )
         
         # Check if user has joined the room
-        room_id = post_data['room_id']
         if not is_room_member(room_id, current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -56,7 +58,7 @@ async def create_forum_comment_endpoint(
             )
         
         comment_dict = comment_data.dict()
-        comment = ForumComment.from_dict(comment_dict)
+        comment = ForumComment.create(comment_dict)
         comment.post_id = post_id
         comment.author_id = current_user.id
         
@@ -80,7 +82,7 @@ async def create_forum_comment_endpoint(
         response_comment.author_avatar = None if comment.is_anonymous else current_user.avatar
         response_comment.is_liked = False
         
-        logger.info(f"✅ Comment created on post: {post_id}")
+        logger.info("✅ Comment created on post: %s", post_id)
         
         return {
             "success": True,
@@ -91,8 +93,10 @@ async def create_forum_comment_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error creating comment: {str(e)}")
+        logger.error("❌ Error creating comment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -109,18 +113,17 @@ async def get_forum_comments_endpoint(
     Get comments on a forum post
     """
     try:
-        logger.info(f"🔍 Getting comments for post: {post_id}")
+        logger.info("🔍 Getting comments for post: %s", post_id)
         
         # Check if post exists and get room_id
-        post_data = get_forum_post_by_id(post_id)
-        if not post_data:
+        room_id = get_forum_post_room_id(post_id)
+        if not room_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
             )
         
         # Check if user has joined the room
-        room_id = post_data['room_id']
         if not is_room_member(room_id, current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -130,24 +133,14 @@ async def get_forum_comments_endpoint(
         comments_data = get_forum_comments(post_id, page, limit)
         
         # Prepare response with like status
-        comments = []
-        for comment_data in comments_data:
-            comment = ForumCommentResponse(**ForumComment.from_dict(comment_data).to_dict())
-            
-            # Handle anonymous authors
-            if comment.is_anonymous:
-                comment.author_name = "Anonymous User"
-                comment.author_avatar = None
-            else:
-                comment.author_name = comment_data.get('author_name', 'User')
-                comment.author_avatar = comment_data.get('author_avatar')
-            
-            comment.is_liked = is_comment_liked(comment.id, current_user.id) is not None
-            comments.append(comment)
-        
-        logger.info(f"✅ Retrieved {len(comments)} comments for post: {post_id}")
+        comments = serialize_rows(comments_data, FORUM_COMMENT_FIELDS)
+        for comment in comments:
+            anonymize_author(comment)
+            comment['is_liked'] = is_comment_liked(comment['id'], current_user.id)
         
-        return {
+        logger.info("✅ Retrieved %s comments for post: %s", len(comments), post_id)
+        
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "comments": comments,
@@ -157,12 +150,14 @@ async def get_forum_comments_endpoint(
                     "total": len(comments)
                 }
             }
-        }
+        })
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting comments: {str(e)}")
+        logger.error("❌ Error getting comments: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -178,33 +173,32 @@ async def like_comment_endpoint(
     Like a forum comment
     """
     try:
-        logger.info(f"🔍 User {current_user.email} liking comment: {comment_id}")
+        logger.info("🔍 User %s liking comment: %s", current_user.email, comment_id)
         
         # Check if comment exists
-        comment_data = get_forum_comment_by_id(comment_id)
-        if not comment_data:
+        comment_post_id = get_forum_comment_post_id(comment_id)
+        if not comment_post_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Comment not found"
             )
         
         # Verify comment belongs to post
-        if comment_data['post_id'] != post_id:
+        if comment_post_id != post_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Comment does not belong to this post"
             )
         
         # Check if post exists and get room_id
-        post_data = get_forum_post_by_id(post_id)
-        if not post_data:
+        room_id = get_forum_post_room_id(post_id)
+        if not room_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
             )
         
         # Check if user has joined the room
-        room_id = post_data['room_id']
         if not is_room_member(room_id, current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -219,10 +213,7 @@ async def like_comment_endpoint(
             )
         
         # Like comment
-        like_data = {
-            'comment_id': comment_id,
-            'user_id': current_user.id
-        }
+        like_data = CommentLike(comment_id=comment_id, user_id=current_user.id).to_dict()
         result = like_comment(like_data)
         
         if not result:
@@ -231,7 +222,7 @@ async def like_comment_endpoint(
                 detail="Failed to like comment"
             )
         
-        logger.info(f"✅ User {current_user.email} liked comment: {comment_id}")
+        logger.info("✅ User %s liked comment: %s", current_user.email, comment_id)
         
         return {
             "success": True,
@@ -240,8 +231,10 @@ async def like_comment_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error liking comment: {str(e)}")
+        logger.error("❌ Error liking comment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -257,18 +250,18 @@ async def unlike_comment_endpoint(
     Unlike a forum comment
     """
     try:
-        logger.info(f"🔍 User {current_user.email} unliking comment: {comment_id}")
+        logger.info("🔍 User %s unliking comment: %s", current_user.email, comment_id)
         
         # Check if comment exists
-        comment_data = get_forum_comment_by_id(comment_id)
-        if not comment_data:
+        comment_post_id = get_forum_comment_post_id(comment_id)
+        if not comment_post_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Comment not found"
             )
         
         # Verify comment belongs to post
-        if comment_data['post_id'] != post_id:
+        if comment_post_id != post_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Comment does not belong to this post"
@@ -290,7 +283,7 @@ async def unlike_comment_endpoint(
                 detail="Failed to unlike comment"
             )
         
-        logger.info(f"✅ User {current_user.email} unliked comment: {comment_id}")
+        logger.info("✅ User %s unliked comment: %s", current_user.email, comment_id)
         
         return {
             "success": True,
@@ -299,8 +292,10 @@ async def unlike_comment_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error unliking comment: {str(e)}")
+        logger.error("❌ Error unliking comment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -317,18 +312,18 @@ async def report_comment_endpoint(
     Report a forum comment
     """
     try:
-        logger.info(f"🔍 User {current_user.email} reporting comment: {comment_id}")
+        logger.info("🔍 User %s reporting comment: %s", current_user.email, comment_id)
         
         # Check if comment exists
-        comment_data = get_forum_comment_by_id(comment_id)
-        if not comment_data:
+        comment_post_id = get_forum_comment_post_id(comment_id)
+        if not comment_post_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Comment not found"
             )
         
         # Verify comment belongs to post
-        if comment_data['post_id'] != post_id:
+        if comment_post_id != post_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Comment does not belong to this post"
@@ -347,7 +342,7 @@ async def report_comment_endpoint(
                 detail="Failed to report comment"
             )
         
-        logger.info(f"✅ User {current_user.email} reported comment: {comment_id}")
+        logger.info("✅ User %s reported comment: %s", current_user.email, comment_id)
         
         return {
             "success": True,
@@ -356,8 +351,10 @@ async def report_comment_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error reporting comment: {str(e)}")
+        logger.error("❌ Error reporting comment: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -2,10 +2,14 @@ from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import Optional, List
 from app.schemas.forum_post import ForumPostCreate, ForumPostResponse, ForumPostUpdate, PostReportCreate
 from app.utils.database import (
-    create_forum_post, get_forum_posts, get_forum_post_by_id, update_forum_post, delete_forum_post,
-    like_post, unlike_post, is_post_liked, create_forum_report, is_room_member, update_room_activity
+    create_forum_post, get_forum_posts, get_forum_post_room_id, update_forum_post, delete_forum_post,
+    like_post, unlike_post, is_post_liked, create_forum_report, is_room_member, update_room_activity,
+    get_trending_posts
 )
+from app.utils.db_errors import DatabaseError
 from app.models.forum_post import ForumPost, PostLike
+from app.utils.serializers import serialize_rows, anonymize_author, FORUM_POST_FIELDS
+from app.utils.json_response import FastJSONResponse
 from app.models.user import User
 from app.auth.jwt_handler import verify_token
 import logging
@@ -35,7 +39,7 @@ async def create_forum_post_endpoint(
     Create a new post in forum room
     """
     try:
-        logger.info(f"🔍 Creating post in room: {room_id}")
+        logger.info("🔍 Creating post in room: %s", room_id)
         
         # Check if user has joined the room
         if not is_room_member(room_id, current_user.id):
@@ -45,7 +49,7 @@ async def create_forum_post_endpoint(
             )
         
         post_dict = post_data.dict()
-        post = ForumPost.from_dict(post_dict)
+        post = ForumPost.create(post_dict)
         post.author_id = current_user.id
         
         # Handle anonymous posting
@@ -71,7 +75,7 @@ async def create_forum_post_endpoint(
         response_post.author_avatar = None if post.is_anonymous else current_user.avatar
         response_post.is_liked = False
         
-        logger.info(f"✅ Post created in room: {room_id}")
+        logger.info("✅ Post created in room: %s", room_id)
         
         return {
             "success": True,
@@ -82,8 +86,10 @@ async def create_forum_post_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error creating post: {str(e)}")
+        logger.error("❌ Error creating post: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -101,7 +107,7 @@ async def get_forum_posts_endpoint(
     Get posts in forum room
     """
     try:
-        logger.info(f"🔍 Getting posts from room: {room_id}")
+        logger.info("🔍 Getting posts from room: %s", room_id)
         
         # Check if user has joined the room
         if not is_room_member(room_id, current_user.id):
@@ -113,24 +119,14 @@ async def get_forum_posts_endpoint(
         posts_data = get_forum_posts(room_id, page, limit, sort)
         
         # Prepare response with like status
-        posts = []
-        for post_data in posts_data:
-            post = ForumPostResponse(**ForumPost.from_dict(post_data).to_dict())
-            
-            # Handle anonymous authors
-            if post.is_anonymous:
-                post.author_name = "Anonymous User"
-                post.author_avatar = None
-            else:
-                post.author_name = post_data.get('author_name', 'User')
-                post.author_avatar = post_data.get('author_avatar')
-            
-            post.is_liked = is_post_liked(post.id, current_user.id) is not None
-            posts.append(post)
-        
-        logger.info(f"✅ Retrieved {len(posts)} posts from room: {room_id}")
+        posts = serialize_rows(posts_data, FORUM_POST_FIELDS)
+        for post in posts:
+            anonymize_author(post)
+            post['is_liked'] = is_post_liked(post['id'], current_user.id)
         
-        return {
+        logger.info("✅ Retrieved %s posts from room: %s", len(posts), room_id)
+        
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "posts": posts,
@@ -140,12 +136,14 @@ async def get_forum_posts_endpoint(
                     "total": len(posts)
                 }
             }
-        }
+        })
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting posts: {str(e)}")
+        logger.error("❌ Error getting posts: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -160,18 +158,17 @@ async def like_post_endpoint(
     Like a forum post
     """
     try:
-        logger.info(f"🔍 User {current_user.email} liking post: {post_id}")
+        logger.info("🔍 User %s liking post: %s", current_user.email, post_id)
         
         # Check if post exists
-        post_data = get_forum_post_by_id(post_id)
-        if not post_data:
+        room_id = get_forum_post_room_id(post_id)
+        if not room_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
             )
         
         # Check if user has joined the room
-        room_id = post_data['room_id']
         if not is_room_member(room_id, current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -186,10 +183,7 @@ async def like_post_endpoint(
             )
         
         # Like post
-        like_data = {
-            'post_id': post_id,
-            'user_id': current_user.id
-        }
+        like_data = PostLike(post_id=post_id, user_id=current_user.id).to_dict()
         result = like_post(like_data)
         
         if not result:
@@ -198,7 +192,7 @@ async def like_post_endpoint(
                 detail="Failed to like post"
             )
         
-        logger.info(f"✅ User {current_user.email} liked post: {post_id}")
+        logger.info("✅ User %s liked post: %s", current_user.email, post_id)
         
         return {
             "success": True,
@@ -207,8 +201,10 @@ async def like_post_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error liking post: {str(e)}")
+        logger.error("❌ Error liking post: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -223,11 +219,11 @@ async def unlike_post_endpoint(
     Unlike a forum post
     """
     try:
-        logger.info(f"🔍 User {current_user.email} unliking post: {post_id}")
+        logger.info("🔍 User %s unliking post: %s", current_user.email, post_id)
         
         # Check if post exists
-        post_data = get_forum_post_by_id(post_id)
-        if not post_data:
+        room_id = get_forum_post_room_id(post_id)
+        if not room_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
@@ -249,7 +245,7 @@ async def unlike_post_endpoint(
                 detail="Failed to unlike post"
             )
         
-        logger.info(f"✅ User {current_user.email} unliked post: {post_id}")
+        logger.info("✅ User %s unliked post: %s", current_user.email, post_id)
         
         return {
             "success": True,
@@ -258,8 +254,10 @@ async def unlike_post_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error unliking post: {str(e)}")
+        logger.error("❌ Error unliking post: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -275,11 +273,11 @@ async def report_post_endpoint(
     Report a forum post
     """
     try:
-        logger.info(f"🔍 User {current_user.email} reporting post: {post_id}")
+        logger.info("🔍 User %s reporting post: %s", current_user.email, post_id)
         
         # Check if post exists
-        post_data = get_forum_post_by_id(post_id)
-        if not post_data:
+        room_id = get_forum_post_room_id(post_id)
+        if not room_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
@@ -298,7 +296,7 @@ async def report_post_endpoint(
                 detail="Failed to report post"
             )
         
-        logger.info(f"✅ User {current_user.email} reported post: {post_id}")
+        logger.info("✅ User %s reported post: %s", current_user.email, post_id)
         
         return {
             "success": True,
@@ -307,8 +305,10 @@ async def report_post_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error reporting post: {str(e)}")
+        logger.error("❌ Error reporting post: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -324,35 +324,27 @@ async def get_trending_posts_endpoint(
     Get trending posts across all rooms
     """
     try:
-        logger.info(f"🔍 Getting trending posts - period: {period}")
+        logger.info("🔍 Getting trending posts - period: %s", period)
         
         posts_data = get_trending_posts(period, limit)
         
         # Prepare response with like status
-        posts = []
-        for post_data in posts_data:
-            post = ForumPostResponse(**ForumPost.from_dict(post_data).to_dict())
-            
-            # Handle anonymous authors
-            if post.is_anonymous:
-                post.author_name = "Anonymous User"
-                post.author_avatar = None
-            else:
-                post.author_name = post_data.get('author_name', 'User')
-                post.author_avatar = post_data.get('author_avatar')
-            
-            post.is_liked = is_post_liked(post.id, current_user.id) is not None
-            posts.append(post)
-        
-        logger.info(f"✅ Retrieved {len(posts)} trending posts")
+        posts = serialize_rows(posts_data, FORUM_POST_FIELDS)
+        for post in posts:
+            anonymize_author(post)
+            post['is_liked'] = is_post_liked(post['id'], current_user.id)
         
-        return {
+        logger.info("✅ Retrieved %s trending posts", len(posts))
+        
+        return FastJSONResponse({
             "success": True,
             "data": posts
-        }
+        })
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting trending posts: {str(e)}")
+        logger.error("❌ Error getting trending posts: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
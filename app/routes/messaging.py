@@ -1,14 +1,28 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, WebSocket, WebSocketDisconnect
 from typing import Optional, List
+from datetime import datetime
+from jose import JWTError
+from pydantic import ValidationError
 from app.schemas.message import MessageCreate, MessageResponse, MarkMessagesRead
 from app.utils.database import (
-    create_message, get_messages, mark_messages_as_read, 
-    get_unread_message_count, get_consultation_by_id
+    create_message, get_messages, get_unread_message_count,
+    get_consultation_access, get_user_by_id, get_message_cursor,
+    get_message_cursor_at, lock_consultation_for_message, get_messages_after, get_latest_message_cursor, get_read_states,
+    advance_read_state, increment_unread_counter, set_unread_counter,
+    get_unread_counter
 )
+from app.utils.db_errors import DatabaseError
+from app.utils.db_session import on_commit, transaction
+from app.utils.pubsub import hub
 from app.models.message import Message
+from app.utils.serializers import serialize_row, serialize_rows, MESSAGE_FIELDS
+from app.utils.json_response import FastJSONResponse
 from app.models.user import User
 from app.auth.jwt_handler import verify_token
+import asyncio
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +39,136 @@ async def get_current_user(token: str = Depends(verify_token)):
         )
     return User.from_dict(user_data)
 
+def _channel(consultation_id: str) -> str:
+    return f"consultation:{consultation_id}"
+
+def _get_participant_consultation(consultation_id: str, user_id: str):
+    """Load a consultation's access row, raising 404/403 unless the user takes part in it"""
+    consultation = get_consultation_access(consultation_id)
+    if not consultation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Consultation not found"
+        )
+    
+    if consultation['user_id'] != user_id and consultation['psychologist_id'] != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this consultation"
+        )
+    return consultation
+
+def _store_message(consultation: dict, sender_id: str, message_data: MessageCreate) -> dict:
+    """Save a message and push it to connected participants once it commits"""
+    # Check if consultation is active
+    if consultation['status'] not in ['confirmed', 'completed']:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot send messages in this consultation status"
+        )
+    
+    message = Message.create(message_data.dict())
+    message.consultation_id = consultation['id']
+    message.sender_id = sender_id
+    message_dict_for_db = message.to_dict()
+    
+    recipient_id = consultation['psychologist_id'] if sender_id == consultation['user_id'] else consultation['user_id']
+    event = {"type": "message", "data": serialize_row(message_dict_for_db, MESSAGE_FIELDS)}
+    
+    # The message and the recipient's unread count land together, and only then is it pushed.
+    # Holding the consultation row lock until commit means seq order is commit order,
+    # so a reader paging on seq never skips a message that commits late.
+    with transaction():
+        lock_consultation_for_message(consultation['id'])
+        result = create_message(message_dict_for_db)
+        if not result:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to send message"
+            )
+        
+        if recipient_id:
+            increment_unread_counter(recipient_id, consultation['id'])
+        
+        on_commit(lambda: hub.publish(_channel(consultation['id']), event))
+    return message_dict_for_db
+
+def _mark_read(consultation_id: str, reader_id: str, up_to: dict = None, read_states: list = None) -> bool:
+    """
+    Advance the reader's watermark to `up_to` (a row with seq and id,
+    default the newest message), resync their unread counter and push a
+    read receipt. Skips the writes entirely when the watermark is already
+    there.
+    """
+    if up_to is None:
+        up_to = get_latest_message_cursor(consultation_id)
+        if not up_to:
+            return False
+    if read_states is None:
+        read_states = get_read_states(consultation_id)
+    
+    current = next((state for state in read_states if state['user_id'] == reader_id), None)
+    if current is not None and current['last_read_seq'] >= up_to['seq']:
+        return False
+    
+    event = {
+        "type": "read",
+        "data": {
+            "consultation_id": consultation_id,
+            "reader_id": reader_id,
+            "last_read_message_id": up_to['id'],
+            "read_at": datetime.now().isoformat()
+        }
+    }
+    with transaction():
+        advance_read_state(consultation_id, reader_id, up_to['id'], up_to['seq'])
+        # Recounting rather than decrementing keeps the counter self-correcting
+        set_unread_counter(reader_id, consultation_id, get_unread_message_count(consultation_id, reader_id))
+        on_commit(lambda: hub.publish(_channel(consultation_id), event))
+    return True
+
+def _apply_read_state(messages: list, rows: list, read_states: list):
+    """Fill each message's is_read/read_at from its recipient's watermark"""
+    for message, row in zip(messages, rows):
+        recipient = next((state for state in read_states if state['user_id'] != row['sender_id']), None)
+        is_read = recipient is not None and row['seq'] <= recipient['last_read_seq']
+        message['is_read'] = is_read
+        # The watermark only records when it last moved, which is when this message was read at the latest
+        message['read_at'] = recipient['updated_at'].isoformat() if is_read and recipient['updated_at'] else None
+    return messages
+
+def _resolve_after(consultation_id: str, after: str) -> int:
+    """Turn an `after` message id or ISO timestamp into a seq cursor"""
+    try:
+        after_time = datetime.fromisoformat(after)
+    except ValueError:
+        cursor = get_message_cursor(consultation_id, after)
+        if not cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'after' must be a message id in this consultation or an ISO timestamp"
+            )
+        return cursor['seq']
+    
+    # Stored timestamps are naive server-local time
+    if after_time.tzinfo is not None:
+        after_time = after_time.astimezone().replace(tzinfo=None)
+    cursor = get_message_cursor_at(consultation_id, after_time)
+    return cursor['seq'] if cursor else 0
+
+async def _wait_for_messages(consultation_id: str, after_seq: int, limit: int, wait: int):
+    """Fetch messages past the cursor, long-polling up to `wait` seconds until there are some"""
+    deadline = time.monotonic() + wait
+    while True:
+        messages_data = get_messages_after(consultation_id, after_seq, limit)
+        remaining = deadline - time.monotonic()
+        if messages_data or remaining <= 0:
+            return messages_data
+        
+        # No connection is held while parked; statements only pin one inside a transaction
+        if not await hub.wait(_channel(consultation_id), remaining):
+            return []
+
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def send_message(
     consultation_id: str,
@@ -35,46 +179,15 @@ async def send_message(
     Send a message in consultation
     """
     try:
-        logger.info(f"🔍 Sending message in consultation: {consultation_id}")
+        logger.info("🔍 Sending message in consultation: %s", consultation_id)
         
         # Check if consultation exists and user has access
-        consultation = get_consultation_by_id(consultation_id)
-        if not consultation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Consultation not found"
-            )
-        
-        if consultation['user_id'] != current_user.id and consultation['psychologist_id'] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied to this consultation"
-            )
-        
-        # Check if consultation is active
-        if consultation['status'] not in ['confirmed', 'completed']:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot send messages in this consultation status"
-            )
+        consultation = _get_participant_consultation(consultation_id, current_user.id)
         
-        # Create message object
-        message_dict = message_data.dict()
-        message = Message.from_dict(message_dict)
-        message.consultation_id = consultation_id
-        message.sender_id = current_user.id
+        # Save to database and notify connected participants
+        message_dict_for_db = _store_message(consultation, current_user.id, message_data)
         
-        message_dict_for_db = message.to_dict()
-        
-        # Save to database
-        result = create_message(message_dict_for_db)
-        if not result:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to send message"
-            )
-        
-        logger.info(f"✅ Message sent in consultation: {consultation_id}")
+        logger.info("✅ Message sent in consultation: %s", consultation_id)
         
         return {
             "success": True,
@@ -85,8 +198,10 @@ async def send_message(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error sending message: {str(e)}")
+        logger.error("❌ Error sending message: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -97,42 +212,63 @@ async def get_messages_endpoint(
     consultation_id: str,
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1, description="Page number"),
-    limit: int = Query(50, ge=1, le=100, description="Items per page")
+    limit: int = Query(50, ge=1, le=100, description="Items per page"),
+    after: Optional[str] = Query(None, description="Only messages after this message id or ISO timestamp"),
+    wait: int = Query(0, ge=0, le=30, description="With 'after', seconds to wait for new messages")
 ):
     """
-    Get messages in consultation
+    Get messages in consultation.
+    
+    With `after`, returns only messages newer than that message (or
+    timestamp) instead of an offset page; pass the last returned
+    message's id as the next `after`. Adding `wait` long-polls: the
+    request returns as soon as a new message commits, or empty once
+    the wait runs out.
     """
     try:
-        logger.info(f"🔍 Getting messages for consultation: {consultation_id}")
+        logger.info("🔍 Getting messages for consultation: %s", consultation_id)
         
         # Check if consultation exists and user has access
-        consultation = get_consultation_by_id(consultation_id)
-        if not consultation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Consultation not found"
-            )
+        _get_participant_consultation(consultation_id, current_user.id)
         
-        if consultation['user_id'] != current_user.id and consultation['psychologist_id'] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied to this consultation"
-            )
+        if after is not None:
+            after_seq = _resolve_after(consultation_id, after)
+            messages_data = await _wait_for_messages(consultation_id, after_seq, limit, wait)
+            messages = serialize_rows(messages_data, MESSAGE_FIELDS)
+            if messages:
+                read_states = get_read_states(consultation_id)
+                _apply_read_state(messages, messages_data, read_states)
+                _mark_read(consultation_id, current_user.id, messages_data[-1], read_states)
+            
+            return FastJSONResponse({
+                "success": True,
+                "data": {
+                    "messages": messages,
+                    "unread_count": get_unread_counter(current_user.id, consultation_id),
+                    "sync": {
+                        "after": messages[-1]['id'] if messages else after,
+                        "limit": limit,
+                        "has_more": len(messages) == limit
+                    }
+                }
+            })
         
         # Get messages
         messages_data = get_messages(consultation_id, page, limit)
-        messages = [MessageResponse(**Message.from_dict(msg).to_dict()) for msg in messages_data]
+        messages = serialize_rows(messages_data, MESSAGE_FIELDS)
         
-        # Mark messages as read for the current user
+        # Advance the current user's read watermark to the newest message shown
         if messages:
-            mark_messages_as_read(consultation_id, current_user.id)
+            read_states = get_read_states(consultation_id)
+            _apply_read_state(messages, messages_data, read_states)
+            _mark_read(consultation_id, current_user.id, messages_data[-1], read_states)
         
         # Get unread count
-        unread_count = get_unread_message_count(consultation_id, current_user.id)
+        unread_count = get_unread_counter(current_user.id, consultation_id)
         
-        logger.info(f"✅ Retrieved {len(messages)} messages for consultation: {consultation_id}")
+        logger.info("✅ Retrieved %s messages for consultation: %s", len(messages), consultation_id)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "messages": messages,
@@ -143,12 +279,14 @@ async def get_messages_endpoint(
                     "total": len(messages)
                 }
             }
-        }
+        })
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting messages: {str(e)}")
+        logger.error("❌ Error getting messages: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -163,26 +301,15 @@ async def mark_messages_read_endpoint(
     Mark all messages as read in consultation
     """
     try:
-        logger.info(f"🔍 Marking messages as read in consultation: {consultation_id}")
+        logger.info("🔍 Marking messages as read in consultation: %s", consultation_id)
         
         # Check if consultation exists and user has access
-        consultation = get_consultation_by_id(consultation_id)
-        if not consultation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Consultation not found"
-            )
-        
-        if consultation['user_id'] != current_user.id and consultation['psychologist_id'] != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied to this consultation"
-            )
+        _get_participant_consultation(consultation_id, current_user.id)
         
         # Mark messages as read
-        result = mark_messages_as_read(consultation_id, current_user.id)
+        _mark_read(consultation_id, current_user.id)
         
-        logger.info(f"✅ Messages marked as read in consultation: {consultation_id}")
+        logger.info("✅ Messages marked as read in consultation: %s", consultation_id)
         
         return {
             "success": True,
@@ -191,9 +318,101 @@ async def mark_messages_read_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error marking messages as read: {str(e)}")
+        logger.error("❌ Error marking messages as read: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def _forward_events(websocket: WebSocket, subscription):
+    """Drain a subscriber's queue onto its socket"""
+    try:
+        while True:
+            payload = await subscription.next_event()
+            if payload is None:
+                # Fell too far behind; the client reconnects and catches up over REST
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            await websocket.send_text(payload)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning("⚠️  Stopped forwarding events on %s: %s", subscription.channel, e)
+
+async def _handle_frame(websocket: WebSocket, consultation_id: str, user_id: str, frame: dict):
+    frame_type = frame.get("type")
+    try:
+        if frame_type == "message":
+            message_data = MessageCreate.parse_obj(frame.get("data") or {})
+            # Status can change while the socket is open, so check on every send
+            consultation = _get_participant_consultation(consultation_id, user_id)
+            _store_message(consultation, user_id, message_data)
+        elif frame_type == "read":
+            _mark_read(consultation_id, user_id)
+        else:
+            await websocket.send_json({"type": "error", "detail": f"Unknown frame type: {frame_type}"})
+    except HTTPException as he:
+        await websocket.send_json({"type": "error", "detail": he.detail})
+    except ValidationError as ve:
+        await websocket.send_json({"type": "error", "detail": ve.errors()})
+    except DatabaseError:
+        await websocket.send_json({"type": "error", "detail": "Database error, please retry"})
+    except Exception as e:
+        # One bad frame must not take down the socket and its subscription
+        logger.error("❌ Error handling %s frame in consultation %s: %s", frame_type, consultation_id, e)
+        await websocket.send_json({"type": "error", "detail": "Internal server error"})
+
+@router.websocket("/ws")
+async def messages_websocket(
+    websocket: WebSocket,
+    consultation_id: str,
+    token: str = Query(...)
+):
+    """
+    Real-time channel for a consultation. The server pushes
+    {"type": "message", "data": {...}} for new messages and
+    {"type": "read", "data": {...}} for read receipts. Clients send
+    {"type": "message", "data": {"content": ...}} or {"type": "read"}.
+    History and catching up after a reconnect go through the REST
+    endpoints, which stay the fallback for clients without WebSockets.
+    """
+    try:
+        token_data = verify_token(token)
+        if not get_user_by_id(token_data.user_id):
+            raise JWTError("User not found")
+        _get_participant_consultation(consultation_id, token_data.user_id)
+    except (JWTError, HTTPException) as e:
+        logger.warning("⚠️  WebSocket rejected for consultation %s: %s", consultation_id, e)
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    except DatabaseError:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    
+    user_id = token_data.user_id
+    await websocket.accept()
+    subscription = hub.subscribe(_channel(consultation_id), user_id)
+    forwarder = asyncio.create_task(_forward_events(websocket, subscription))
+    logger.info("🔌 WebSocket connected to consultation %s", consultation_id)
+    
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                frame = json.loads(text)
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+            if not isinstance(frame, dict):
+                await websocket.send_json({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+            await _handle_frame(websocket, consultation_id, user_id, frame)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(subscription)
+        forwarder.cancel()
+        logger.info("🔌 WebSocket disconnected from consultation %s", consultation_id)
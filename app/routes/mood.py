@@ -6,7 +6,10 @@ from app.utils.database import (
     create_mood_entry, get_mood_entries, get_mood_entry_by_id,
     update_mood_entry, delete_mood_entry, get_mood_statistics, get_mood_distribution
 )
+from app.utils.db_errors import DatabaseError
 from app.utils.mood_analysis import MoodAnalyzer
+from app.utils.serializers import serialize_rows, MOOD_ENTRY_FIELDS
+from app.utils.json_response import FastJSONResponse
 from app.models.mood import MoodEntry
 from app.models.user import User
 from app.auth.jwt_handler import verify_token
@@ -36,15 +39,15 @@ async def create_mood_entry_endpoint(
     Create a new mood entry
     """
     try:
-        logger.info(f"🔍 Creating mood entry for user: {current_user.email}")
+        logger.info("🔍 Creating mood entry for user: %s", current_user.email)
         
         # Create mood entry object
         mood_dict = mood_data.dict()
-        mood_entry = MoodEntry.from_dict(mood_dict)
+        mood_entry = MoodEntry.create(mood_dict)
         mood_entry.user_id = current_user.id
         
         mood_dict_for_db = mood_entry.to_dict()
-        logger.debug(f"🔍 Mood data for DB: {mood_dict_for_db}")
+        logger.debug("🔍 Mood data for DB: %s", mood_dict_for_db)
         
         # Save to database
         result = create_mood_entry(mood_dict_for_db)
@@ -55,7 +58,7 @@ async def create_mood_entry_endpoint(
                 detail="Failed to create mood entry"
             )
         
-        logger.info(f"✅ Mood entry created successfully for user: {current_user.email}")
+        logger.info("✅ Mood entry created successfully for user: %s", current_user.email)
         
         return {
             "success": True,
@@ -64,8 +67,10 @@ async def create_mood_entry_endpoint(
             }
         }
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error creating mood entry: {str(e)}")
+        logger.error("❌ Error creating mood entry: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -84,7 +89,7 @@ async def get_mood_entries_endpoint(
     Get mood entries with pagination and filtering
     """
     try:
-        logger.info(f"🔍 Getting mood entries for user: {current_user.email}")
+        logger.info("🔍 Getting mood entries for user: %s", current_user.email)
         
         # Get entries from database
         entries_data = get_mood_entries(current_user.id, start_date, end_date, page, limit)
@@ -93,16 +98,16 @@ async def get_mood_entries_endpoint(
         if mood and entries_data:
             entries_data = [entry for entry in entries_data if entry['mood'] == mood]
         
-        # Convert to response models
-        mood_entries = [MoodEntryResponse(**MoodEntry.from_dict(entry).to_dict()) for entry in entries_data]
+        # Convert rows straight to response dicts
+        mood_entries = serialize_rows(entries_data, MOOD_ENTRY_FIELDS)
         
         # Calculate pagination info
         total_entries = len(entries_data)
         total_pages = (total_entries + limit - 1) // limit
         
-        logger.info(f"✅ Retrieved {len(mood_entries)} mood entries for user: {current_user.email}")
+        logger.info("✅ Retrieved %s mood entries for user: %s", len(mood_entries), current_user.email)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "mood_entries": mood_entries,
@@ -113,10 +118,12 @@ async def get_mood_entries_endpoint(
                     "total_pages": total_pages
                 }
             }
-        }
+        })
         
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting mood entries: {str(e)}")
+        logger.error("❌ Error getting mood entries: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -131,7 +138,7 @@ async def get_mood_statistics_endpoint(
     Get mood statistics for a specific period
     """
     try:
-        logger.info(f"🔍 Getting mood statistics for user: {current_user.email}, period: {period}")
+        logger.info("🔍 Getting mood statistics for user: %s, period: %s", current_user.email, period)
         
         # Calculate date range based on period
         end_date = datetime.now().date()
@@ -175,7 +182,7 @@ async def get_mood_statistics_endpoint(
             "insights": insights
         }
         
-        logger.info(f"✅ Mood statistics generated for user: {current_user.email}")
+        logger.info("✅ Mood statistics generated for user: %s", current_user.email)
         
         return {
             "success": True,
@@ -184,8 +191,10 @@ async def get_mood_statistics_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting mood statistics: {str(e)}")
+        logger.error("❌ Error getting mood statistics: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -200,7 +209,7 @@ async def get_mood_analysis_endpoint(
     Get detailed mood analysis and recommendations
     """
     try:
-        logger.info(f"🔍 Getting mood analysis for user: {current_user.email}, period: {period}")
+        logger.info("🔍 Getting mood analysis for user: %s, period: %s", current_user.email, period)
         
         # Calculate date range
         end_date = datetime.now().date()
@@ -294,7 +303,7 @@ async def get_mood_analysis_endpoint(
             "patterns": patterns
         }
         
-        logger.info(f"✅ Mood analysis completed for user: {current_user.email}")
+        logger.info("✅ Mood analysis completed for user: %s", current_user.email)
         
         return {
             "success": True,
@@ -303,8 +312,10 @@ async def get_mood_analysis_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting mood analysis: {str(e)}")
+        logger.error("❌ Error getting mood analysis: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -319,7 +330,7 @@ async def get_mood_entry(
     Get a specific mood entry by ID
     """
     try:
-        logger.info(f"🔍 Getting mood entry: {entry_id}")
+        logger.info("🔍 Getting mood entry: %s", entry_id)
         
         entry_data = get_mood_entry_by_id(entry_id)
         if not entry_data:
@@ -346,8 +357,10 @@ async def get_mood_entry(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting mood entry: {str(e)}")
+        logger.error("❌ Error getting mood entry: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -363,7 +376,7 @@ async def update_mood_entry_endpoint(
     Update a mood entry
     """
     try:
-        logger.info(f"🔍 Updating mood entry: {entry_id}")
+        logger.info("🔍 Updating mood entry: %s", entry_id)
         
         # Check if entry exists and belongs to user
         existing_entry = get_mood_entry_by_id(entry_id)
@@ -379,21 +392,27 @@ async def update_mood_entry_endpoint(
                 detail="Access denied"
             )
         
-        # Update entry
         update_dict = update_data.dict(exclude_unset=True)
-        result = update_mood_entry(entry_id, update_dict)
+        if not update_dict:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No data provided for update"
+            )
         
-        if not result:
+        # Update entry, scoped to the owner
+        updated = update_mood_entry(entry_id, current_user.id, update_dict)
+        if not updated:
+            # Deleted since we read it
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update mood entry"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Mood entry not found"
             )
         
-        # Get updated entry
-        updated_entry = get_mood_entry_by_id(entry_id)
-        mood_entry = MoodEntryResponse(**MoodEntry.from_dict(updated_entry).to_dict())
+        # Apply the patch to the row we already have instead of reading it back
+        existing_entry.update(update_dict)
+        mood_entry = MoodEntryResponse(**MoodEntry.from_dict(existing_entry).to_dict())
         
-        logger.info(f"✅ Mood entry updated: {entry_id}")
+        logger.info("✅ Mood entry updated: %s", entry_id)
         
         return {
             "success": True,
@@ -404,8 +423,10 @@ async def update_mood_entry_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error updating mood entry: {str(e)}")
+        logger.error("❌ Error updating mood entry: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -420,7 +441,7 @@ async def delete_mood_entry_endpoint(
     Delete a mood entry
     """
     try:
-        logger.info(f"🔍 Deleting mood entry: {entry_id}")
+        logger.info("🔍 Deleting mood entry: %s", entry_id)
         
         # Check if entry exists and belongs to user
         existing_entry = get_mood_entry_by_id(entry_id)
@@ -445,7 +466,7 @@ async def delete_mood_entry_endpoint(
                 detail="Failed to delete mood entry"
             )
         
-        logger.info(f"✅ Mood entry deleted: {entry_id}")
+        logger.info("✅ Mood entry deleted: %s", entry_id)
         
         return {
             "success": True,
@@ -454,8 +475,10 @@ async def delete_mood_entry_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error deleting mood entry: {str(e)}")
+        logger.error("❌ Error deleting mood entry: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
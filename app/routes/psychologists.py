@@ -1,8 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import Optional, List
+from datetime import datetime, date, timedelta
 from app.schemas.psychologist import PsychologistResponse, PsychologistCreate, PsychologistUpdate
-from app.utils.database import create_psychologist, get_psychologists, get_psychologist_by_id, update_psychologist
+from app.utils.database import create_psychologist, get_psychologist_by_id, update_psychologist, get_upcoming_bookings
+from app.config import settings
+from app.utils.db_errors import DatabaseError
+from app.utils.db_session import on_commit
+from app.utils.psychologist_index import psychologist_index, WEEKDAYS
+from app.utils.slots import booked_intervals, free_slots
 from app.models.psychologist import Psychologist
+from app.utils.json_response import FastJSONResponse
 from app.auth.jwt_handler import verify_token
 import logging
 
@@ -13,28 +20,63 @@ router = APIRouter(prefix="/psychologists", tags=["Psychologists"])
 @router.get("", response_model=dict)
 async def get_psychologists_list(
     specialization: Optional[str] = Query(None, description="Filter by specialization"),
+    language: Optional[str] = Query(None, description="Filter by language"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price per hour"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price per hour"),
+    min_rating: Optional[float] = Query(None, ge=0, le=5, description="Minimum rating"),
     available: Optional[bool] = Query(None, description="Filter by availability"),
+    day: Optional[str] = Query(None, regex=f"^({'|'.join(WEEKDAYS)})$", description="Has availability on this weekday"),
+    time: Optional[str] = Query(None, regex=r"^\d{1,2}:\d{2}$", description="Available at this HH:MM time"),
+    q: Optional[str] = Query(None, max_length=100, description="Search name and bio"),
+    sort: str = Query("rating", regex="^(rating|price_asc|price_desc|experience|name)$", description="Sort order"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page")
 ):
     """
-    Get list of psychologists with filtering
+    Get list of psychologists with filtering, served from the in-memory directory index
     """
     try:
-        logger.info(f"🔍 Getting psychologists list - specialization: {specialization}, available: {available}")
+        logger.info("🔍 Getting psychologists list - specialization: %s, available: %s", specialization, available)
         
-        psychologists_data = get_psychologists(specialization, available, page, limit)
-        psychologists = [PsychologistResponse(**Psychologist.from_dict(psych).to_dict()) for psych in psychologists_data]
+        try:
+            total, psychologists = psychologist_index.search(
+                specialization=specialization,
+                language=language,
+                min_price=min_price,
+                max_price=max_price,
+                min_rating=min_rating,
+                available=available,
+                day=day,
+                time=time,
+                q=q,
+                sort=sort,
+                page=page,
+                limit=limit
+            )
+        except ValueError as ve:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(ve)
+            )
         
-        logger.info(f"✅ Retrieved {len(psychologists)} psychologists")
+        logger.info("✅ Retrieved %s psychologists", len(psychologists))
         
-        return {
+        return FastJSONResponse({
             "success": True,
-            "data": psychologists
-        }
+            "data": psychologists,
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total": total
+            }
+        })
         
+    except HTTPException:
+        raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting psychologists: {str(e)}")
+        logger.error("❌ Error getting psychologists: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -46,7 +88,7 @@ async def get_psychologist_detail(psychologist_id: str):
     Get psychologist details by ID
     """
     try:
-        logger.info(f"🔍 Getting psychologist details: {psychologist_id}")
+        logger.info("🔍 Getting psychologist details: %s", psychologist_id)
         
         psychologist_data = get_psychologist_by_id(psychologist_id)
         if not psychologist_data:
@@ -64,8 +106,78 @@ async def get_psychologist_detail(psychologist_id: str):
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error getting psychologist: {str(e)}")
+        logger.error("❌ Error getting psychologist: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.get("/{psychologist_id}/slots", response_model=dict)
+async def get_psychologist_slots(
+    psychologist_id: str,
+    from_date: Optional[date] = Query(None, alias="from", description="First day, defaults to today"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day, defaults to a week from 'from'"),
+    duration: int = Query(60, description="Session length in minutes: 30, 60, 90 or 120")
+):
+    """
+    Get bookable slots: the psychologist's weekly availability minus pending and confirmed consultations
+    """
+    try:
+        if duration not in (30, 60, 90, 120):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Duration must be 30, 60, 90, or 120 minutes"
+            )
+        
+        today = date.today()
+        from_date = max(from_date or today, today)
+        to_date = to_date or from_date + timedelta(days=6)
+        if to_date < from_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'to' must not be before 'from'"
+            )
+        if to_date > today + timedelta(days=settings.SLOT_HORIZON_DAYS):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Slots are only available up to {settings.SLOT_HORIZON_DAYS} days ahead"
+            )
+        
+        psychologist = psychologist_index.get(psychologist_id)
+        if psychologist is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Psychologist not found"
+            )
+        
+        slots = []
+        if psychologist.is_available:
+            busy = booked_intervals(get_upcoming_bookings(psychologist_id))
+            slots = free_slots(
+                psychologist.windows, busy, from_date, to_date,
+                duration, settings.SLOT_STEP_MINUTES, datetime.now()
+            )
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": {
+                "psychologist_id": psychologist_id,
+                "from": from_date.isoformat(),
+                "to": to_date.isoformat(),
+                "duration": duration,
+                "slots": slots
+            }
+        })
+        
+    except HTTPException:
+        raise
+    except DatabaseError:
+        raise
+    except Exception as e:
+        logger.error("❌ Error getting psychologist slots: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -81,10 +193,10 @@ async def create_psychologist_endpoint(
     Create a new psychologist (Admin only)
     """
     try:
-        logger.info(f"🔍 Creating psychologist: {psychologist_data.name}")
+        logger.info("🔍 Creating psychologist: %s", psychologist_data.name)
         
         psychologist_dict = psychologist_data.dict()
-        psychologist = Psychologist.from_dict(psychologist_dict)
+        psychologist = Psychologist.create(psychologist_dict)
         psychologist_dict_for_db = psychologist.to_dict()
         
         result = create_psychologist(psychologist_dict_for_db)
@@ -93,8 +205,9 @@ async def create_psychologist_endpoint(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create psychologist"
             )
+        on_commit(lambda: psychologist_index.upsert(psychologist_dict_for_db))
         
-        logger.info(f"✅ Psychologist created: {psychologist_data.name}")
+        logger.info("✅ Psychologist created: %s", psychologist_data.name)
         
         return {
             "success": True,
@@ -105,8 +218,10 @@ async def create_psychologist_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error creating psychologist: {str(e)}")
+        logger.error("❌ Error creating psychologist: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -122,7 +237,7 @@ async def update_psychologist_endpoint(
     Update psychologist details (Admin only)
     """
     try:
-        logger.info(f"🔍 Updating psychologist: {psychologist_id}")
+        logger.info("🔍 Updating psychologist: %s", psychologist_id)
         
         existing_psychologist = get_psychologist_by_id(psychologist_id)
         if not existing_psychologist:
@@ -132,18 +247,26 @@ async def update_psychologist_endpoint(
             )
         
         update_dict = update_data.dict(exclude_unset=True)
-        result = update_psychologist(psychologist_id, update_dict)
+        if not update_dict:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No data provided for update"
+            )
         
-        if not result:
+        updated = update_psychologist(psychologist_id, update_dict)
+        if not updated:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update psychologist"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Psychologist not found"
             )
         
-        updated_psychologist = get_psychologist_by_id(psychologist_id)
-        psychologist = PsychologistResponse(**Psychologist.from_dict(updated_psychologist).to_dict())
+        # Apply the patch to the row we already have instead of reading it back
+        existing_psychologist.update(update_dict)
+        existing_psychologist['updated_at'] = datetime.now()
+        on_commit(lambda: psychologist_index.upsert(existing_psychologist))
+        psychologist = PsychologistResponse(**Psychologist.from_dict(existing_psychologist).to_dict())
         
-        logger.info(f"✅ Psychologist updated: {psychologist_id}")
+        logger.info("✅ Psychologist updated: %s", psychologist_id)
         
         return {
             "success": True,
@@ -154,8 +277,10 @@ async def update_psychologist_endpoint(
         
     except HTTPException:
         raise
+    except DatabaseError:
+        raise
     except Exception as e:
-        logger.error(f"❌ Error updating psychologist: {str(e)}")
+        logger.error("❌ Error updating psychologist: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
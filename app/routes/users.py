@@ -38,16 +38,16 @@ async def update_profile(
             detail="No data provided for update"
         )
     
-    result = update_user(current_user.id, update_dict)
-    if not result:
+    updated = update_user(current_user.id, update_dict)
+    if not updated:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update profile"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
     
-    # Get updated user data
-    updated_user_data = get_user_by_id(current_user.id)
-    updated_user = User.from_dict(updated_user_data)
+    # Apply the patch to the user we already loaded instead of reading it back;
+    # from_dict applies the same defaults as a row read back (preferences null -> {})
+    updated_user = User.from_dict({**current_user.to_dict(), **update_dict, 'updated_at': datetime.now()})
     
     return {
         "success": True,
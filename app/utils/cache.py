@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from app.utils.metrics import record_cache_hit, record_cache_miss
+import threading
+import time
+
+class TTLCache:
+    """
+    Small in-process LRU whose entries expire after ttl_seconds. Lookups
+    are recorded under `name` in cache_requests_total.
+
+    Each worker process has its own copy, so invalidate() only reaches
+    this process; the TTL bounds how stale the others can get.
+    """
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if time.monotonic() < expires_at:
+                    self.entries.move_to_end(key)
+                    record_cache_hit(self.name)
+                    return value
+                del self.entries[key]
+        record_cache_miss(self.name)
+        return None
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,43 +1,231 @@
-from app.database import db
+from app.config import settings
+from app.database import db, on_event_loop
+from app.utils.query_stats import record_query
+from app.utils.metrics import DB_QUERY_LATENCY, DB_QUERY_ERRORS, DB_QUERY_RETRIES
+from app.utils.slow_query_log import slow_query_log
+from app.utils.db_session import get_current_session, replica_reads_allowed, on_commit, transaction
+from app.utils.cache import TTLCache
+from app.utils.db_errors import (
+    DatabaseError, TransientDatabaseError, DatabaseUnavailableError, DuplicateEntryError,
+    CONNECTION_ERRNOS, CONNECTION_LOST_ERRNOS, TRANSIENT_ERRNOS, DUPLICATE_ENTRY_ERRNO, is_retryable
+)
 from mysql.connector import Error
+from datetime import date, timedelta
+from decimal import Decimal
 import json
+import logging
+import random
+import sys
+import time
 
-def execute_query(query: str, params: tuple = None, fetch_one: bool = False):
-    connection = db.get_connection()
-    if connection is None:
-        return None
-    
-    cursor = connection.cursor(dictionary=True)
+try:
+    import orjson
+except ImportError:  # Optional accelerator; fall back to the stdlib parser
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# JSON columns per table, with the empty value used when a column is NULL or unreadable
+JSON_COLUMNS = {
+    'users': {'preferences': dict},
+    'mood_entries': {'activities': list, 'tags': list},
+    'psychologists': {'specialization': list, 'languages': list, 'availability': dict},
+    'messages': {'attachments': list},
+    'forum_rooms': {'rules': list},
+    'forum_posts': {'tags': list, 'attachments': list},
+}
+
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_dumps(value):
+        return orjson.dumps(value).decode('utf-8')
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+def decode_json_columns(result, table: str):
+    """Decode a table's JSON columns in place, once, for a row or list of rows"""
+    if not result:
+        return result
+    columns = JSON_COLUMNS[table]
+    for row in (result if isinstance(result, list) else (result,)):
+        for column, empty in columns.items():
+            value = row.get(column)
+            if isinstance(value, (str, bytes, bytearray)):
+                try:
+                    row[column] = _json_loads(value)
+                except ValueError:
+                    logger.warning("⚠️  Invalid JSON in %s.%s for row %s", table, column, row.get('id'))
+                    row[column] = empty()
+            elif value is None and column in row:
+                row[column] = empty()
+    return result
+
+def encode_json_columns(data: dict, table: str):
+    """Encode the JSON columns present in data for writing, leaving the caller's dict untouched"""
+    encoded = dict(data)
+    for column in JSON_COLUMNS[table]:
+        if column in encoded:
+            encoded[column] = _json_dumps(encoded[column])
+    return encoded
+
+def _run_query(connection, query: str, params, fetch_one: bool, prepared: bool, rowcount: bool, is_select: bool, helper: str):
+    """Execute one statement on a checked-out connection and record its timing"""
+    statement_cache = None
+    if prepared and settings.DB_STATEMENT_CACHE_SIZE > 0:
+        statement_cache = db.statement_cache(connection)
+        statement, cursor = statement_cache.get(connection, query)
+    else:
+        statement, cursor = query, connection.cursor(dictionary=True)
+    started = time.perf_counter()
+    duration = None
     try:
-        cursor.execute(query, params or ())
+        cursor.execute(statement, params or ())
         
-        if query.strip().upper().startswith('SELECT'):
+        if is_select:
             if fetch_one:
-                result = cursor.fetchone()
+                # Drain the result set so the connection is free for EXPLAIN
+                rows = cursor.fetchall()
+                result = rows[0] if rows else None
             else:
                 result = cursor.fetchall()
         else:
-            connection.commit()
-            result = cursor.lastrowid or True
+            result = cursor.rowcount if rowcount else (cursor.lastrowid or True)
+        
+        duration = time.perf_counter() - started
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            slow_query_log.record(query, params, duration, helper, connection if is_select else None)
         
         return result
-    except Error as e:
-        print(f"Database error: {e}")
-        connection.rollback()
-        return None
+    except Error:
+        if statement_cache is not None:
+            statement_cache.discard(query)
+        raise
     finally:
-        cursor.close()
+        if statement_cache is None:
+            cursor.close()
+        if duration is None:
+            duration = time.perf_counter() - started
+        record_query(query, duration)
+        DB_QUERY_LATENCY.observe(duration, helper)
+
+def execute_query(
+    query: str,
+    params: tuple = None,
+    fetch_one: bool = False,
+    prepared: bool = True,
+    rowcount: bool = False,
+    replica: bool = False,
+    idempotent: bool = False
+):
+    """
+    Run a query on the open transaction's connection, or in autocommit
+    mode on a pooled connection held just for this statement. Fixed templates go through
+    the connection's prepared statement cache; pass prepared=False for SQL
+    built from caller-supplied column lists, which would only churn it.
+    Writes return the matched row count with rowcount=True.
+    
+    replica=True lets a read that tolerates replication lag go to a read
+    replica, unless the request has already written or is inside
+    read_from_primary(). A failing read is retried on the primary; the
+    replica is ejected only if it couldn't be reached or dropped the
+    connection.
+    
+    Deadlocks and lock wait timeouts are retried, as are lost connections
+    for reads and for writes marked idempotent=True (safe to apply twice).
+    Off the event loop retries back off with jitter. On it, sleeping would
+    stall every request on the worker, so there is one immediate retry and
+    no more. Nothing is retried inside an open transaction,
+    since the earlier statements were lost with it. Failures raise
+    DatabaseError; TransientDatabaseError when retrying might still help,
+    DatabaseUnavailableError when no connection could be had at all.
+    """
+    # Name of the data-layer helper that issued this query, for metrics
+    helper = sys._getframe(1).f_code.co_name
+    is_select = query.strip().upper().startswith('SELECT')
+    
+    if replica and is_select and db.replicas and replica_reads_allowed():
+        node, connection = db.replicas.get_connection()
+        if connection is not None:
+            try:
+                return _run_query(connection, query, params, fetch_one, prepared, rowcount, is_select, helper)
+            except Error as e:
+                DB_QUERY_ERRORS.inc(helper)
+                logger.warning("⚠️  Replica %s failed in %s, falling back to primary: %s", node.name, helper, e)
+                if e.errno in CONNECTION_ERRNOS:
+                    db.replicas.eject(node)
+            finally:
+                db.replicas.release_connection(connection)
+    
+    session = get_current_session()
+    max_attempts = min(settings.DB_RETRY_ATTEMPTS, 1) if on_event_loop() else settings.DB_RETRY_ATTEMPTS
+    attempt = 0
+    while True:
+        in_transaction = session is not None and session.in_transaction
+        if in_transaction:
+            connection = session.get_connection()
+        else:
+            connection = db.get_connection()
+        if connection is None:
+            raise DatabaseUnavailableError(f"No database connection available for {helper}")
+        try:
+            result = _run_query(connection, query, params, fetch_one, prepared, rowcount, is_select, helper)
+            if not is_select:
+                if session is not None:
+                    # Later reads in this request must see the write
+                    session.primary_only = True
+                if not in_transaction:
+                    connection.commit()
+            return result
+        except Error as e:
+            DB_QUERY_ERRORS.inc(helper)
+            connection_lost = e.errno in CONNECTION_LOST_ERRNOS
+            if connection_lost:
+                db.breaker.record_failure()
+            if in_transaction:
+                if connection_lost:
+                    session.discard_connection()
+                else:
+                    # A failed statement aborts everything the transaction has written so far
+                    session.rollback()
+            elif not connection_lost:
+                connection.rollback()
+            
+            if attempt < max_attempts and is_retryable(e.errno, is_select or idempotent, in_transaction):
+                attempt += 1
+                DB_QUERY_RETRIES.inc(helper)
+                if on_event_loop():
+                    logger.warning("🔁 Retrying %s immediately: %s", helper, e)
+                    continue
+                # Full jitter keeps retries from colliding with the statement they deadlocked with
+                delay_ms = random.uniform(0, min(settings.DB_RETRY_MAX_DELAY_MS, settings.DB_RETRY_BASE_DELAY_MS * 2 ** (attempt - 1)))
+                logger.warning("🔁 Retrying %s in %.0fms (attempt %s): %s", helper, delay_ms, attempt, e)
+                time.sleep(delay_ms / 1000)
+                continue
+            
+            if e.errno == DUPLICATE_ENTRY_ERRNO:
+                # Expected when a unique key settles a race; callers report it as a conflict
+                logger.warning("⚠️  Duplicate entry in %s: %s", helper, e)
+                raise DuplicateEntryError(f"{helper}: {e}") from e
+            logger.error("❌ Database error in %s: %s", helper, e)
+            if e.errno in TRANSIENT_ERRNOS:
+                raise TransientDatabaseError(f"{helper}: {e}") from e
+            raise DatabaseError(f"{helper}: {e}") from e
+        finally:
+            if not in_transaction:
+                db.release_connection(connection)
 
 # User operations
+# Profile projection; only the login path reads the password hash
+USER_COLUMNS = "id, name, email, phone, date_of_birth, gender, avatar, preferences, created_at, updated_at"
+
 def create_user(user_data: dict):
     query = """
     INSERT INTO users (id, name, email, password, phone, date_of_birth, gender, avatar, preferences)
     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
     """
     
-    # Convert preferences to JSON string
-    preferences_str = json.dumps(user_data.get('preferences', {}))
-    
     params = (
         user_data['id'], 
         user_data['name'], 
@@ -47,48 +235,37 @@ def create_user(user_data: dict):
         user_data.get('date_of_birth'),
         user_data.get('gender'), 
         user_data.get('avatar'), 
-        preferences_str
+        _json_dumps(user_data.get('preferences', {}))
     )
     return execute_query(query, params)
 
 def get_user_by_email(email: str):
-    query = "SELECT * FROM users WHERE email = %s"
+    query = f"SELECT {USER_COLUMNS} FROM users WHERE email = %s"
+    return decode_json_columns(execute_query(query, (email,), fetch_one=True), 'users')
+
+def get_user_credentials_by_email(email: str):
+    query = f"SELECT {USER_COLUMNS}, password FROM users WHERE email = %s"
+    return decode_json_columns(execute_query(query, (email,), fetch_one=True), 'users')
+
+def user_email_exists(email: str) -> bool:
+    query = "SELECT EXISTS(SELECT 1 FROM users WHERE email = %s) AS found"
     result = execute_query(query, (email,), fetch_one=True)
-    
-    # Parse JSON preferences back to dict
-    if result and 'preferences' in result and result['preferences']:
-        try:
-            result['preferences'] = json.loads(result['preferences'])
-        except:
-            result['preferences'] = {}
-    
-    return result
+    return bool(result and result['found'])
 
 def get_user_by_id(user_id: str):
-    query = "SELECT * FROM users WHERE id = %s"
-    result = execute_query(query, (user_id,), fetch_one=True)
-    
-    # Parse JSON preferences back to dict
-    if result and 'preferences' in result and result['preferences']:
-        try:
-            result['preferences'] = json.loads(result['preferences'])
-        except:
-            result['preferences'] = {}
-    
-    return result
+    query = f"SELECT {USER_COLUMNS} FROM users WHERE id = %s"
+    return decode_json_columns(execute_query(query, (user_id,), fetch_one=True), 'users')
 
 def update_user(user_id: str, update_data: dict):
+    """Returns the number of rows matched, None for an empty update; raises DatabaseError on failure"""
     if not update_data:
         return None
     
-    # Handle preferences conversion
-    if 'preferences' in update_data:
-        update_data['preferences'] = json.dumps(update_data['preferences'])
-        
+    update_data = encode_json_columns(update_data, 'users')
     set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
     query = f"UPDATE users SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
     params = tuple(update_data.values()) + (user_id,)
-    return execute_query(query, params)
+    return execute_query(query, params, prepared=False, rowcount=True, idempotent=True)
 
 # Refresh token operations
 def create_refresh_token_db(token_data: dict):
@@ -100,42 +277,41 @@ def create_refresh_token_db(token_data: dict):
     return execute_query(query, params)
 
 def get_refresh_token(token: str):
-    query = "SELECT * FROM refresh_tokens WHERE token = %s"
+    query = "SELECT id, user_id, expires_at FROM refresh_tokens WHERE token = %s"
     return execute_query(query, (token,), fetch_one=True)
 
 def delete_refresh_token(token: str):
     query = "DELETE FROM refresh_tokens WHERE token = %s"
-    return execute_query(query, (token,))
+    return execute_query(query, (token,), idempotent=True)
 
 def delete_user_refresh_tokens(user_id: str):
     query = "DELETE FROM refresh_tokens WHERE user_id = %s"
-    return execute_query(query, (user_id,))
+    return execute_query(query, (user_id,), idempotent=True)
 
 # Mood entries operations
+MOOD_ENTRY_COLUMNS = "id, user_id, mood, energy_level, sleep_hours, activities, tags, note, timestamp, created_at"
+
 def create_mood_entry(mood_data: dict):
     query = """
     INSERT INTO mood_entries (id, user_id, mood, energy_level, sleep_hours, activities, tags, note, timestamp)
     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
     """
     
-    activities_str = json.dumps(mood_data.get('activities', []))
-    tags_str = json.dumps(mood_data.get('tags', []))
-    
     params = (
         mood_data['id'],
         mood_data['user_id'],
         mood_data['mood'],
         mood_data.get('energy_level'),
         mood_data.get('sleep_hours'),
-        activities_str,
-        tags_str,
+        _json_dumps(mood_data.get('activities', [])),
+        _json_dumps(mood_data.get('tags', [])),
         mood_data.get('note'),
         mood_data.get('timestamp')
     )
     return execute_query(query, params)
 
 def get_mood_entries(user_id: str, start_date: str = None, end_date: str = None, page: int = 1, limit: int = 20):
-    query = "SELECT * FROM mood_entries WHERE user_id = %s"
+    query = f"SELECT {MOOD_ENTRY_COLUMNS} FROM mood_entries WHERE user_id = %s"
     params = [user_id]
     
     if start_date and end_date:
@@ -151,30 +327,26 @@ def get_mood_entries(user_id: str, start_date: str = None, end_date: str = None,
     query += " ORDER BY timestamp DESC LIMIT %s OFFSET %s"
     params.extend([limit, (page - 1) * limit])
     
-    return execute_query(query, tuple(params))
+    return decode_json_columns(execute_query(query, tuple(params)), 'mood_entries')
 
 def get_mood_entry_by_id(entry_id: str):
-    query = "SELECT * FROM mood_entries WHERE id = %s"
-    return execute_query(query, (entry_id,), fetch_one=True)
+    query = f"SELECT {MOOD_ENTRY_COLUMNS} FROM mood_entries WHERE id = %s"
+    return decode_json_columns(execute_query(query, (entry_id,), fetch_one=True), 'mood_entries')
 
-def update_mood_entry(entry_id: str, update_data: dict):
+def update_mood_entry(entry_id: str, user_id: str, update_data: dict):
+    """Update an entry owned by user_id; returns the number of rows matched, None for an empty update; raises DatabaseError on failure"""
     if not update_data:
         return None
     
-    # Handle JSON fields
-    if 'activities' in update_data:
-        update_data['activities'] = json.dumps(update_data['activities'])
-    if 'tags' in update_data:
-        update_data['tags'] = json.dumps(update_data['tags'])
-    
+    update_data = encode_json_columns(update_data, 'mood_entries')
     set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
-    query = f"UPDATE mood_entries SET {set_clause} WHERE id = %s"
-    params = tuple(update_data.values()) + (entry_id,)
-    return execute_query(query, params)
+    query = f"UPDATE mood_entries SET {set_clause} WHERE id = %s AND user_id = %s"
+    params = tuple(update_data.values()) + (entry_id, user_id)
+    return execute_query(query, params, prepared=False, rowcount=True, idempotent=True)
 
 def delete_mood_entry(entry_id: str):
     query = "DELETE FROM mood_entries WHERE id = %s"
-    return execute_query(query, (entry_id,))
+    return execute_query(query, (entry_id,), idempotent=True)
 
 def get_mood_statistics(user_id: str, start_date: str, end_date: str):
     query = """
@@ -200,7 +372,7 @@ def get_mood_statistics(user_id: str, start_date: str, end_date: str):
     FROM mood_entries 
     WHERE user_id = %s AND DATE(timestamp) BETWEEN %s AND %s
     """
-    return execute_query(query, (user_id, start_date, end_date), fetch_one=True)
+    return execute_query(query, (user_id, start_date, end_date), fetch_one=True, replica=True)
 
 def get_mood_distribution(user_id: str, start_date: str, end_date: str):
     query = """
@@ -209,73 +381,68 @@ def get_mood_distribution(user_id: str, start_date: str, end_date: str):
     WHERE user_id = %s AND DATE(timestamp) BETWEEN %s AND %s
     GROUP BY mood
     """
-    return execute_query(query, (user_id, start_date, end_date))
+    return execute_query(query, (user_id, start_date, end_date), replica=True)
 
 # Psychologists operations
+PSYCHOLOGIST_COLUMNS = (
+    "id, name, specialization, experience, rating, price_per_hour, languages, availability, "
+    "avatar, bio, is_available, created_at, updated_at"
+)
+# What booking and consultation views need, without the bio and JSON blobs
+PSYCHOLOGIST_SUMMARY_COLUMNS = "id, name, avatar, price_per_hour, is_available"
+
 def create_psychologist(psychologist_data: dict):
     query = """
     INSERT INTO psychologists (id, name, specialization, experience, rating, price_per_hour, languages, availability, avatar, bio, is_available)
     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
     """
     
-    specialization_str = json.dumps(psychologist_data.get('specialization', []))
-    languages_str = json.dumps(psychologist_data.get('languages', []))
-    availability_str = json.dumps(psychologist_data.get('availability', {}))
-    
     params = (
         psychologist_data['id'],
         psychologist_data['name'],
-        specialization_str,
+        _json_dumps(psychologist_data.get('specialization', [])),
         psychologist_data.get('experience', 0),
         psychologist_data.get('rating', 0.0),
         psychologist_data.get('price_per_hour'),
-        languages_str,
-        availability_str,
+        _json_dumps(psychologist_data.get('languages', [])),
+        _json_dumps(psychologist_data.get('availability', {})),
         psychologist_data.get('avatar'),
         psychologist_data.get('bio'),
         psychologist_data.get('is_available', True)
     )
     return execute_query(query, params)
 
-def get_psychologists(specialization: str = None, available: bool = None, page: int = 1, limit: int = 20):
-    query = "SELECT * FROM psychologists WHERE 1=1"
-    params = []
-    
-    if specialization:
-        query += " AND JSON_CONTAINS(specialization, %s)"
-        params.append(f'"{specialization}"')
-    
-    if available is not None:
-        query += " AND is_available = %s"
-        params.append(available)
-    
-    query += " ORDER BY rating DESC LIMIT %s OFFSET %s"
-    params.extend([limit, (page - 1) * limit])
-    
-    return execute_query(query, tuple(params))
+def get_all_psychologists():
+    """Whole table, for building the in-memory directory index"""
+    # From the primary: the result replaces the index, so a lagging replica would undo newer upserts
+    query = f"SELECT {PSYCHOLOGIST_COLUMNS} FROM psychologists"
+    return decode_json_columns(execute_query(query), 'psychologists')
 
 def get_psychologist_by_id(psychologist_id: str):
-    query = "SELECT * FROM psychologists WHERE id = %s"
+    query = f"SELECT {PSYCHOLOGIST_COLUMNS} FROM psychologists WHERE id = %s"
+    return decode_json_columns(execute_query(query, (psychologist_id,), fetch_one=True), 'psychologists')
+
+def get_psychologist_summary(psychologist_id: str):
+    query = f"SELECT {PSYCHOLOGIST_SUMMARY_COLUMNS} FROM psychologists WHERE id = %s"
     return execute_query(query, (psychologist_id,), fetch_one=True)
 
 def update_psychologist(psychologist_id: str, update_data: dict):
+    """Returns the number of rows matched, None for an empty update; raises DatabaseError on failure"""
     if not update_data:
         return None
     
-    # Handle JSON fields
-    if 'specialization' in update_data:
-        update_data['specialization'] = json.dumps(update_data['specialization'])
-    if 'languages' in update_data:
-        update_data['languages'] = json.dumps(update_data['languages'])
-    if 'availability' in update_data:
-        update_data['availability'] = json.dumps(update_data['availability'])
-    
+    update_data = encode_json_columns(update_data, 'psychologists')
     set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
     query = f"UPDATE psychologists SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
     params = tuple(update_data.values()) + (psychologist_id,)
-    return execute_query(query, params)
+    return execute_query(query, params, prepared=False, rowcount=True, idempotent=True)
 
 # Consultations operations
+CONSULTATION_COLUMNS = (
+    "id, user_id, psychologist_id, type, status, preferred_date, preferred_time, duration, reason, "
+    "urgency, price, notes, scheduled_at, started_at, completed_at, created_at, updated_at"
+)
+
 def create_consultation(consultation_data: dict):
     query = """
     INSERT INTO consultations (id, user_id, psychologist_id, type, status, preferred_date, preferred_time, duration, reason, urgency, price)
@@ -295,111 +462,403 @@ def create_consultation(consultation_data: dict):
         consultation_data.get('urgency', 'medium'),
         consultation_data.get('price')
     )
-    return execute_query(query, params)
+    invalidate_psychologist_bookings(consultation_data['psychologist_id'])
+    with transaction():
+        result = execute_query(query, params)
+        adjust_consultation_stats(None, {
+            'user_id': consultation_data['user_id'],
+            'psychologist_id': consultation_data['psychologist_id'],
+            'status': consultation_data.get('status', 'pending'),
+            'duration': consultation_data.get('duration', 60),
+            'price': consultation_data.get('price')
+        })
+    return result
 
 def get_consultations(user_id: str = None, psychologist_id: str = None, status: str = None, page: int = 1, limit: int = 20):
-    query = "SELECT * FROM consultations WHERE 1=1"
+    columns = ", ".join(f"c.{column}" for column in CONSULTATION_COLUMNS.split(", "))
+    query = f"""
+    SELECT {columns}, p.name as psychologist_name
+    FROM consultations c
+    LEFT JOIN psychologists p ON c.psychologist_id = p.id
+    WHERE 1=1
+    """
     params = []
     
     if user_id:
-        query += " AND user_id = %s"
+        query += " AND c.user_id = %s"
         params.append(user_id)
     
     if psychologist_id:
-        query += " AND psychologist_id = %s"
+        query += " AND c.psychologist_id = %s"
         params.append(psychologist_id)
     
     if status:
-        query += " AND status = %s"
+        query += " AND c.status = %s"
         params.append(status)
     
-    query += " ORDER BY created_at DESC LIMIT %s OFFSET %s"
+    query += " ORDER BY c.created_at DESC LIMIT %s OFFSET %s"
     params.extend([limit, (page - 1) * limit])
     
     return execute_query(query, tuple(params))
 
+# Psychologist queue: urgency first, then earliest date, walked by keyset on
+# idx_consultations_queue so deep pages cost the same as the first
+URGENCY_ORDER = ('high', 'medium', 'low')
+
+def get_consultation_queue_cursor(psychologist_id: str, consultation_id: str):
+    query = "SELECT urgency, preferred_date, id FROM consultations WHERE id = %s AND psychologist_id = %s"
+    return execute_query(query, (consultation_id, psychologist_id), fetch_one=True)
+
+def get_consultation_queue(psychologist_id: str, status: str = 'pending', after: dict = None, limit: int = 20):
+    """One page of a psychologist's consultations in a status, after a row from get_consultation_queue_cursor"""
+    columns = ", ".join(f"c.{column}" for column in CONSULTATION_COLUMNS.split(", "))
+    query = f"""
+    SELECT {columns}, u.name as user_name
+    FROM consultations c
+    LEFT JOIN users u ON c.user_id = u.id
+    WHERE c.psychologist_id = %s AND c.status = %s
+    """
+    if after is None:
+        query += " ORDER BY c.urgency DESC, c.preferred_date ASC, c.id ASC LIMIT %s"
+        return execute_query(query, (psychologist_id, status, limit))
+    
+    # urgency sorts DESC but the date and id ASC, so no single row comparison follows the
+    # index. Instead read the cursor's urgency from its (preferred_date, id) onwards, then
+    # each lower urgency from its start: every read is one contiguous index range.
+    # preferred_date >= bounds the range; the OR only filters rows on the cursor's date.
+    rows = []
+    for urgency in URGENCY_ORDER[URGENCY_ORDER.index(after['urgency']):]:
+        bucket_query = query + " AND c.urgency = %s"
+        params = [psychologist_id, status, urgency]
+        if urgency == after['urgency']:
+            bucket_query += " AND c.preferred_date >= %s AND (c.preferred_date > %s OR c.id > %s)"
+            params.extend([after['preferred_date'], after['preferred_date'], after['id']])
+        bucket_query += " ORDER BY c.preferred_date ASC, c.id ASC LIMIT %s"
+        params.append(limit - len(rows))
+        
+        rows.extend(execute_query(bucket_query, tuple(params)))
+        if len(rows) >= limit:
+            break
+    return rows
+
 def get_consultation_by_id(consultation_id: str):
-    query = "SELECT * FROM consultations WHERE id = %s"
+    query = f"SELECT {CONSULTATION_COLUMNS} FROM consultations WHERE id = %s"
     return execute_query(query, (consultation_id,), fetch_one=True)
 
-def update_consultation(consultation_id: str, update_data: dict):
+# Chat traffic checks participants and status on every message; every write to
+# consultations must go through invalidate_consultation_access()
+consultation_access_cache = TTLCache(
+    "consultation_access",
+    settings.CONSULTATION_ACCESS_CACHE_SIZE,
+    settings.CONSULTATION_ACCESS_CACHE_TTL_SECONDS
+)
+
+def get_consultation_access(consultation_id: str):
+    """Participants and status only, for permission checks; the shared cached row must not be mutated"""
+    cached = consultation_access_cache.get(consultation_id)
+    if cached is not None:
+        return cached
+    
+    query = "SELECT id, user_id, psychologist_id, status FROM consultations WHERE id = %s"
+    result = execute_query(query, (consultation_id,), fetch_one=True)
+    if result:
+        consultation_access_cache.set(consultation_id, result)
+    return result
+
+# Upcoming bookings per psychologist, for slot computation; every change to a
+# consultation's status or time must go through invalidate_psychologist_bookings()
+psychologist_bookings_cache = TTLCache(
+    "psychologist_bookings",
+    settings.BOOKING_CACHE_SIZE,
+    settings.BOOKING_CACHE_TTL_SECONDS
+)
+
+def _upcoming_bookings_key(psychologist_id: str) -> tuple:
+    # From yesterday, like the booking check, for sessions running past midnight into today
+    return psychologist_id, date.today() - timedelta(days=1)
+
+def get_upcoming_bookings(psychologist_id: str):
+    """Pending and confirmed (preferred_date, preferred_time, duration) rows from yesterday to the slot horizon"""
+    cache_key = _upcoming_bookings_key(psychologist_id)
+    cached = psychologist_bookings_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    start_date = cache_key[1]
+    result = get_bookings_between(psychologist_id, start_date, date.today() + timedelta(days=settings.SLOT_HORIZON_DAYS))
+    if result is not None:
+        psychologist_bookings_cache.set(cache_key, result)
+    return result
+
+def get_bookings_between(psychologist_id: str, start_date, end_date):
+    """Pending and confirmed consultations on the given dates, uncached"""
+    query = """
+    SELECT preferred_date, preferred_time, duration 
+    FROM consultations 
+    WHERE psychologist_id = %s AND status IN ('pending', 'confirmed') 
+    AND preferred_date BETWEEN %s AND %s
+    """
+    return execute_query(query, (psychologist_id, start_date, end_date))
+
+def lock_psychologist_for_booking(psychologist_id: str):
+    """
+    Summary row read with FOR UPDATE, which queues concurrent bookings for the
+    same psychologist until the holder commits; call inside a transaction
+    """
+    query = f"SELECT {PSYCHOLOGIST_SUMMARY_COLUMNS} FROM psychologists WHERE id = %s FOR UPDATE"
+    return execute_query(query, (psychologist_id,), fetch_one=True)
+
+def invalidate_psychologist_bookings(psychologist_id: str):
+    cache_key = _upcoming_bookings_key(psychologist_id)
+    psychologist_bookings_cache.invalidate(cache_key)
+    on_commit(lambda: psychologist_bookings_cache.invalidate(cache_key))
+
+def invalidate_consultation_access(consultation_id: str):
+    consultation_access_cache.invalidate(consultation_id)
+    # Again once the write commits, in case another request re-cached the old row meanwhile
+    on_commit(lambda: consultation_access_cache.invalidate(consultation_id))
+
+def update_consultation(consultation_id: str, update_data: dict, user_id: str = None):
+    """Update a consultation, limited to user_id's when given; returns the number of rows matched"""
     if not update_data:
         return None
     
+    if not CONSULTATION_STATS_FIELDS.intersection(update_data):
+        invalidate_consultation_access(consultation_id)
+        return _update_consultation_row(consultation_id, update_data, user_id)
+    
+    # The stats deltas need the old values; the row lock stops a concurrent update reading the same ones.
+    # transaction() opens a private session outside a request, so the lock always holds until commit.
+    with transaction():
+        query = f"SELECT {CONSULTATION_STATS_COLUMNS} FROM consultations WHERE id = %s FOR UPDATE"
+        before = execute_query(query, (consultation_id,), fetch_one=True)
+        invalidate_consultation_access(consultation_id)
+        updated = _update_consultation_row(consultation_id, update_data, user_id)
+        if updated and before:
+            after = dict(before)
+            after.update((field, update_data[field]) for field in CONSULTATION_STATS_FIELDS if field in update_data)
+            adjust_consultation_stats(before, after)
+            if 'status' in update_data:
+                invalidate_psychologist_bookings(before['psychologist_id'])
+    return updated
+
+def _update_consultation_row(consultation_id: str, update_data: dict, user_id: str = None):
     set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
     query = f"UPDATE consultations SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
     params = tuple(update_data.values()) + (consultation_id,)
-    return execute_query(query, params)
+    if user_id is not None:
+        query += " AND user_id = %s"
+        params += (user_id,)
+    return execute_query(query, params, prepared=False, rowcount=True, idempotent=True)
+
+# Consultation stats operations
+# consultation_stats holds running totals per user and per psychologist, adjusted by
+# delta in the same transaction as the consultation write that changes them
+CONSULTATION_STATS_FIELDS = frozenset(('status', 'duration', 'price'))
+CONSULTATION_STATS_COLUMNS = "user_id, psychologist_id, status, duration, price"
 
-def get_consultation_statistics(user_id: str):
+def _stats_contribution(row: dict) -> tuple:
+    """What one consultation adds to its owners' totals"""
+    status = row.get('status')
+    return (
+        1,
+        int(status == 'pending'),
+        int(status == 'confirmed'),
+        int(status == 'completed'),
+        row.get('duration') or 0,
+        Decimal(str(row.get('price') or 0))
+    )
+
+def adjust_consultation_stats(before: dict = None, after: dict = None):
+    """Move the user's and psychologist's totals from a consultation's old values to its new ones"""
+    delta = [0, 0, 0, 0, 0, Decimal(0)]
+    if after is not None:
+        delta = [total + value for total, value in zip(delta, _stats_contribution(after))]
+    if before is not None:
+        delta = [total - value for total, value in zip(delta, _stats_contribution(before))]
+    if not any(delta):
+        return
+    
+    row = after if after is not None else before
     query = """
-    SELECT 
-        COUNT(*) as total_sessions,
-        COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_sessions,
-        COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_sessions,
-        COUNT(CASE WHEN status = 'confirmed' THEN 1 END) as upcoming_sessions,
-        COALESCE(SUM(duration), 0) as total_minutes,
-        COALESCE(SUM(price), 0) as total_spent
-    FROM consultations 
-    WHERE user_id = %s
+    INSERT INTO consultation_stats 
+        (owner_role, owner_id, total_sessions, pending_sessions, upcoming_sessions, completed_sessions, total_minutes, total_amount)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE 
+        total_sessions = total_sessions + VALUES(total_sessions),
+        pending_sessions = pending_sessions + VALUES(pending_sessions),
+        upcoming_sessions = upcoming_sessions + VALUES(upcoming_sessions),
+        completed_sessions = completed_sessions + VALUES(completed_sessions),
+        total_minutes = total_minutes + VALUES(total_minutes),
+        total_amount = total_amount + VALUES(total_amount)
     """
-    return execute_query(query, (user_id,), fetch_one=True)
+    # Always user then psychologist, so concurrent adjustments take the row locks in the same order
+    execute_query(query, ('user', row['user_id'], *delta))
+    if row.get('psychologist_id'):
+        execute_query(query, ('psychologist', row['psychologist_id'], *delta))
+
+def get_consultation_statistics(owner_id: str, role: str = 'user'):
+    """Running totals for a user, or a psychologist with role='psychologist'; None if they have no consultations"""
+    query = """
+    SELECT total_sessions, pending_sessions, upcoming_sessions, completed_sessions, total_minutes, total_amount 
+    FROM consultation_stats 
+    WHERE owner_role = %s AND owner_id = %s
+    """
+    return execute_query(query, (role, owner_id), fetch_one=True)
 
 # Messages operations
+# Read status comes from consultation_read_state, not the legacy is_read/read_at columns.
+# seq is the database-assigned sync cursor; it stays internal and is not serialized.
+MESSAGE_COLUMNS = "id, consultation_id, sender_id, content, type, attachments, created_at, seq"
+
+def lock_consultation_for_message(consultation_id: str):
+    """
+    Consultation row read with FOR UPDATE, which queues concurrent sends in the
+    same consultation until the holder commits, so seq values commit in
+    order; call inside a transaction
+    """
+    query = "SELECT id FROM consultations WHERE id = %s FOR UPDATE"
+    return execute_query(query, (consultation_id,), fetch_one=True)
+
 def create_message(message_data: dict):
+    """Insert a message; returns its seq (the AUTO_INCREMENT value)"""
     query = """
-    INSERT INTO messages (id, consultation_id, sender_id, content, type, attachments, is_read)
+    INSERT INTO messages (id, consultation_id, sender_id, content, type, attachments, created_at)
     VALUES (%s, %s, %s, %s, %s, %s, %s)
     """
     
-    attachments_str = json.dumps(message_data.get('attachments', []))
-    
     params = (
         message_data['id'],
         message_data['consultation_id'],
         message_data['sender_id'],
         message_data['content'],
         message_data.get('type', 'text'),
-        attachments_str,
-        message_data.get('is_read', False)
+        _json_dumps(message_data.get('attachments', [])),
+        # Store the timestamp clients were sent, so it resolves a timestamp `after`
+        message_data['created_at']
     )
     return execute_query(query, params)
 
 def get_messages(consultation_id: str, page: int = 1, limit: int = 50):
-    query = """
-    SELECT * FROM messages 
+    query = f"""
+    SELECT {MESSAGE_COLUMNS} FROM messages 
     WHERE consultation_id = %s 
-    ORDER BY created_at ASC 
+    ORDER BY seq ASC 
     LIMIT %s OFFSET %s
     """
-    return execute_query(query, (consultation_id, limit, (page - 1) * limit))
+    return decode_json_columns(execute_query(query, (consultation_id, limit, (page - 1) * limit)), 'messages')
+
+def get_message_cursor(consultation_id: str, message_id: str):
+    query = "SELECT seq, id FROM messages WHERE id = %s AND consultation_id = %s"
+    return execute_query(query, (message_id, consultation_id), fetch_one=True)
 
-def mark_messages_as_read(consultation_id: str, user_id: str):
+def get_message_cursor_at(consultation_id: str, at):
+    """Cursor of the last message created at or before a timestamp, for timestamp-based `after`"""
     query = """
-    UPDATE messages 
-    SET is_read = TRUE, read_at = CURRENT_TIMESTAMP 
-    WHERE consultation_id = %s AND sender_id != %s AND is_read = FALSE
+    SELECT seq, id FROM messages 
+    WHERE consultation_id = %s AND created_at <= %s 
+    ORDER BY seq DESC 
+    LIMIT 1
     """
-    return execute_query(query, (consultation_id, user_id))
+    return execute_query(query, (consultation_id, at), fetch_one=True)
+
+def get_messages_after(consultation_id: str, after_seq: int, limit: int = 50):
+    """Messages past a seq cursor, served by idx_messages_consultation_seq"""
+    query = f"""
+    SELECT {MESSAGE_COLUMNS} FROM messages 
+    WHERE consultation_id = %s AND seq > %s 
+    ORDER BY seq ASC 
+    LIMIT %s
+    """
+    return decode_json_columns(execute_query(query, (consultation_id, after_seq, limit)), 'messages')
+
+def get_latest_message_cursor(consultation_id: str):
+    query = """
+    SELECT seq, id FROM messages 
+    WHERE consultation_id = %s 
+    ORDER BY seq DESC 
+    LIMIT 1
+    """
+    return execute_query(query, (consultation_id,), fetch_one=True)
+
+# Read state operations
+# One row per participant: every message up to last_read_seq has been read
+def get_read_states(consultation_id: str):
+    query = """
+    SELECT user_id, last_read_message_id, last_read_seq, updated_at 
+    FROM consultation_read_state 
+    WHERE consultation_id = %s
+    """
+    return execute_query(query, (consultation_id,))
+
+def advance_read_state(consultation_id: str, user_id: str, message_id: str, message_seq: int):
+    """Move a participant's watermark forward to a message; never moves it back"""
+    # Assignments apply left to right, so the id is compared against the old seq
+    query = """
+    INSERT INTO consultation_read_state (consultation_id, user_id, last_read_message_id, last_read_seq)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        last_read_message_id = IF(VALUES(last_read_seq) > last_read_seq, VALUES(last_read_message_id), last_read_message_id),
+        last_read_seq = GREATEST(last_read_seq, VALUES(last_read_seq))
+    """
+    return execute_query(query, (consultation_id, user_id, message_id, message_seq), idempotent=True)
 
 def get_unread_message_count(consultation_id: str, user_id: str):
+    """Messages past the user's watermark, a range on idx_messages_consultation_seq"""
     query = """
     SELECT COUNT(*) as unread_count 
-    FROM messages 
-    WHERE consultation_id = %s AND sender_id != %s AND is_read = FALSE
+    FROM messages m 
+    LEFT JOIN consultation_read_state r 
+        ON r.consultation_id = m.consultation_id AND r.user_id = %s 
+    WHERE m.consultation_id = %s AND m.sender_id != %s 
+    AND m.seq > COALESCE(r.last_read_seq, 0)
+    """
+    result = execute_query(query, (user_id, consultation_id, user_id), fetch_one=True)
+    return result['unread_count'] if result else 0
+
+# Unread counter operations
+# Maintained per (user, consultation) so inbox badges are one primary key range read
+def increment_unread_counter(user_id: str, consultation_id: str):
+    query = """
+    INSERT INTO user_unread_counters (user_id, consultation_id, unread_count)
+    VALUES (%s, %s, 1)
+    ON DUPLICATE KEY UPDATE unread_count = unread_count + 1
+    """
+    return execute_query(query, (user_id, consultation_id))
+
+def set_unread_counter(user_id: str, consultation_id: str, unread_count: int):
+    query = """
+    INSERT INTO user_unread_counters (user_id, consultation_id, unread_count)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE unread_count = VALUES(unread_count)
     """
-    result = execute_query(query, (consultation_id, user_id), fetch_one=True)
+    return execute_query(query, (user_id, consultation_id, unread_count), idempotent=True)
+
+def get_unread_counter(user_id: str, consultation_id: str) -> int:
+    query = "SELECT unread_count FROM user_unread_counters WHERE user_id = %s AND consultation_id = %s"
+    result = execute_query(query, (user_id, consultation_id), fetch_one=True)
     return result['unread_count'] if result else 0
 
+def get_unread_counters(user_id: str):
+    query = """
+    SELECT consultation_id, unread_count 
+    FROM user_unread_counters 
+    WHERE user_id = %s AND unread_count > 0
+    """
+    return execute_query(query, (user_id,))
+
 # Forum Rooms operations
+FORUM_ROOM_COLUMNS = (
+    "id, name, description, category, icon, member_count, post_count, last_activity, "
+    "is_private, rules, created_by, created_at, updated_at"
+)
+
 def create_forum_room(room_data: dict):
     query = """
     INSERT INTO forum_rooms (id, name, description, category, icon, is_private, rules, created_by)
     VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
     """
     
-    rules_str = json.dumps(room_data.get('rules', []))
-    
     params = (
         room_data['id'],
         room_data['name'],
@@ -407,13 +866,13 @@ def create_forum_room(room_data: dict):
         room_data['category'],
         room_data.get('icon', '💬'),
         room_data.get('is_private', False),
-        rules_str,
+        _json_dumps(room_data.get('rules', [])),
         room_data['created_by']
     )
     return execute_query(query, params)
 
 def get_forum_rooms(category: str = None, page: int = 1, limit: int = 20):
-    query = "SELECT * FROM forum_rooms WHERE 1=1"
+    query = f"SELECT {FORUM_ROOM_COLUMNS} FROM forum_rooms WHERE 1=1"
     params = []
     
     if category:
@@ -423,29 +882,28 @@ def get_forum_rooms(category: str = None, page: int = 1, limit: int = 20):
     query += " ORDER BY last_activity DESC LIMIT %s OFFSET %s"
     params.extend([limit, (page - 1) * limit])
     
-    return execute_query(query, tuple(params))
+    return decode_json_columns(execute_query(query, tuple(params), replica=True), 'forum_rooms')
 
 def get_forum_room_by_id(room_id: str):
-    query = "SELECT * FROM forum_rooms WHERE id = %s"
-    return execute_query(query, (room_id,), fetch_one=True)
+    query = f"SELECT {FORUM_ROOM_COLUMNS} FROM forum_rooms WHERE id = %s"
+    return decode_json_columns(execute_query(query, (room_id,), fetch_one=True), 'forum_rooms')
 
 def update_forum_room(room_id: str, update_data: dict):
     if not update_data:
         return None
     
-    if 'rules' in update_data:
-        update_data['rules'] = json.dumps(update_data['rules'])
-    
+    update_data = encode_json_columns(update_data, 'forum_rooms')
     set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
     query = f"UPDATE forum_rooms SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
     params = tuple(update_data.values()) + (room_id,)
-    return execute_query(query, params)
+    return execute_query(query, params, prepared=False, idempotent=True)
 
 def update_room_activity(room_id: str):
     query = "UPDATE forum_rooms SET last_activity = CURRENT_TIMESTAMP WHERE id = %s"
-    return execute_query(query, (room_id,))
+    return execute_query(query, (room_id,), idempotent=True)
 
 # Room Members operations
+# Denormalized counters below change in the same transaction() as the rows they count
 def join_room(member_data: dict):
     query = """
     INSERT INTO forum_room_members (id, room_id, user_id, role)
@@ -459,32 +917,35 @@ def join_room(member_data: dict):
         member_data.get('role', 'member')
     )
     
-    result = execute_query(query, params)
-    if result:
-        # Update member count
-        update_query = "UPDATE forum_rooms SET member_count = member_count + 1 WHERE id = %s"
-        execute_query(update_query, (member_data['room_id'],))
+    with transaction():
+        result = execute_query(query, params)
+        if result:
+            # Update member count
+            update_query = "UPDATE forum_rooms SET member_count = member_count + 1 WHERE id = %s"
+            execute_query(update_query, (member_data['room_id'],))
     
     return result
 
 def leave_room(room_id: str, user_id: str):
     query = "DELETE FROM forum_room_members WHERE room_id = %s AND user_id = %s"
-    result = execute_query(query, (room_id, user_id))
-    
-    if result:
-        # Update member count
-        update_query = "UPDATE forum_rooms SET member_count = member_count - 1 WHERE id = %s"
-        execute_query(update_query, (room_id,))
+    with transaction():
+        result = execute_query(query, (room_id, user_id))
+        
+        if result:
+            # Update member count
+            update_query = "UPDATE forum_rooms SET member_count = member_count - 1 WHERE id = %s"
+            execute_query(update_query, (room_id,))
     
     return result
 
-def is_room_member(room_id: str, user_id: str):
-    query = "SELECT * FROM forum_room_members WHERE room_id = %s AND user_id = %s"
-    return execute_query(query, (room_id, user_id), fetch_one=True)
+def is_room_member(room_id: str, user_id: str) -> bool:
+    query = "SELECT EXISTS(SELECT 1 FROM forum_room_members WHERE room_id = %s AND user_id = %s) AS found"
+    result = execute_query(query, (room_id, user_id), fetch_one=True)
+    return bool(result and result['found'])
 
 def get_room_members(room_id: str, page: int = 1, limit: int = 50):
     query = """
-    SELECT rm.*, u.name, u.avatar 
+    SELECT rm.id, rm.room_id, rm.user_id, rm.role, rm.joined_at, u.name, u.avatar 
     FROM forum_room_members rm 
     JOIN users u ON rm.user_id = u.id 
     WHERE rm.room_id = %s 
@@ -494,15 +955,17 @@ def get_room_members(room_id: str, page: int = 1, limit: int = 50):
     return execute_query(query, (room_id, limit, (page - 1) * limit))
 
 # Forum Posts operations
+FORUM_POST_COLUMNS = (
+    "p.id, p.room_id, p.author_id, p.content, p.is_anonymous, p.mood, p.tags, p.attachments, "
+    "p.like_count, p.comment_count, p.share_count, p.is_edited, p.edited_at, p.created_at, p.updated_at"
+)
+
 def create_forum_post(post_data: dict):
     query = """
     INSERT INTO forum_posts (id, room_id, author_id, content, is_anonymous, mood, tags, attachments)
     VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
     """
     
-    tags_str = json.dumps(post_data.get('tags', []))
-    attachments_str = json.dumps(post_data.get('attachments', []))
-    
     params = (
         post_data['id'],
         post_data['room_id'],
@@ -510,25 +973,26 @@ def create_forum_post(post_data: dict):
         post_data['content'],
         post_data.get('is_anonymous', False),
         post_data.get('mood'),
-        tags_str,
-        attachments_str
+        _json_dumps(post_data.get('tags', [])),
+        _json_dumps(post_data.get('attachments', []))
     )
     
-    result = execute_query(query, params)
-    if result:
-        # Update room post count and activity
-        update_room_query = """
-        UPDATE forum_rooms 
-        SET post_count = post_count + 1, last_activity = CURRENT_TIMESTAMP 
-        WHERE id = %s
-        """
-        execute_query(update_room_query, (post_data['room_id'],))
+    with transaction():
+        result = execute_query(query, params)
+        if result:
+            # Update room post count and activity
+            update_room_query = """
+            UPDATE forum_rooms 
+            SET post_count = post_count + 1, last_activity = CURRENT_TIMESTAMP 
+            WHERE id = %s
+            """
+            execute_query(update_room_query, (post_data['room_id'],))
     
     return result
 
 def get_forum_posts(room_id: str, page: int = 1, limit: int = 20, sort: str = "newest"):
-    query = """
-    SELECT p.*, u.name as author_name, u.avatar as author_avatar 
+    query = f"""
+    SELECT {FORUM_POST_COLUMNS}, u.name as author_name, u.avatar as author_avatar 
     FROM forum_posts p 
     JOIN users u ON p.author_id = u.id 
     WHERE p.room_id = %s
@@ -540,44 +1004,48 @@ def get_forum_posts(room_id: str, page: int = 1, limit: int = 20, sort: str = "n
         query += " ORDER BY p.created_at DESC"
     
     query += " LIMIT %s OFFSET %s"
-    return execute_query(query, (room_id, limit, (page - 1) * limit))
+    return decode_json_columns(execute_query(query, (room_id, limit, (page - 1) * limit), replica=True), 'forum_posts')
 
 def get_forum_post_by_id(post_id: str):
-    query = """
-    SELECT p.*, u.name as author_name, u.avatar as author_avatar 
+    query = f"""
+    SELECT {FORUM_POST_COLUMNS}, u.name as author_name, u.avatar as author_avatar 
     FROM forum_posts p 
     JOIN users u ON p.author_id = u.id 
     WHERE p.id = %s
     """
-    return execute_query(query, (post_id,), fetch_one=True)
+    return decode_json_columns(execute_query(query, (post_id,), fetch_one=True), 'forum_posts')
+
+def get_forum_post_room_id(post_id: str):
+    """Room of a post, or None if the post doesn't exist"""
+    query = "SELECT room_id FROM forum_posts WHERE id = %s"
+    result = execute_query(query, (post_id,), fetch_one=True)
+    return result['room_id'] if result else None
 
-def update_forum_post(post_id: str, update_data: dict):
+def update_forum_post(post_id: str, author_id: str, update_data: dict):
+    """Edit a post written by author_id; returns the number of rows matched, None for an empty update; raises DatabaseError on failure"""
     if not update_data:
         return None
     
-    if 'tags' in update_data:
-        update_data['tags'] = json.dumps(update_data['tags'])
-    if 'attachments' in update_data:
-        update_data['attachments'] = json.dumps(update_data['attachments'])
-    
+    update_data = encode_json_columns(update_data, 'forum_posts')
     set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
-    query = f"UPDATE forum_posts SET {set_clause}, is_edited = TRUE, edited_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
-    params = tuple(update_data.values()) + (post_id,)
-    return execute_query(query, params)
+    query = f"UPDATE forum_posts SET {set_clause}, is_edited = TRUE, edited_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP WHERE id = %s AND author_id = %s"
+    params = tuple(update_data.values()) + (post_id, author_id)
+    return execute_query(query, params, prepared=False, rowcount=True, idempotent=True)
 
 def delete_forum_post(post_id: str):
     # Get room_id first for updating counts
-    post_data = get_forum_post_by_id(post_id)
-    if not post_data:
+    room_id = get_forum_post_room_id(post_id)
+    if not room_id:
         return False
     
     query = "DELETE FROM forum_posts WHERE id = %s"
-    result = execute_query(query, (post_id,))
-    
-    if result and post_data:
-        # Update room post count
-        update_query = "UPDATE forum_rooms SET post_count = post_count - 1 WHERE id = %s"
-        execute_query(update_query, (post_data['room_id'],))
+    with transaction():
+        result = execute_query(query, (post_id,))
+        
+        if result:
+            # Update room post count
+            update_query = "UPDATE forum_rooms SET post_count = post_count - 1 WHERE id = %s"
+            execute_query(update_query, (room_id,))
     
     return result
 
@@ -589,31 +1057,39 @@ def like_post(like_data: dict):
     """
     
     params = (like_data['id'], like_data['post_id'], like_data['user_id'])
-    result = execute_query(query, params)
-    
-    if result:
-        # Update post like count
-        update_query = "UPDATE forum_posts SET like_count = like_count + 1 WHERE id = %s"
-        execute_query(update_query, (like_data['post_id'],))
+    with transaction():
+        result = execute_query(query, params)
+        
+        if result:
+            # Update post like count
+            update_query = "UPDATE forum_posts SET like_count = like_count + 1 WHERE id = %s"
+            execute_query(update_query, (like_data['post_id'],))
     
     return result
 
 def unlike_post(post_id: str, user_id: str):
     query = "DELETE FROM forum_post_likes WHERE post_id = %s AND user_id = %s"
-    result = execute_query(query, (post_id, user_id))
-    
-    if result:
-        # Update post like count
-        update_query = "UPDATE forum_posts SET like_count = like_count - 1 WHERE id = %s"
-        execute_query(update_query, (post_id,))
+    with transaction():
+        result = execute_query(query, (post_id, user_id))
+        
+        if result:
+            # Update post like count
+            update_query = "UPDATE forum_posts SET like_count = like_count - 1 WHERE id = %s"
+            execute_query(update_query, (post_id,))
     
     return result
 
-def is_post_liked(post_id: str, user_id: str):
-    query = "SELECT * FROM forum_post_likes WHERE post_id = %s AND user_id = %s"
-    return execute_query(query, (post_id, user_id), fetch_one=True)
+def is_post_liked(post_id: str, user_id: str) -> bool:
+    query = "SELECT EXISTS(SELECT 1 FROM forum_post_likes WHERE post_id = %s AND user_id = %s) AS found"
+    result = execute_query(query, (post_id, user_id), fetch_one=True)
+    return bool(result and result['found'])
 
 # Forum Comments operations
+FORUM_COMMENT_COLUMNS = (
+    "c.id, c.post_id, c.author_id, c.content, c.is_anonymous, c.like_count, "
+    "c.is_edited, c.edited_at, c.created_at, c.updated_at"
+)
+
 def create_forum_comment(comment_data: dict):
     query = """
     INSERT INTO forum_comments (id, post_id, author_id, content, is_anonymous)
@@ -628,61 +1104,70 @@ def create_forum_comment(comment_data: dict):
         comment_data.get('is_anonymous', False)
     )
     
-    result = execute_query(query, params)
-    if result:
-        # Update post comment count
-        update_query = "UPDATE forum_posts SET comment_count = comment_count + 1 WHERE id = %s"
-        execute_query(update_query, (comment_data['post_id'],))
-        
-        # Update room activity
-        post_data = get_forum_post_by_id(comment_data['post_id'])
-        if post_data:
-            update_room_activity(post_data['room_id'])
+    with transaction():
+        result = execute_query(query, params)
+        if result:
+            # Update post comment count
+            update_query = "UPDATE forum_posts SET comment_count = comment_count + 1 WHERE id = %s"
+            execute_query(update_query, (comment_data['post_id'],))
+            
+            # Update room activity
+            room_id = get_forum_post_room_id(comment_data['post_id'])
+            if room_id:
+                update_room_activity(room_id)
     
     return result
 
 def get_forum_comments(post_id: str, page: int = 1, limit: int = 20):
-    query = """
-    SELECT c.*, u.name as author_name, u.avatar as author_avatar 
+    query = f"""
+    SELECT {FORUM_COMMENT_COLUMNS}, u.name as author_name, u.avatar as author_avatar 
     FROM forum_comments c 
     JOIN users u ON c.author_id = u.id 
     WHERE c.post_id = %s 
     ORDER BY c.created_at ASC 
     LIMIT %s OFFSET %s
     """
-    return execute_query(query, (post_id, limit, (page - 1) * limit))
+    return execute_query(query, (post_id, limit, (page - 1) * limit), replica=True)
 
 def get_forum_comment_by_id(comment_id: str):
-    query = """
-    SELECT c.*, u.name as author_name, u.avatar as author_avatar 
+    query = f"""
+    SELECT {FORUM_COMMENT_COLUMNS}, u.name as author_name, u.avatar as author_avatar 
     FROM forum_comments c 
     JOIN users u ON c.author_id = u.id 
     WHERE c.id = %s
     """
     return execute_query(query, (comment_id,), fetch_one=True)
 
-def update_forum_comment(comment_id: str, update_data: dict):
+def get_forum_comment_post_id(comment_id: str):
+    """Post of a comment, or None if the comment doesn't exist"""
+    query = "SELECT post_id FROM forum_comments WHERE id = %s"
+    result = execute_query(query, (comment_id,), fetch_one=True)
+    return result['post_id'] if result else None
+
+def update_forum_comment(comment_id: str, author_id: str, update_data: dict):
+    """Edit a comment written by author_id; returns the number of rows matched, None for an empty update; raises DatabaseError on failure"""
     if not update_data:
         return None
     
     set_clause = ", ".join([f"{key} = %s" for key in update_data.keys()])
-    query = f"UPDATE forum_comments SET {set_clause}, is_edited = TRUE, edited_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
-    params = tuple(update_data.values()) + (comment_id,)
-    return execute_query(query, params)
+    query = f"UPDATE forum_comments SET {set_clause}, is_edited = TRUE, edited_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP WHERE id = %s AND author_id = %s"
+    params = tuple(update_data.values()) + (comment_id, author_id)
+    return execute_query(query, params, prepared=False, rowcount=True, idempotent=True)
 
 def delete_forum_comment(comment_id: str):
     # Get post_id first for updating counts
-    comment_data = get_forum_comment_by_id(comment_id)
-    if not comment_data:
+    post_id = get_forum_comment_post_id(comment_id)
+    if not post_id:
         return False
     
     query = "DELETE FROM forum_comments WHERE id = %s"
-    result = execute_query(query, (comment_id,))
-    
-    if result and comment_data:
-        # Update post comment count
-        update_query = "UPDATE forum_posts SET comment_count = comment_count - 1 WHERE id = %s"
-        execute_query(update_query, (comment_data['post_id'],))
+    with transaction():
+        result = execute_query(query, (comment_id,))
+        
+        if result:
+            # Update post comment count
+            update_query = "UPDATE forum_posts SET comment_count = comment_count - 1 WHERE id = %s"
+            execute_query(update_query, (post_id,))
     
     return result
 
@@ -694,29 +1179,32 @@ def like_comment(like_data: dict):
     """
     
     params = (like_data['id'], like_data['comment_id'], like_data['user_id'])
-    result = execute_query(query, params)
-    
-    if result:
-        # Update comment like count
-        update_query = "UPDATE forum_comments SET like_count = like_count + 1 WHERE id = %s"
-        execute_query(update_query, (like_data['comment_id'],))
+    with transaction():
+        result = execute_query(query, params)
+        
+        if result:
+            # Update comment like count
+            update_query = "UPDATE forum_comments SET like_count = like_count + 1 WHERE id = %s"
+            execute_query(update_query, (like_data['comment_id'],))
     
     return result
 
 def unlike_comment(comment_id: str, user_id: str):
     query = "DELETE FROM forum_comment_likes WHERE comment_id = %s AND user_id = %s"
-    result = execute_query(query, (comment_id, user_id))
-    
-    if result:
-        # Update comment like count
-        update_query = "UPDATE forum_comments SET like_count = like_count - 1 WHERE id = %s"
-        execute_query(update_query, (comment_id,))
+    with transaction():
+        result = execute_query(query, (comment_id, user_id))
+        
+        if result:
+            # Update comment like count
+            update_query = "UPDATE forum_comments SET like_count = like_count - 1 WHERE id = %s"
+            execute_query(update_query, (comment_id,))
     
     return result
 
-def is_comment_liked(comment_id: str, user_id: str):
-    query = "SELECT * FROM forum_comment_likes WHERE comment_id = %s AND user_id = %s"
-    return execute_query(query, (comment_id, user_id), fetch_one=True)
+def is_comment_liked(comment_id: str, user_id: str) -> bool:
+    query = "SELECT EXISTS(SELECT 1 FROM forum_comment_likes WHERE comment_id = %s AND user_id = %s) AS found"
+    result = execute_query(query, (comment_id, user_id), fetch_one=True)
+    return bool(result and result['found'])
 
 # Reports operations
 def create_forum_report(report_data: dict):
@@ -736,25 +1224,26 @@ def create_forum_report(report_data: dict):
     return execute_query(query, params)
 
 def get_user_joined_rooms(user_id: str):
-    query = """
-    SELECT r.* 
+    columns = ", ".join(f"r.{column}" for column in FORUM_ROOM_COLUMNS.split(", "))
+    query = f"""
+    SELECT {columns} 
     FROM forum_rooms r 
     JOIN forum_room_members rm ON r.id = rm.room_id 
     WHERE rm.user_id = %s 
     ORDER BY r.last_activity DESC
     """
-    return execute_query(query, (user_id,))
+    return decode_json_columns(execute_query(query, (user_id,)), 'forum_rooms')
 
 def get_trending_posts(period: str = "week", limit: int = 10):
     if period == "day":
-        date_filter = "DATE(created_at) = CURDATE()"
+        date_filter = "DATE(p.created_at) = CURDATE()"
     elif period == "week":
-        date_filter = "created_at >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)"
+        date_filter = "p.created_at >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)"
     else:  # month
-        date_filter = "created_at >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)"
+        date_filter = "p.created_at >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)"
     
     query = f"""
-    SELECT p.*, u.name as author_name, u.avatar as author_avatar, r.name as room_name
+    SELECT {FORUM_POST_COLUMNS}, u.name as author_name, u.avatar as author_avatar, r.name as room_name
     FROM forum_posts p 
     JOIN users u ON p.author_id = u.id 
     JOIN forum_rooms r ON p.room_id = r.id 
@@ -762,4 +1251,4 @@ def get_trending_posts(period: str = "week", limit: int = 10):
     ORDER BY (p.like_count * 2 + p.comment_count) DESC 
     LIMIT %s
     """
-    return execute_query(query, (limit,))
\ No newline at end of file
+    return decode_json_columns(execute_query(query, (limit,), replica=True), 'forum_posts')
\ No newline at end of file
@@ -0,0 +1,42 @@
+from mysql.connector import errorcode
+
+class DatabaseError(Exception):
+    """A database operation failed and the request can't be completed"""
+
+class TransientDatabaseError(DatabaseError):
+    """Deadlock, lock wait timeout or lost connection that outlasted the retries"""
+
+class DatabaseUnavailableError(DatabaseError):
+    """No connection could be obtained, or the circuit breaker is open"""
+
+class DuplicateEntryError(DatabaseError):
+    """A unique key rejected the write, e.g. the losing side of a race"""
+
+# The server rolled the statement back, so re-running it can't apply it twice
+ROLLED_BACK_ERRNOS = {
+    errorcode.ER_LOCK_DEADLOCK,
+    errorcode.ER_LOCK_WAIT_TIMEOUT,
+}
+
+# The connection died mid-statement; a write may or may not have been applied
+CONNECTION_LOST_ERRNOS = {
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+}
+
+TRANSIENT_ERRNOS = ROLLED_BACK_ERRNOS | CONNECTION_LOST_ERRNOS
+
+# The server can't be reached or dropped us; anything else is about the statement, not the node
+CONNECTION_ERRNOS = CONNECTION_LOST_ERRNOS | {errorcode.CR_CONN_HOST_ERROR}
+
+DUPLICATE_ENTRY_ERRNO = errorcode.ER_DUP_ENTRY
+
+def is_retryable(errno: int, idempotent: bool, in_transaction: bool) -> bool:
+    """Whether a failed statement can be re-run on its own"""
+    if in_transaction:
+        # Earlier statements in the transaction are gone too; only the caller can redo them
+        return False
+    if errno in ROLLED_BACK_ERRNOS:
+        return True
+    return errno in CONNECTION_LOST_ERRNOS and idempotent
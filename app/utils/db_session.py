@@ -0,0 +1,215 @@
+from contextvars import ContextVar
+from contextlib import contextmanager
+from typing import Optional
+from mysql.connector import Error
+from app.database import db
+from app.utils.db_errors import DatabaseError, DatabaseUnavailableError
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DatabaseSession:
+    """
+    Unit of work for one request.
+
+    Statements run in autocommit mode on a pooled connection held only for
+    that statement. Writes that must land together go inside
+    transaction(), which pins one connection until it commits. Handlers
+    are async and the driver blocks, so never await inside transaction():
+    a row lock held across an await can stall every request on the worker
+    that needs the same row, including the one holding it.
+    
+    Once a request has written, replica-eligible reads go to the primary
+    for the rest of the request so it sees its own writes.
+    
+    Side effects that must not be seen before the data is durable, like
+    pushing a new message to other clients, go through after_commit().
+    """
+    def __init__(self):
+        self._connection = None
+        self.in_transaction = False
+        self.primary_only = False
+        self._after_commit = []
+
+    def get_connection(self):
+        if self._connection is None:
+            self._connection = db.get_connection()
+        return self._connection
+
+    def begin(self):
+        if self.in_transaction:
+            return
+        connection = self.get_connection()
+        if connection is None:
+            raise DatabaseUnavailableError("No database connection available")
+        connection.start_transaction()
+        self.in_transaction = True
+        self.primary_only = True
+
+    def after_commit(self, callback):
+        """Run callback once the open transaction commits, or right away if none is open"""
+        if not self.in_transaction:
+            callback()
+            return
+        self._after_commit.append(callback)
+
+    def commit(self):
+        if not self.in_transaction:
+            return
+        self.in_transaction = False
+        self._connection.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error("❌ After-commit callback failed: %s", e)
+
+    def rollback(self):
+        self._after_commit = []
+        if not self.in_transaction:
+            return
+        self.in_transaction = False
+        try:
+            self._connection.rollback()
+        except Error as e:
+            logger.error("❌ Rollback failed: %s", e)
+
+    def discard_connection(self):
+        """Give back a connection the server dropped; the next query checks out a fresh one"""
+        if self._connection is None:
+            return
+        # Whatever the transaction held died with the server session
+        self.in_transaction = False
+        self._after_commit = []
+        try:
+            db.release_connection(self._connection)
+        except Error as e:
+            logger.warning("⚠️  Could not return dropped connection: %s", e)
+        self._connection = None
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in a transaction, joining the request's open one if there is one"""
+        if self.in_transaction:
+            yield self
+            return
+
+        self.begin()
+        try:
+            yield self
+        except Exception:
+            self.rollback()
+            self._return_connection()
+            raise
+        try:
+            self.commit()
+        except Error as e:
+            logger.error("❌ Failed to commit transaction: %s", e)
+            self.in_transaction = True
+            self.rollback()
+            raise DatabaseError(f"Commit failed: {e}") from e
+        finally:
+            self._return_connection()
+
+    def _return_connection(self):
+        if self._connection is not None and not self.in_transaction:
+            db.release_connection(self._connection)
+            self._connection = None
+
+    def close(self, commit: bool = True) -> bool:
+        """Finish pending work and return the connection; False if the commit failed"""
+        if self._connection is None:
+            return True
+        try:
+            if commit:
+                self.commit()
+            else:
+                self.rollback()
+            return True
+        except Error as e:
+            logger.error("❌ Failed to commit request transaction: %s", e)
+            self.in_transaction = True
+            self.rollback()
+            return False
+        finally:
+            db.release_connection(self._connection)
+            self._connection = None
+
+_current_session: ContextVar[Optional[DatabaseSession]] = ContextVar("db_session", default=None)
+_force_primary: ContextVar[bool] = ContextVar("force_primary", default=False)
+
+def start_session():
+    session = DatabaseSession()
+    token = _current_session.set(session)
+    return session, token
+
+def end_session(session: DatabaseSession, token, commit: bool = True) -> bool:
+    _current_session.reset(token)
+    return session.close(commit)
+
+def get_current_session() -> Optional[DatabaseSession]:
+    return _current_session.get()
+
+@contextmanager
+def transaction():
+    """
+    Run a block in one transaction: the current request's session, or a
+    private session outside a request (WebSocket handlers, background
+    tasks), so on_commit() callbacks still wait for the commit
+    """
+    session = _current_session.get()
+    if session is not None:
+        with session.transaction():
+            yield session
+        return
+    
+    session, token = start_session()
+    try:
+        with session.transaction():
+            yield session
+    finally:
+        end_session(session, token)
+
+def on_commit(callback):
+    """Run callback after the current request's writes commit; immediately outside a session"""
+    session = _current_session.get()
+    if session is None:
+        callback()
+    else:
+        session.after_commit(callback)
+
+@contextmanager
+def read_from_primary():
+    """Send replica-eligible reads in this block to the primary, e.g. right after a write elsewhere"""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+def replica_reads_allowed() -> bool:
+    if _force_primary.get():
+        return False
+    session = _current_session.get()
+    return session is None or not session.primary_only
+
+async def get_db_session():
+    """Dependency for the current request's session, or a private one outside HTTP requests"""
+    session = get_current_session()
+    if session is not None:
+        yield session
+        return
+
+    # Teardown may run in another context than setup, so clear rather than reset the var
+    session = DatabaseSession()
+    _current_session.set(session)
+    failed = False
+    try:
+        yield session
+    except Exception:
+        failed = True
+        raise
+    finally:
+        _current_session.set(None)
+        session.close(commit=not failed)
@@ -0,0 +1,39 @@
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator; fall back to the stdlib encoder
+    orjson = None
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes datetimes, enums and Pydantic models natively, using orjson when installed"""
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content,
+            default=_default,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":")
+        ).encode("utf-8")
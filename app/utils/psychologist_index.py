@@ -0,0 +1,223 @@
+from app.utils.database import get_all_psychologists, get_psychologist_by_id
+from app.utils.serializers import serialize_row, PSYCHOLOGIST_FIELDS
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Sort name -> key over an entry; ties fall back to name so pages are stable
+SORT_KEYS = {
+    "rating": lambda entry: (-entry.rating, entry.name_key),
+    "price_asc": lambda entry: (entry.price, entry.name_key),
+    "price_desc": lambda entry: (-entry.price, entry.name_key),
+    "experience": lambda entry: (-entry.experience, entry.name_key),
+    "name": lambda entry: (entry.name_key,),
+}
+
+def parse_clock(value: str) -> int:
+    """Minutes since midnight for an HH:MM string"""
+    hours, _, minutes = value.strip().partition(":")
+    total = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= total <= 24 * 60:
+        raise ValueError(f"Invalid time: {value}")
+    return total
+
+def _parse_windows(slots) -> list:
+    windows = []
+    for slot in slots or []:
+        start, _, end = str(slot).partition("-")
+        try:
+            windows.append((parse_clock(start), parse_clock(end)))
+        except ValueError:
+            logger.warning("⚠️  Skipping unreadable availability slot: %s", slot)
+    return windows
+
+class _Entry:
+    """A psychologist with its filter and sort fields precomputed"""
+    __slots__ = (
+        'id', 'data', 'name_key', 'price', 'rating', 'experience', 'is_available',
+        'specializations', 'languages', 'windows', 'search_text'
+    )
+
+    def __init__(self, row: dict):
+        self.id = row['id']
+        self.data = serialize_row(row, PSYCHOLOGIST_FIELDS)
+        self.name_key = (row.get('name') or "").lower()
+        self.price = float(row.get('price_per_hour') or 0)
+        self.rating = float(row.get('rating') or 0)
+        self.experience = row.get('experience') or 0
+        self.is_available = bool(row.get('is_available'))
+        self.specializations = {value.lower() for value in row.get('specialization') or []}
+        self.languages = {value.lower() for value in row.get('languages') or []}
+        availability = row.get('availability') or {}
+        self.windows = {
+            day.lower(): _parse_windows(slots)
+            for day, slots in availability.items()
+            if day.lower() in WEEKDAYS
+        }
+        self.search_text = f"{row.get('name') or ''} {row.get('bio') or ''}".lower()
+
+    def is_open(self, day: str = None, minute: int = None) -> bool:
+        days = (day,) if day else self.windows.keys()
+        for candidate in days:
+            windows = self.windows.get(candidate)
+            if not windows:
+                continue
+            if minute is None:
+                return True
+            if any(start <= minute < end for start, end in windows):
+                return True
+        return False
+
+class _Snapshot:
+    """Immutable view of the index; searches read one while a rebuild swaps in the next"""
+    def __init__(self, entries: dict):
+        self.entries = entries
+        self.by_specialization = {}
+        self.by_language = {}
+        self.by_weekday = {}
+        for entry in entries.values():
+            for value in entry.specializations:
+                self.by_specialization.setdefault(value, set()).add(entry.id)
+            for value in entry.languages:
+                self.by_language.setdefault(value, set()).add(entry.id)
+            for day, windows in entry.windows.items():
+                if windows:
+                    self.by_weekday.setdefault(day, set()).add(entry.id)
+        self.orders = {
+            name: sorted(entries.values(), key=key)
+            for name, key in SORT_KEYS.items()
+        }
+
+class PsychologistIndex:
+    """
+    In-memory search index over the psychologists table, which is small
+    and read far more than written. Directory searches are answered
+    entirely from memory.
+
+    Writes through this process apply their row with upsert() after
+    commit. A periodic reload picks up writes made by other workers.
+    """
+    def __init__(self):
+        self._snapshot = None
+        # Rows upserted while a load is reading the table, re-applied over its result
+        self._upserted_during_load = None
+        self._lock = threading.Lock()
+
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def load(self):
+        with self._lock:
+            self._upserted_during_load = {}
+        try:
+            rows = get_all_psychologists()
+            entries = {row['id']: _Entry(row) for row in rows}
+            with self._lock:
+                entries.update(self._upserted_during_load)
+                self._snapshot = _Snapshot(entries)
+        finally:
+            with self._lock:
+                self._upserted_during_load = None
+        logger.info("✅ Psychologist index loaded: %s entries", len(entries))
+
+    def get(self, psychologist_id: str):
+        """Indexed entry for one psychologist, fetching it if this worker hasn't seen it yet"""
+        snapshot = self._snapshot
+        entry = snapshot.entries.get(psychologist_id) if snapshot is not None else None
+        if entry is not None:
+            return entry
+        
+        row = get_psychologist_by_id(psychologist_id)
+        if not row:
+            return None
+        self.upsert(row)
+        return _Entry(row)
+
+    def upsert(self, row: dict):
+        """Apply a created or updated psychologist row to the index"""
+        entry = _Entry(row)
+        with self._lock:
+            if self._upserted_during_load is not None:
+                self._upserted_during_load[entry.id] = entry
+            if self._snapshot is None:
+                return
+            entries = dict(self._snapshot.entries)
+            entries[entry.id] = entry
+            self._snapshot = _Snapshot(entries)
+
+    def search(
+        self,
+        specialization: str = None,
+        language: str = None,
+        min_price: float = None,
+        max_price: float = None,
+        min_rating: float = None,
+        available: bool = None,
+        day: str = None,
+        time: str = None,
+        q: str = None,
+        sort: str = "rating",
+        page: int = 1,
+        limit: int = 20
+    ):
+        """Return (total matches, JSON-ready rows for the page)"""
+        if self._snapshot is None:
+            # The startup load failed; load now rather than serve an empty directory
+            self.load()
+        snapshot = self._snapshot
+
+        # Intersect the inverted indexes first, smallest set leading
+        facets = []
+        if specialization:
+            facets.append(snapshot.by_specialization.get(specialization.lower(), set()))
+        if language:
+            facets.append(snapshot.by_language.get(language.lower(), set()))
+        if day:
+            facets.append(snapshot.by_weekday.get(day, set()))
+        candidates = None
+        if facets:
+            facets.sort(key=len)
+            candidates = facets[0].intersection(*facets[1:])
+            if not candidates:
+                return 0, []
+
+        minute = parse_clock(time) if time else None
+        terms = q.lower().split() if q else []
+
+        matches = []
+        for entry in snapshot.orders[sort]:
+            if candidates is not None and entry.id not in candidates:
+                continue
+            if min_price is not None and entry.price < min_price:
+                continue
+            if max_price is not None and entry.price > max_price:
+                continue
+            if min_rating is not None and entry.rating < min_rating:
+                continue
+            if available is not None and entry.is_available != available:
+                continue
+            if minute is not None and not entry.is_open(day, minute):
+                continue
+            if terms and not all(term in entry.search_text for term in terms):
+                continue
+            matches.append(entry.data)
+
+        offset = (page - 1) * limit
+        return len(matches), matches[offset:offset + limit]
+
+    async def refresh_periodically(self, interval_seconds: float):
+        """Reload forever; run as a background task"""
+        while True:
+            try:
+                await run_in_threadpool(self.load)
+            except Exception as e:
+                logger.error("❌ Failed to reload psychologist index: %s", e)
+            await asyncio.sleep(interval_seconds)
+
+# Global index instance
+psychologist_index = PsychologistIndex()
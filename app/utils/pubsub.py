@@ -0,0 +1,117 @@
+from app.config import settings
+from app.utils.metrics import registry, Counter, Gauge
+import asyncio
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator; fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def _dumps(event: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(event).decode("utf-8")
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+
+class Subscription:
+    """One connected client's queue of encoded events; None means it was dropped"""
+    def __init__(self, channel: str, user_id: str, max_queue: int):
+        self.channel = channel
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=max_queue)
+
+    async def next_event(self):
+        return await self.queue.get()
+
+class MessageHub:
+    """
+    In-process fan-out of JSON events to WebSocket subscribers, keyed by
+    channel. publish() never waits on a client: each subscriber has a
+    bounded queue drained by its own connection, and one that falls
+    WS_MAX_QUEUE_SIZE events behind is dropped so it reconnects and
+    catches up over REST. Long-polling requests park on wait() and are
+    woken by the next event on their channel.
+
+    Only reaches clients connected to this process; running several
+    workers needs a shared broker in front of it.
+    """
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self.channels = {}
+        self.waiters = {}
+
+    def subscribe(self, channel: str, user_id: str) -> Subscription:
+        subscription = Subscription(channel, user_id, self.max_queue)
+        self.channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self.channels.get(subscription.channel)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self.channels[subscription.channel]
+
+    async def wait(self, channel: str, timeout: float) -> bool:
+        """Wait for the next event on a channel; False if the timeout passed first"""
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(channel, set()).add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters = self.waiters.get(channel)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self.waiters[channel]
+
+    def publish(self, channel: str, event: dict) -> int:
+        """Queue an event for every subscriber and wake every long-poller on a channel; call from the event loop"""
+        for waiter in self.waiters.pop(channel, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+        subscribers = self.channels.get(channel)
+        if not subscribers:
+            return 0
+
+        # Encode once for the whole fan-out
+        payload = _dumps(event)
+        delivered = 0
+        for subscription in list(subscribers):
+            try:
+                subscription.queue.put_nowait(payload)
+                delivered += 1
+            except asyncio.QueueFull:
+                self._drop(subscription)
+        WS_EVENTS_PUBLISHED.inc(event.get("type", "unknown"))
+        return delivered
+
+    def _drop(self, subscription: Subscription):
+        logger.warning("⚠️  Dropping slow subscriber %s on %s", subscription.user_id, subscription.channel)
+        WS_SUBSCRIBERS_DROPPED.inc()
+        self.unsubscribe(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self.channels.values())
+
+# Global hub instance
+hub = MessageHub(settings.WS_MAX_QUEUE_SIZE)
+
+WS_EVENTS_PUBLISHED = registry.register(Counter(
+    "ws_events_published_total", "Events fanned out to WebSocket subscribers by type", ("type",)
+))
+WS_SUBSCRIBERS_DROPPED = registry.register(Counter(
+    "ws_subscribers_dropped_total", "WebSocket subscribers dropped for falling behind"
+))
+registry.register(Gauge("ws_subscribers", "WebSocket subscribers connected to this process", hub.subscriber_count))
@@ -0,0 +1,61 @@
+from contextvars import ContextVar
+from contextlib import contextmanager
+from typing import Optional
+
+class QueryStats:
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_query = None
+
+    def record(self, query: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_query = query
+
+        if self.parent is not None:
+            self.parent.record(query, duration)
+
+    def server_timing(self) -> str:
+        """Build the Server-Timing header value for this request"""
+        return (
+            f'db;dur={self.total_time * 1000:.2f};desc="{self.count} queries", '
+            f'db-slowest;dur={self.slowest_time * 1000:.2f}'
+        )
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def start_query_stats():
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    return stats, token
+
+def reset_query_stats(token):
+    _current_stats.reset(token)
+
+def get_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+def record_query(query: str, duration: float):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(query, duration)
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """Fail if the wrapped block issues more than max_queries statements"""
+    stats, token = start_query_stats()
+    try:
+        yield stats
+    finally:
+        reset_query_stats(token)
+
+    if stats.count > max_queries:
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, got {stats.count} "
+            f"(slowest: {stats.slowest_query!r})"
+        )
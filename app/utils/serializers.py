@@ -0,0 +1,160 @@
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+
+# Converters turn a raw DB column value into the JSON-ready value the
+# matching Pydantic response model would have produced.
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+def _float(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+def _bool(value):
+    return bool(value) if value is not None else value
+
+def _time(value):
+    # MySQL TIME columns come back as timedelta
+    if isinstance(value, timedelta):
+        total_seconds = int(value.total_seconds())
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return value.isoformat() if value is not None and not isinstance(value, str) else value
+
+# JSON columns arrive already decoded by the data layer
+def _json_list(value):
+    return value or []
+
+def _json_dict(value):
+    return value or {}
+
+def _int_or_zero(value):
+    return value or 0
+
+# Field mappings per table: (response key, converter or None)
+MOOD_ENTRY_FIELDS = (
+    ('id', None),
+    ('user_id', None),
+    ('mood', None),
+    ('energy_level', None),
+    ('sleep_hours', _float),
+    ('activities', _json_list),
+    ('tags', _json_list),
+    ('note', None),
+    ('timestamp', _iso),
+    ('created_at', _iso),
+)
+
+PSYCHOLOGIST_FIELDS = (
+    ('id', None),
+    ('name', None),
+    ('specialization', _json_list),
+    ('experience', _int_or_zero),
+    ('rating', _float),
+    ('price_per_hour', _float),
+    ('languages', _json_list),
+    ('availability', _json_dict),
+    ('avatar', None),
+    ('bio', None),
+    ('is_available', _bool),
+    ('created_at', _iso),
+    ('updated_at', _iso),
+)
+
+CONSULTATION_FIELDS = (
+    ('id', None),
+    ('user_id', None),
+    ('psychologist_id', None),
+    ('type', None),
+    ('status', None),
+    ('preferred_date', _iso),
+    ('preferred_time', _time),
+    ('duration', None),
+    ('reason', None),
+    ('urgency', None),
+    ('price', _float),
+    ('notes', None),
+    ('scheduled_at', _iso),
+    ('started_at', _iso),
+    ('completed_at', _iso),
+    ('created_at', _iso),
+    ('updated_at', _iso),
+)
+
+CONSULTATION_LIST_FIELDS = CONSULTATION_FIELDS + (
+    ('psychologist_name', None),
+)
+
+CONSULTATION_QUEUE_FIELDS = CONSULTATION_FIELDS + (
+    ('user_name', None),
+)
+
+MESSAGE_FIELDS = (
+    ('id', None),
+    ('consultation_id', None),
+    ('sender_id', None),
+    ('content', None),
+    ('type', None),
+    ('attachments', _json_list),
+    ('is_read', _bool),
+    ('read_at', _iso),
+    ('created_at', _iso),
+)
+
+FORUM_POST_FIELDS = (
+    ('id', None),
+    ('room_id', None),
+    ('author_id', None),
+    ('author_name', None),
+    ('author_avatar', None),
+    ('content', None),
+    ('is_anonymous', _bool),
+    ('mood', None),
+    ('tags', _json_list),
+    ('attachments', _json_list),
+    ('like_count', None),
+    ('comment_count', None),
+    ('share_count', None),
+    ('is_edited', _bool),
+    ('edited_at', _iso),
+    ('created_at', _iso),
+    ('updated_at', _iso),
+)
+
+FORUM_COMMENT_FIELDS = (
+    ('id', None),
+    ('post_id', None),
+    ('author_id', None),
+    ('author_name', None),
+    ('author_avatar', None),
+    ('content', None),
+    ('is_anonymous', _bool),
+    ('like_count', None),
+    ('is_edited', _bool),
+    ('edited_at', _iso),
+    ('created_at', _iso),
+    ('updated_at', _iso),
+)
+
+def serialize_row(row: dict, fields: tuple) -> dict:
+    """Map a DB row straight to a JSON-ready dict using a precompiled field mapping"""
+    get = row.get
+    return {
+        key: convert(get(key)) if convert is not None else get(key)
+        for key, convert in fields
+    }
+
+def serialize_rows(rows, fields: tuple) -> list:
+    if not rows:
+        return []
+    return [serialize_row(row, fields) for row in rows]
+
+def anonymize_author(item: dict):
+    """Hide author details on anonymous forum posts and comments"""
+    if item['is_anonymous']:
+        item['author_name'] = "Anonymous User"
+        item['author_avatar'] = None
+    elif item['author_name'] is None:
+        item['author_name'] = 'User'
+    return item
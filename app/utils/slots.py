@@ -0,0 +1,66 @@
+from bisect import bisect_right
+from datetime import datetime, date, time, timedelta
+from app.utils.psychologist_index import WEEKDAYS
+
+def booked_intervals(rows) -> list:
+    """Sorted, merged (start, end) datetimes covered by booked consultations"""
+    intervals = []
+    for row in rows or []:
+        booked_date, booked_time = row['preferred_date'], row['preferred_time']
+        if booked_date is None or booked_time is None:
+            continue
+        # MySQL TIME columns come back as timedelta
+        if isinstance(booked_time, timedelta):
+            start = datetime.combine(booked_date, time()) + booked_time
+        else:
+            start = datetime.combine(booked_date, booked_time)
+        intervals.append((start, start + timedelta(minutes=row['duration'] or 60)))
+    return _merge(sorted(intervals))
+
+def _merge(intervals: list) -> list:
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def free_slots(windows: dict, busy: list, start_date: date, end_date: date, duration: int, step: int, now: datetime) -> list:
+    """
+    Expand weekly availability windows (weekday -> [(start_minute, end_minute)])
+    into bookable slots between two dates, leaving out any that overlap a
+    busy interval or have already started. Slots come out in time order,
+    so one pointer walks the busy list alongside them: O(slots + bookings).
+    """
+    slots = []
+    length = timedelta(minutes=duration)
+    index = 0
+    day = start_date
+    while day <= end_date:
+        midnight = datetime.combine(day, time())
+        for window_start, window_end in _merge(sorted(windows.get(WEEKDAYS[day.weekday()], ()))):
+            minute = window_start
+            while minute + duration <= window_end:
+                start = midnight + timedelta(minutes=minute)
+                end = start + length
+                minute += step
+                if start < now:
+                    continue
+                # A booking that ends by this slot's start can't overlap any later slot either
+                while index < len(busy) and busy[index][1] <= start:
+                    index += 1
+                if index < len(busy) and busy[index][0] < end:
+                    continue
+                slots.append({"start": start.isoformat(), "end": end.isoformat()})
+        day += timedelta(days=1)
+    return slots
+
+def overlaps(busy: list, start: datetime, end: datetime) -> bool:
+    """Whether [start, end) intersects any interval in a sorted, merged busy list"""
+    index = bisect_right(busy, (start, datetime.max))
+    # Only the interval starting at or before `start` and the one after it can intersect
+    if index > 0 and busy[index - 1][1] > start:
+        return True
+    return index < len(busy) and busy[index][0] < end
@@ -0,0 +1,111 @@
+from collections import deque
+from datetime import datetime
+from typing import Optional
+from mysql.connector import Error
+from app.config import settings
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Re-EXPLAIN a template at most this often, so a hot slow query doesn't double its own cost
+EXPLAIN_INTERVAL_SECONDS = 60
+MAX_TEMPLATES = 500
+
+def normalize_query(query: str) -> str:
+    return _WHITESPACE.sub(" ", query).strip()
+
+def param_shape(params) -> list:
+    """Describe parameters by type only - values may contain personal health data"""
+    return [type(param).__name__ for param in (params or ())]
+
+class SlowQueryLog:
+    def __init__(self, max_entries: int):
+        self.entries = deque(maxlen=max_entries)
+        self.templates = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, params, duration: float, helper: str, connection=None):
+        template = normalize_query(query)
+        duration_ms = round(duration * 1000, 2)
+        shape = param_shape(params)
+
+        logger.warning(
+            "🐢 Slow query helper=%s duration_ms=%.2f params=%s query=%s",
+            helper, duration_ms, shape, template
+        )
+
+        with self._lock:
+            stats = self.templates.get(template)
+            if stats is None:
+                if len(self.templates) >= MAX_TEMPLATES:
+                    return
+                stats = {
+                    "template": template,
+                    "helper": helper,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "plan": None,
+                    "explained_at": 0.0
+                }
+                self.templates[template] = stats
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            needs_plan = connection is not None and time.monotonic() - stats["explained_at"] > EXPLAIN_INTERVAL_SECONDS
+            if needs_plan:
+                stats["explained_at"] = time.monotonic()
+
+        # EXPLAIN runs outside the lock; only the bookkeeping is serialized
+        plan = self._explain(connection, query, params) if needs_plan else None
+        with self._lock:
+            if plan is not None:
+                stats["plan"] = plan
+            else:
+                plan = stats["plan"]
+
+            self.entries.append({
+                "template": template,
+                "helper": helper,
+                "param_shape": shape,
+                "duration_ms": duration_ms,
+                "plan": plan,
+                "recorded_at": datetime.now().isoformat()
+            })
+
+    def _explain(self, connection, query: str, params) -> Optional[list]:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(f"EXPLAIN {query}", params or ())
+            return cursor.fetchall()
+        except Error as e:
+            logger.warning("⚠️  Could not EXPLAIN slow query: %s", e)
+            return None
+        finally:
+            cursor.close()
+
+    def top_templates(self, limit: int = 10) -> list:
+        with self._lock:
+            templates = sorted(self.templates.values(), key=lambda stats: stats["max_ms"], reverse=True)
+            return [
+                {
+                    "template": stats["template"],
+                    "helper": stats["helper"],
+                    "count": stats["count"],
+                    "max_ms": stats["max_ms"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                    "plan": stats["plan"]
+                }
+                for stats in templates[:limit]
+            ]
+
+    def recent(self, limit: int = 20) -> list:
+        with self._lock:
+            return list(self.entries)[-limit:]
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE)
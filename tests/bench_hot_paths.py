@@ -0,0 +1,172 @@
+"""
+Micro-benchmarks for the hot paths the performance work touched, each
+timed against the code path it replaced. Not collected by pytest; run
+
+    python -m tests.bench_hot_paths [case ...]
+
+Times are per call, best of a few timeit repeats; peak is what one call
+allocates while its result is alive. Compare current against before on
+the same machine, not absolute values across machines.
+"""
+from datetime import datetime
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+import json
+import sys
+import timeit
+import tracemalloc
+
+ROWS = 50
+
+def _mood_rows():
+    return [{
+        'id': f"mood-{i}", 'user_id': 'u1', 'mood': 'happy', 'energy_level': 7,
+        'sleep_hours': Decimal('7.5'), 'activities': ['walk', 'read'], 'tags': ['work'],
+        'note': 'Felt fine', 'timestamp': datetime(2026, 1, 1, 9, i % 60),
+        'created_at': datetime(2026, 1, 1, 9, i % 60)
+    } for i in range(ROWS)]
+
+def bench_serializer():
+    """50 mood rows to JSON-ready dicts: field mapping vs model -> Pydantic -> jsonable_encoder"""
+    from app.models.mood import MoodEntry
+    from app.schemas.mood import MoodEntryResponse
+    from app.utils.serializers import serialize_rows, MOOD_ENTRY_FIELDS
+    rows = _mood_rows()
+
+    def current():
+        return serialize_rows(rows, MOOD_ENTRY_FIELDS)
+
+    def before():
+        return jsonable_encoder([MoodEntryResponse(**MoodEntry.from_dict(row).to_dict()) for row in rows])
+
+    return current, before
+
+def bench_json_response():
+    """Render a 50-row payload holding datetimes and Decimals: FastJSONResponse vs jsonable_encoder + JSONResponse"""
+    from fastapi.responses import JSONResponse
+    from app.utils.json_response import FastJSONResponse
+    payload = {"success": True, "data": _mood_rows()}
+
+    def current():
+        return FastJSONResponse(payload).body
+
+    def before():
+        return JSONResponse(jsonable_encoder(payload)).body
+
+    return current, before
+
+def bench_models():
+    """
+    Hydrate 50 mood rows into models: __slots__ vs the same class with a
+    per-instance __dict__. Expect the times to match; the difference is
+    the peak allocation.
+    """
+    from app.models.mood import MoodEntry
+    rows = _mood_rows()
+
+    class UnslottedMoodEntry(MoodEntry):
+        pass
+
+    def current():
+        return [MoodEntry.from_dict(row) for row in rows]
+
+    def before():
+        return [UnslottedMoodEntry.from_dict(row) for row in rows]
+
+    return current, before
+
+def _psychologist_rows():
+    # As the connector returns them: JSON columns still encoded
+    return [{
+        'id': f"psy-{i}", 'name': 'Dr. Example', 'specialization': '["anxiety", "depression", "stress"]',
+        'experience': 8, 'rating': Decimal('4.80'), 'price_per_hour': Decimal('150000.00'),
+        'languages': '["id", "en"]', 'availability': '{"monday": ["09:00-12:00", "13:00-17:00"], "friday": ["09:00-12:00"]}',
+        'avatar': None, 'bio': 'Clinical psychologist', 'is_available': 1,
+        'created_at': datetime(2026, 1, 1), 'updated_at': datetime(2026, 1, 1)
+    } for i in range(ROWS)]
+
+def bench_json_columns():
+    """50 psychologist rows with encoded JSON columns: decode_json_columns then serialize vs parsing inside the converters"""
+    from app.utils.database import decode_json_columns
+    from app.utils.serializers import serialize_rows, PSYCHOLOGIST_FIELDS
+    rows = _psychologist_rows()
+
+    def parse(value, empty):
+        if isinstance(value, (str, bytes, bytearray)):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return empty()
+        return value or empty()
+
+    # The converters as they were: each JSON field parsed with the stdlib where it is serialized
+    converters = {'specialization': list, 'languages': list, 'availability': dict}
+    before_fields = tuple(
+        (key, (lambda value, empty=converters[key]: parse(value, empty)) if key in converters else convert)
+        for key, convert in PSYCHOLOGIST_FIELDS
+    )
+
+    def current():
+        return serialize_rows(decode_json_columns([dict(row) for row in rows], 'psychologists'), PSYCHOLOGIST_FIELDS)
+
+    def before():
+        return serialize_rows([dict(row) for row in rows], before_fields)
+
+    return current, before
+
+def bench_prepared_statements():
+    """
+    A point lookup through execute_query: the per-connection prepared
+    statement cache vs a text-protocol query. The saving is server side,
+    so this needs the MySQL server from .env and is skipped without one.
+    """
+    from app.database import db
+    from app.utils.database import execute_query
+    if db.ping() is None:
+        return None
+    query = "SELECT id, name, email FROM users WHERE id = %s"
+
+    def current():
+        return execute_query(query, ('bench-user',), fetch_one=True, prepared=True)
+
+    def before():
+        return execute_query(query, ('bench-user',), fetch_one=True, prepared=False)
+
+    return current, before
+
+CASES = {
+    'serializer': bench_serializer,
+    'json_response': bench_json_response,
+    'models': bench_models,
+    'json_columns': bench_json_columns,
+    'prepared_statements': bench_prepared_statements,
+}
+
+def _per_call(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+def _peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main(names):
+    print(f"{'case':<20}{'current':>12}{'before':>12}{'speedup':>9}{'peak now':>12}{'peak before':>13}")
+    for name in names or CASES:
+        timed = CASES[name]()
+        if timed is None:
+            print(f"{name:<20}skipped: no database")
+            continue
+        current, before = timed
+        current_time = _per_call(current, 200)
+        before_time = _per_call(before, 200)
+        print(
+            f"{name:<20}{current_time * 1e6:>10.1f}us{before_time * 1e6:>10.1f}us{before_time / current_time:>8.1f}x"
+            f"{_peak_bytes(current) / 1024:>10.1f}KB{_peak_bytes(before) / 1024:>11.1f}KB"
+        )
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
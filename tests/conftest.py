@@ -0,0 +1,38 @@
+"""
+Shared fixtures. The suite runs without MySQL: `fake_db` swaps the
+connection pool for the in-memory one in tests/fakes.py.
+"""
+from app.config import settings
+from app.database import db
+from app.utils.database import consultation_access_cache, psychologist_bookings_cache
+from app.models.user import User
+from tests.fakes import FakeDatabase
+import pytest
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDatabase(settings.DB_POOL_SIZE)
+    monkeypatch.setattr(db, "pool", fake.pool)
+    monkeypatch.setattr(db, "in_use", 0)
+    monkeypatch.setattr(db.breaker, "failures", 0)
+    monkeypatch.setattr(db.breaker, "opened_at", None)
+    consultation_access_cache.clear()
+    psychologist_bookings_cache.clear()
+    yield fake
+    consultation_access_cache.clear()
+    psychologist_bookings_cache.clear()
+
+@pytest.fixture
+def login_as():
+    """Authenticate every router's get_current_user as the given user for the test"""
+    from app.main import app
+    from app.routes import consultations, forum, forum_comments, forum_posts, messaging, mood, users
+
+    def login(user_id: str, name: str = "Test User"):
+        user = User.from_dict({'id': user_id, 'email': f"{user_id}@example.com", 'name': name})
+        for module in (consultations, forum, forum_comments, forum_posts, messaging, mood, users):
+            app.dependency_overrides[module.get_current_user] = lambda: user
+        return user
+
+    yield login
+    app.dependency_overrides.clear()
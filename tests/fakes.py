@@ -0,0 +1,161 @@
+"""
+In-memory stand-ins for the MySQL pool, so the suite runs without a
+server: connections answer statements from canned handlers and record
+what was executed, committed and rolled back.
+"""
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+import itertools
+import threading
+import time
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, statement, params=()):
+        self.rows, self.rowcount = self.connection.run(" ".join(statement.split()), tuple(params or ()))
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    _ids = itertools.count(1)
+
+    def __init__(self, fake_db):
+        self.fake_db = fake_db
+        self.connection_id = next(self._ids)
+        self.in_transaction = False
+        self.pending = []
+        self.held_locks = set()
+
+    def cursor(self, prepared=False, dictionary=False):
+        return FakeCursor(self)
+
+    def run(self, statement, params):
+        try:
+            self.fake_db.acquire_locks(self, statement, params)
+            self.fake_db.executed.append((statement, params))
+            handler = self.fake_db.find_handler(statement)
+            result = handler(params) if callable(handler) else handler
+        except Error:
+            if not self.in_transaction:
+                self.fake_db.release_locks(self)
+            raise
+        is_select = statement.upper().startswith("SELECT")
+        if not is_select:
+            if self.in_transaction:
+                self.pending.append((statement, params))
+            else:
+                self.fake_db.committed.append((statement, params))
+                self.fake_db.release_locks(self)
+        if is_select:
+            rows = [] if result is None else list(result if isinstance(result, list) else [result])
+            return [dict(row) for row in rows], len(rows)
+        return [], 1 if result is None else result
+
+    def start_transaction(self):
+        self.in_transaction = True
+
+    def commit(self):
+        self.fake_db.committed.extend(self.pending)
+        self._finish()
+
+    def rollback(self):
+        self.fake_db.rolled_back.extend(self.pending)
+        self._finish()
+
+    def _finish(self):
+        self.pending = []
+        self.in_transaction = False
+        self.fake_db.release_locks(self)
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        self.fake_db.checked_out -= 1
+
+class FakePool:
+    def __init__(self, fake_db, size):
+        self.fake_db = fake_db
+        self.size = size
+
+    def get_connection(self):
+        with self.fake_db.lock:
+            if self.fake_db.checked_out >= self.size:
+                raise PoolError("Failed getting connection; pool exhausted")
+            self.fake_db.checked_out += 1
+        return FakeConnection(self.fake_db)
+
+    def _remove_connections(self):
+        pass
+
+class FakeDatabase:
+    """
+    Statement handlers are matched by substring, first registered wins;
+    unmatched SELECTs return no rows and unmatched writes match one row.
+    A handler is a value or a callable taking the params; fail() injects errors.
+    """
+    def __init__(self, pool_size):
+        self.handlers = []
+        self.executed = []
+        self.committed = []
+        self.rolled_back = []
+        self.checked_out = 0
+        self.lock = threading.Lock()
+        self.row_locks = {}
+        self.locking = []
+        self.lock_condition = threading.Condition()
+        self.lock_wait_timeout = 1.0
+        self.pool = FakePool(self, pool_size)
+
+    def on(self, fragment: str, result):
+        self.handlers.append((fragment, result))
+
+    def fail(self, fragment: str, errno: int, msg: str = "injected failure"):
+        def raise_error(params):
+            raise Error(msg=msg, errno=errno)
+        self.on(fragment, raise_error)
+
+    def lock_rows(self, fragment: str, key):
+        """Writes matching fragment take a row lock, keyed by key(params), until commit like InnoDB"""
+        self.locking.append((fragment, key))
+
+    def find_handler(self, statement: str):
+        for fragment, result in self.handlers:
+            if fragment in statement:
+                return result
+        return None
+
+    def acquire_locks(self, connection, statement, params):
+        for fragment, key in self.locking:
+            if fragment not in statement:
+                continue
+            row = key(params)
+            deadline = time.monotonic() + self.lock_wait_timeout
+            with self.lock_condition:
+                while self.row_locks.get(row, connection) is not connection:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Error(msg="Lock wait timeout exceeded", errno=1205)
+                    self.lock_condition.wait(remaining)
+                self.row_locks[row] = connection
+                connection.held_locks.add(row)
+
+    def release_locks(self, connection):
+        with self.lock_condition:
+            for row in connection.held_locks:
+                self.row_locks.pop(row, None)
+            connection.held_locks.clear()
+            self.lock_condition.notify_all()
+
+    def statements(self, fragment: str, committed: bool = False) -> list:
+        source = self.committed if committed else self.executed
+        return [(statement, params) for statement, params in source if fragment in statement]
@@ -0,0 +1,118 @@
+"""
+Booking stress run against the MySQL server from .env: hundreds of
+requests for one slot at once, checking that the psychologist row lock
+and uq_consultations_active_slot admit exactly one. Not collected by
+pytest (tests/test_bookings.py is the in-memory version); run
+
+    python -m tests.stress_bookings [requests] [concurrency]
+
+It creates a throwaway user and psychologist, books a slot a year out,
+and deletes both afterwards. Exits non-zero unless exactly one booking
+committed.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth.jwt_handler import create_access_token
+from app.database import db
+from app.models.psychologist import Psychologist
+from app.models.user import User
+from app.utils.database import execute_query, create_user, create_psychologist, create_consultation
+from app.utils.db_errors import DuplicateEntryError
+from app.utils.metrics import DB_QUERY_RETRIES
+from collections import Counter
+import sys
+import threading
+import time
+import uuid
+
+BUSY = "Service temporarily unavailable: database busy, please retry"
+UNAVAILABLE = "Service temporarily unavailable: database unavailable"
+
+def _setup():
+    suffix = uuid.uuid4().hex[:8]
+    user = User.create({'name': 'Stress Test', 'email': f"stress-{suffix}@example.com", 'password': 'x'})
+    psychologist = Psychologist.create({'name': 'Dr. Stress', 'price_per_hour': 100000, 'is_available': True})
+    create_user(user.to_dict())
+    create_psychologist(psychologist.to_dict())
+    return user, psychologist
+
+def _teardown(user, psychologist):
+    execute_query("DELETE FROM consultations WHERE psychologist_id = %s", (psychologist.id,))
+    execute_query("DELETE FROM psychologists WHERE id = %s", (psychologist.id,))
+    execute_query("DELETE FROM users WHERE id = %s", (user.id,))
+
+def _outcome(response) -> str:
+    if response.status_code == 503:
+        detail = response.json().get('detail')
+        # Deadlocks and lock wait timeouts surface as TransientDatabaseError
+        return "503 deadlock/lock timeout" if detail == BUSY else "503 pool exhausted" if detail == UNAVAILABLE else "503"
+    return str(response.status_code)
+
+def run(requests: int, concurrency: int) -> bool:
+    if db.ping() is None:
+        print("skipped: no database")
+        return True
+
+    user, psychologist = _setup()
+    token = create_access_token(data={"sub": user.id, "email": user.email})
+    slot = {
+        "psychologist_id": psychologist.id, "type": "chat",
+        "preferred_date": (date.today() + timedelta(days=365)).isoformat(),
+        "preferred_time": "10:00:00", "duration": 60, "reason": "Stress test"
+    }
+    # Hold every worker until all are ready, so the requests really land together
+    start = threading.Barrier(min(requests, concurrency))
+    retries_before = sum(DB_QUERY_RETRIES.get(helper) for helper in ("lock_psychologist_for_booking", "create_consultation"))
+
+    def book(_):
+        client = TestClient(app)
+        try:
+            start.wait(timeout=10)
+        except threading.BrokenBarrierError:
+            pass
+        started = time.perf_counter()
+        response = client.post(f"/consultations?token={token}", json=slot)
+        return _outcome(response), time.perf_counter() - started
+
+    try:
+        burst_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(book, range(requests)))
+        burst = time.perf_counter() - burst_started
+
+        committed = execute_query(
+            "SELECT COUNT(*) AS booked FROM consultations WHERE psychologist_id = %s AND status IN ('pending', 'confirmed')",
+            (psychologist.id,), fetch_one=True
+        )['booked']
+
+        # The unique key on its own, bypassing the lock and overlap check
+        duplicate_rejected = False
+        try:
+            create_consultation({**slot, 'id': str(uuid.uuid4()), 'user_id': user.id, 'status': 'pending', 'price': 0})
+        except DuplicateEntryError:
+            duplicate_rejected = True
+    finally:
+        _teardown(user, psychologist)
+
+    latencies = sorted(latency for _, latency in results)
+    retries = sum(DB_QUERY_RETRIES.get(helper) for helper in ("lock_psychologist_for_booking", "create_consultation")) - retries_before
+    print(f"{requests} bookings, {concurrency} concurrent, {burst:.2f}s ({requests / burst:.0f} req/s)")
+    for outcome, count in sorted(Counter(outcome for outcome, _ in results).items()):
+        print(f"  {outcome:<28}{count}")
+    print(f"  retried statements          {retries:.0f}")
+    print(
+        f"  latency p50 {latencies[len(latencies) // 2] * 1000:.0f}ms"
+        f"  p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f}ms"
+        f"  max {latencies[-1] * 1000:.0f}ms"
+    )
+    print(f"  committed bookings          {committed}")
+    print(f"  unique key rejects a duplicate insert: {duplicate_rejected}")
+    return committed == 1 and duplicate_rejected
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    requests = args[0] if args else 300
+    concurrency = args[1] if len(args) > 1 else min(requests, 100)
+    sys.exit(0 if run(requests, concurrency) else 1)
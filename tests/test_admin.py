@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.auth.jwt_handler import create_access_token
+
+def _get_slow_queries(user_id: str):
+    token = create_access_token(data={"sub": user_id, "email": f"{user_id}@example.com"})
+    return TestClient(app).get(f"/admin/slow-queries?token={token}")
+
+def test_slow_queries_are_hidden_from_regular_users(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", "admin-1")
+    
+    response = _get_slow_queries("patient-1")
+    
+    assert response.status_code == 403
+
+def test_slow_queries_are_served_to_admins(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", "admin-1, admin-2")
+    
+    response = _get_slow_queries("admin-2")
+    
+    assert response.status_code == 200
+    assert set(response.json()["data"]) == {"threshold_ms", "templates", "recent"}
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils import database
+from app.utils.slots import booked_intervals
+
+def test_upcoming_bookings_include_overnight_sessions_from_yesterday(fake_db):
+    yesterday = date.today() - timedelta(days=1)
+    fake_db.on("AND preferred_date BETWEEN", lambda params: [
+        {'preferred_date': yesterday, 'preferred_time': time(23, 30), 'duration': 90}
+    ] if params[1] <= yesterday else [])
+    
+    busy = booked_intervals(database.get_upcoming_bookings('p1'))
+    
+    # The session runs until 01:00 today, so today's early slots are taken
+    assert busy and busy[0][1].date() == date.today()
+
+def test_invalidation_clears_the_cached_window(fake_db):
+    database.get_upcoming_bookings('p1')
+    database.invalidate_psychologist_bookings('p1')
+    database.get_upcoming_bookings('p1')
+    
+    assert len(fake_db.statements("AND preferred_date BETWEEN")) == 2
+
+SLOT = {
+    "psychologist_id": "p1", "type": "chat", "preferred_date": (date.today() + timedelta(days=3)).isoformat(),
+    "preferred_time": "10:00:00", "duration": 60, "reason": "Need to talk"
+}
+
+def _psychologist(fake_db):
+    fake_db.on("FROM psychologists WHERE id = %s FOR UPDATE", {'id': 'p1', 'is_available': True, 'price_per_hour': 100})
+    # Bookings become visible once inserted; the psychologist row lock keeps the next check waiting until commit
+    booked = []
+    fake_db.on("AND preferred_date BETWEEN", lambda params: list(booked))
+    fake_db.on("INSERT INTO consultations", lambda params: booked.append(
+        {'preferred_date': date.fromisoformat(params[5]), 'preferred_time': time.fromisoformat(params[6]), 'duration': params[7]}
+    ))
+    fake_db.lock_rows("FOR UPDATE", lambda params: ("psychologists", params[0]))
+
+def test_concurrent_bookings_for_one_slot_admit_exactly_one(fake_db, login_as):
+    login_as("u1")
+    _psychologist(fake_db)
+    requests = 5
+    
+    # Each TestClient request runs the app on its own event loop thread, so these really overlap
+    with ThreadPoolExecutor(max_workers=requests) as pool:
+        responses = list(pool.map(lambda _: TestClient(app).post("/consultations", json=SLOT), range(requests)))
+    
+    codes = sorted(response.status_code for response in responses)
+    assert codes == [201] + [409] * (requests - 1)
+    assert len(fake_db.statements("INSERT INTO consultations", committed=True)) == 1
+
+def test_duplicate_slot_from_the_unique_key_is_a_conflict(fake_db, login_as):
+    login_as("u1")
+    # The first matching handler wins, so this shadows the recording insert
+    fake_db.fail("INSERT INTO consultations", errno=1062, msg="Duplicate entry for key 'uq_consultations_active_slot'")
+    _psychologist(fake_db)
+    
+    response = TestClient(app).post("/consultations", json=SLOT)
+    
+    assert response.status_code == 409
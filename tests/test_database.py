@@ -0,0 +1,150 @@
+from mysql.connector import Error
+from app.config import settings
+from app.database import db, ReplicaSet
+from app.utils import database
+from app.utils.db_errors import DatabaseError, TransientDatabaseError
+from app.utils.metrics import DB_QUERY_ERRORS
+from tests.fakes import FakeDatabase
+import asyncio
+import threading
+import time
+import pytest
+
+def test_checkout_waits_for_a_connection_to_come_back(fake_db, monkeypatch):
+    monkeypatch.setattr(fake_db.pool, "size", 1)
+    monkeypatch.setattr(settings, "DB_POOL_WAIT_MS", 1000)
+    held = db.get_connection()
+    threading.Timer(0.1, db.release_connection, (held,)).start()
+    
+    started = time.monotonic()
+    connection = db.get_connection()
+    
+    assert connection is not None
+    assert time.monotonic() - started < 0.5
+    db.release_connection(connection)
+
+def test_checkout_gives_up_after_the_wait(fake_db, monkeypatch):
+    monkeypatch.setattr(fake_db.pool, "size", 1)
+    monkeypatch.setattr(settings, "DB_POOL_WAIT_MS", 100)
+    held = db.get_connection()
+    
+    started = time.monotonic()
+    assert db.get_connection() is None
+    assert 0.1 <= time.monotonic() - started < 0.5
+    db.release_connection(held)
+
+def test_checkout_on_the_event_loop_does_not_wait(fake_db, monkeypatch):
+    monkeypatch.setattr(fake_db.pool, "size", 1)
+    monkeypatch.setattr(settings, "DB_POOL_WAIT_MS", 1000)
+    held = db.get_connection()
+    
+    async def checkout():
+        started = time.monotonic()
+        return db.get_connection(), time.monotonic() - started
+    connection, elapsed = asyncio.run(checkout())
+    
+    assert connection is None
+    assert elapsed < 0.1
+    db.release_connection(held)
+
+def _deadlock_then(fake_db, failures: int, result):
+    calls = []
+    def handler(params):
+        calls.append(params)
+        if len(calls) <= failures:
+            raise Error(msg="Deadlock found", errno=1213)
+        return result
+    fake_db.on("FROM users WHERE id", handler)
+    return calls
+
+def test_retries_back_off_off_the_event_loop(fake_db, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(database.time, "sleep", sleeps.append)
+    monkeypatch.setattr(settings, "DB_RETRY_ATTEMPTS", 2)
+    calls = _deadlock_then(fake_db, 2, {'id': 'u1'})
+    
+    assert database.get_user_by_id('u1')['id'] == 'u1'
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+def test_retries_never_sleep_on_the_event_loop(fake_db, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(database.time, "sleep", sleeps.append)
+    monkeypatch.setattr(settings, "DB_RETRY_ATTEMPTS", 2)
+    calls = _deadlock_then(fake_db, 2, {'id': 'u1'})
+    
+    async def handler():
+        return database.get_user_by_id('u1')
+    
+    with pytest.raises(TransientDatabaseError):
+        asyncio.run(handler())
+    # One immediate retry, then give up rather than stall the loop
+    assert len(calls) == 2
+    assert sleeps == []
+
+@pytest.fixture
+def replica(fake_db, monkeypatch):
+    replica_db = FakeDatabase(settings.DB_POOL_SIZE)
+    replicas = ReplicaSet([("replica-1", 3306)])
+    replicas.replicas[0].pool = replica_db.pool
+    monkeypatch.setattr(db, "replicas", replicas)
+    return replica_db, replicas.replicas[0]
+
+def test_replica_query_error_keeps_the_replica_in_rotation(fake_db, replica):
+    replica_db, node = replica
+    replica_db.fail("FROM mood_entries", errno=1064, msg="You have an error in your SQL syntax")
+    errors_before = DB_QUERY_ERRORS.get("get_mood_distribution")
+    
+    assert database.get_mood_distribution('u1', '2030-01-01', '2030-01-31') == []
+    
+    assert node.is_healthy()
+    assert DB_QUERY_ERRORS.get("get_mood_distribution") == errors_before + 1
+    assert fake_db.statements("FROM mood_entries")
+
+def test_replica_connection_loss_ejects_the_replica(fake_db, replica):
+    replica_db, node = replica
+    replica_db.fail("FROM mood_entries", errno=2013, msg="Lost connection to MySQL server during query")
+    errors_before = DB_QUERY_ERRORS.get("get_mood_distribution")
+    
+    assert database.get_mood_distribution('u1', '2030-01-01', '2030-01-31') == []
+    
+    assert not node.is_healthy()
+    assert DB_QUERY_ERRORS.get("get_mood_distribution") == errors_before + 1
+
+def test_update_consultation_outside_a_request_is_one_transaction(fake_db):
+    fake_db.on("FROM consultations WHERE id = %s FOR UPDATE",
+               {'user_id': 'u1', 'psychologist_id': 'p1', 'status': 'pending', 'duration': 60, 'price': 100})
+    fake_db.fail("INSERT INTO consultation_stats", errno=1452)
+    
+    with pytest.raises(DatabaseError):
+        database.update_consultation('c1', {'status': 'confirmed'})
+    
+    # The status change rolls back with the stats adjustment instead of autocommitting on its own
+    assert not fake_db.statements("UPDATE consultations", committed=True)
+    assert [statement for statement, _ in fake_db.rolled_back if statement.startswith("UPDATE consultations")]
+    assert fake_db.checked_out == 0
+
+def test_queue_pages_walk_each_urgency_as_an_index_range(fake_db):
+    from datetime import date
+    queue = [
+        {'id': 'a', 'urgency': 'high', 'preferred_date': date(2030, 1, 2)},
+        {'id': 'b', 'urgency': 'medium', 'preferred_date': date(2030, 1, 1)},
+        {'id': 'c', 'urgency': 'medium', 'preferred_date': date(2030, 1, 1)},
+        {'id': 'd', 'urgency': 'medium', 'preferred_date': date(2030, 1, 3)},
+        {'id': 'e', 'urgency': 'low', 'preferred_date': date(2030, 1, 1)},
+    ]
+    def bucket(params):
+        urgency, limit = params[2], params[-1]
+        rows = [row for row in queue if row['urgency'] == urgency]
+        if len(params) == 7:
+            rows = [row for row in rows if (row['preferred_date'], row['id']) > (params[4], params[5])]
+        return rows[:limit]
+    fake_db.on("AND c.urgency = %s", bucket)
+    
+    page = database.get_consultation_queue('p1', after=queue[2], limit=2)
+    
+    assert [row['id'] for row in page] == ['d', 'e']
+    # One range read per urgency level, no OR across levels
+    statements = fake_db.statements("AND c.urgency = %s")
+    assert [params[2] for _, params in statements] == ['medium', 'low']
+    assert all("c.urgency <" not in statement for statement, _ in statements)
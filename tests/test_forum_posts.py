@@ -0,0 +1,31 @@
+from app.main import app
+import asyncio
+import httpx
+import time
+
+def _like_post_twice_concurrently():
+    async def burst():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await asyncio.gather(
+                client.post("/forum/posts/p1/like"),
+                client.post("/forum/posts/p1/like")
+            )
+    return asyncio.run(burst())
+
+def test_concurrent_likes_on_one_post_do_not_stall_the_event_loop(fake_db, login_as):
+    login_as("u1")
+    fake_db.on("SELECT room_id FROM forum_posts", {'room_id': 'r1'})
+    fake_db.on("FROM forum_room_members WHERE", {'found': 1})
+    fake_db.on("FROM forum_post_likes WHERE", {'found': 0})
+    # Both likes bump the same counter row, which InnoDB locks until commit
+    fake_db.lock_rows("UPDATE forum_posts SET like_count", lambda params: ("forum_posts", params[0]))
+    
+    started = time.monotonic()
+    responses = _like_post_twice_concurrently()
+    elapsed = time.monotonic() - started
+    
+    assert [response.status_code for response in responses] == [200, 200]
+    # A request waiting on a lock held by its own event loop would sit out the whole lock wait
+    assert elapsed < fake_db.lock_wait_timeout
+    assert len(fake_db.statements("UPDATE forum_posts SET like_count", committed=True)) == 2
+    assert len(fake_db.statements("INSERT INTO forum_post_likes", committed=True)) == 2
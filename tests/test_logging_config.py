@@ -0,0 +1,28 @@
+from app.logging_config import DeferredQueueHandler
+import logging
+import queue
+
+def _logger(log_queue):
+    logger = logging.getLogger("tests.deferred")
+    logger.handlers = [DeferredQueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+def test_mutable_args_are_rendered_when_logged():
+    log_queue = queue.SimpleQueue()
+    update_dict = {'status': 'confirmed'}
+    
+    _logger(log_queue).info("Updating consultation: %s", update_dict)
+    update_dict['completed_at'] = "2026-01-01"
+    
+    assert log_queue.get_nowait().getMessage() == "Updating consultation: {'status': 'confirmed'}"
+
+def test_primitive_args_stay_deferred():
+    log_queue = queue.SimpleQueue()
+    
+    _logger(log_queue).info("Getting messages for consultation: %s", "c1")
+    record = log_queue.get_nowait()
+    
+    assert record.args == ("c1",)
+    assert record.getMessage() == "Getting messages for consultation: c1"
@@ -0,0 +1,130 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth.jwt_handler import create_access_token
+from app.models.user import User
+from app.routes import messaging
+from app.routes.messaging import get_messages_endpoint
+from app.utils.pubsub import hub
+from app.utils.query_stats import assert_max_queries
+from datetime import datetime
+import asyncio
+import pytest
+
+CONSULTATION = {'id': 'c1', 'user_id': 'u1', 'psychologist_id': 'p1', 'status': 'confirmed'}
+
+@pytest.fixture
+def consultation(fake_db):
+    fake_db.on("FROM users WHERE id", {'id': 'u1', 'name': 'Patient', 'email': 'u1@example.com'})
+    fake_db.on("SELECT id, user_id, psychologist_id, status FROM consultations", CONSULTATION)
+    return CONSULTATION
+
+@pytest.fixture
+def listener():
+    subscription = hub.subscribe("consultation:c1", "observer")
+    yield subscription
+    hub.unsubscribe(subscription)
+
+def _socket(client):
+    token = create_access_token(data={"sub": "u1", "email": "u1@example.com"})
+    return client.websocket_connect(f"/consultations/c1/messages/ws?token={token}")
+
+def test_websocket_message_commits_with_unread_counter(fake_db, consultation, listener):
+    with _socket(TestClient(app)) as websocket:
+        websocket.send_json({"type": "message", "data": {"content": "hello"}})
+        event = websocket.receive_json()
+    
+    assert event["type"] == "message"
+    assert event["data"]["content"] == "hello"
+    assert fake_db.statements("INSERT INTO messages", committed=True)
+    assert fake_db.statements("INSERT INTO user_unread_counters", committed=True)
+    assert listener.queue.qsize() == 1
+
+def test_send_locks_consultation_before_assigning_seq(fake_db, consultation, login_as):
+    login_as('u1')
+    response = TestClient(app).post("/consultations/c1/messages", json={"content": "hello"})
+    
+    assert response.status_code == 201
+    statements = [statement for statement, _ in fake_db.executed]
+    lock = statements.index("SELECT id FROM consultations WHERE id = %s FOR UPDATE")
+    insert = next(i for i, statement in enumerate(statements) if statement.startswith("INSERT INTO messages"))
+    assert lock < insert
+
+def test_after_pages_on_seq(fake_db, consultation, login_as):
+    login_as('u1')
+    fake_db.on("SELECT seq, id FROM messages WHERE id", {'seq': 7, 'id': 'm7'})
+    newer = {
+        'id': 'm8', 'consultation_id': 'c1', 'sender_id': 'p1', 'content': 'late commit',
+        'type': 'text', 'attachments': '[]', 'created_at': datetime(2026, 1, 1, 9, 0), 'seq': 8
+    }
+    fake_db.on("AND seq > %s", lambda params: [newer] if params[1] == 7 else [])
+    
+    response = TestClient(app).get("/consultations/c1/messages?after=m7")
+    
+    assert response.status_code == 200
+    assert [message['id'] for message in response.json()['data']['messages']] == ['m8']
+    assert 'seq' not in response.json()['data']['messages'][0]
+    assert fake_db.statements("AND seq > %s")
+
+def test_websocket_message_rolls_back_when_counter_fails(fake_db, consultation, listener):
+    fake_db.fail("INSERT INTO user_unread_counters", errno=1452)
+    with _socket(TestClient(app)) as websocket:
+        websocket.send_json({"type": "message", "data": {"content": "hello"}})
+        event = websocket.receive_json()
+    
+    assert event == {"type": "error", "detail": "Database error, please retry"}
+    assert not fake_db.statements("INSERT INTO messages", committed=True)
+    assert [statement for statement, _ in fake_db.rolled_back if "INSERT INTO messages" in statement]
+    # Nothing is pushed for a message that never committed
+    assert listener.queue.qsize() == 0
+
+def test_read_state_compares_seq(fake_db, consultation, login_as):
+    login_as('u1')
+    fake_db.on("SELECT seq, id FROM messages WHERE id", {'seq': 7, 'id': 'm7'})
+    sent = {
+        'id': 'm8', 'consultation_id': 'c1', 'sender_id': 'u1', 'content': 'read already',
+        'type': 'text', 'attachments': '[]', 'created_at': datetime(2026, 1, 1, 9, 0), 'seq': 8
+    }
+    fake_db.on("AND seq > %s", [sent])
+    fake_db.on("FROM consultation_read_state", [
+        {'user_id': 'p1', 'last_read_message_id': 'm8', 'last_read_seq': 8, 'updated_at': datetime(2026, 1, 1, 9, 5)},
+        {'user_id': 'u1', 'last_read_message_id': 'm8', 'last_read_seq': 8, 'updated_at': datetime(2026, 1, 1, 9, 0)},
+    ])
+    
+    response = TestClient(app).get("/consultations/c1/messages?after=m7")
+    
+    assert response.status_code == 200
+    assert response.json()['data']['messages'][0]['is_read'] is True
+    # The reader's watermark is already at seq 8, so nothing is written
+    assert not fake_db.statements("INSERT INTO consultation_read_state")
+
+def test_message_page_query_count_does_not_grow_with_messages(fake_db, consultation):
+    page = [{
+        'id': f"m{seq}", 'consultation_id': 'c1', 'sender_id': 'p1' if seq % 2 else 'u1', 'content': 'hi',
+        'type': 'text', 'attachments': '[]', 'created_at': datetime(2026, 1, 1, 9, 0), 'seq': seq
+    } for seq in range(1, 51)]
+    fake_db.on("ORDER BY seq ASC LIMIT %s OFFSET %s", page)
+    fake_db.on("FROM consultation_read_state", [
+        {'user_id': 'u1', 'last_read_message_id': 'm50', 'last_read_seq': 50, 'updated_at': datetime(2026, 1, 1, 9, 5)},
+    ])
+    user = User.from_dict({'id': 'u1', 'email': 'u1@example.com', 'name': 'Patient'})
+    
+    # Access check, the page, read states, unread counter: none of them per message
+    with assert_max_queries(4):
+        response = asyncio.run(get_messages_endpoint('c1', user, page=1, limit=50, after=None, wait=0))
+    
+    assert response.status_code == 200
+
+def test_websocket_survives_an_unexpected_frame_error(fake_db, consultation, monkeypatch):
+    def broken_mark_read(consultation_id, reader_id):
+        raise KeyError('seq')
+    monkeypatch.setattr(messaging, "_mark_read", broken_mark_read)
+    
+    with _socket(TestClient(app)) as websocket:
+        websocket.send_json({"type": "read"})
+        error = websocket.receive_json()
+        # The socket is still open and serving frames
+        websocket.send_json({"type": "typing"})
+        follow_up = websocket.receive_json()
+    
+    assert error == {"type": "error", "detail": "Internal server error"}
+    assert follow_up == {"type": "error", "detail": "Unknown frame type: typing"}
@@ -0,0 +1,34 @@
+from app.config import settings
+from app.database import db, ReplicaSet
+from app.utils.psychologist_index import PsychologistIndex
+from tests.fakes import FakeDatabase
+
+def _row(psychologist_id: str, price: int) -> dict:
+    return {'id': psychologist_id, 'name': 'Dr. Example', 'price_per_hour': price, 'is_available': 1}
+
+def test_reload_reads_the_primary(fake_db, monkeypatch):
+    replica_db = FakeDatabase(settings.DB_POOL_SIZE)
+    replicas = ReplicaSet([("replica-1", 3306)])
+    replicas.replicas[0].pool = replica_db.pool
+    monkeypatch.setattr(db, "replicas", replicas)
+    fake_db.on("FROM psychologists", [_row('p1', 100)])
+    
+    index = PsychologistIndex()
+    index.load()
+    
+    assert index.get('p1').price == 100
+    assert not replica_db.statements("FROM psychologists")
+
+def test_reload_keeps_an_upsert_that_lands_while_it_reads(fake_db):
+    index = PsychologistIndex()
+    
+    def stale_table(params):
+        # An update commits on another request after the table read started
+        index.upsert(_row('p1', 250))
+        return [_row('p1', 100), _row('p2', 80)]
+    fake_db.on("FROM psychologists", stale_table)
+    
+    index.load()
+    
+    assert index.get('p1').price == 250
+    assert index.get('p2').price == 80
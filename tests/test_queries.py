@@ -0,0 +1,22 @@
+from pathlib import Path
+import ast
+import re
+
+APP = Path(__file__).resolve().parent.parent / "app"
+# SELECT * or SELECT t.*, at the start of the column list
+SELECT_STAR = re.compile(r"\bSELECT\s+(DISTINCT\s+)?(\w+\.)?\*", re.IGNORECASE)
+
+def _string_literals(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            yield node.lineno, node.value
+
+def test_no_query_selects_every_column():
+    offenders = []
+    for path in sorted(APP.rglob("*.py")):
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        for lineno, text in _string_literals(tree):
+            if SELECT_STAR.search(text):
+                offenders.append(f"{path.relative_to(APP.parent)}:{lineno}")
+    
+    assert offenders == [], "List the columns instead of SELECT *: " + ", ".join(offenders)
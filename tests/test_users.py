@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+def test_profile_update_with_null_preferences(fake_db, login_as):
+    user = login_as("u1", "Patient")
+    user.preferences = {'theme': 'dark'}
+    user.created_at = user.updated_at = "2026-01-01T09:00:00"
+    
+    response = TestClient(app).put("/users/profile", json={"preferences": None, "phone": "0812"})
+    
+    assert response.status_code == 200
+    profile = response.json()['data']['user']
+    assert profile['preferences'] == {}
+    assert profile['phone'] == "0812"
+    assert fake_db.statements("UPDATE users", committed=True)